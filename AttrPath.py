@@ -0,0 +1,202 @@
+""" AttrPath.py: Compiled accessors for attribute paths such as "a.b", "a.b[0]" or "a['key'].b".
+
+Parsing a path string on every access is slow when it is done for every cell of a large table.
+compileAttrPath() parses a path once into an AttrPath whose get() and set() methods are bound to
+precompiled getter/setter chains (operator.attrgetter/itemgetter), and caches the result per path string.
+
+Path syntax:
+    "name"                  obj.name
+    "friend.name"           obj.friend.name
+    "values[0]"             obj.values[0]
+    "values[-1].name"       obj.values[-1].name
+    "info['key']"           obj.info['key']
+    "info[key]"             obj.info['key'] (bare non-integer subscripts are str keys)
+
+Missing values:
+    Lookups that fail because part of the path does not exist raise one of MISSING_ERRORS
+    (AttributeError, LookupError, TypeError). get(obj, default) returns default in that case,
+    whereas get(obj) re-raises so the caller can apply its own policy.
+    Any exception raised inside a getter along the path (e.g. an @property) always propagates,
+    even if it is one of MISSING_ERRORS. See isMissing().
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+import inspect
+import operator
+import types
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+# Exceptions that indicate part of an attribute path does not exist.
+MISSING_ERRORS = (AttributeError, LookupError, TypeError)
+
+# Sentinel for get() without a default.
+_RAISE = object()
+
+
+def parseAttrPath(path):
+    """ Split an attribute path into a list of ('attr', name) or ('item', key) steps.
+    """
+    steps = []
+    i = 0
+    n = len(path)
+    name = ""
+    while i < n:
+        c = path[i]
+        if c == ".":
+            if name:
+                steps.append(('attr', name))
+            elif not steps or steps[-1][0] != 'item':
+                raise ValueError("parseAttrPath: Empty attribute name in '" + path + "'.")
+            name = ""
+            i += 1
+        elif c == "[":
+            if name:
+                steps.append(('attr', name))
+                name = ""
+            j = path.find("]", i)
+            if j == -1:
+                raise ValueError("parseAttrPath: Unmatched '[' in '" + path + "'.")
+            token = path[i+1:j].strip()
+            if len(token) >= 2 and token[0] == token[-1] and token[0] in "'\"":
+                key = token[1:-1]
+            else:
+                try:
+                    key = int(token)
+                except ValueError:
+                    key = token
+            steps.append(('item', key))
+            i = j + 1
+        else:
+            name += c
+            i += 1
+    if name:
+        steps.append(('attr', name))
+    if not steps:
+        raise ValueError("parseAttrPath: Empty attribute path.")
+    return steps
+
+
+def _isDefined(obj, name):
+    """ True if obj has an attribute (e.g. an @property) called name without calling any getter.
+    Unset __slots__ members do not count as defined.
+    """
+    value = inspect.getattr_static(obj, name, _RAISE)
+    return (value is not _RAISE) and not isinstance(value, types.MemberDescriptorType)
+
+
+def _chain(getters):
+    """ Compose a list of single step getters into one getter.
+    """
+    if len(getters) == 1:
+        return getters[0]
+
+    def get(obj):
+        for getter in getters:
+            obj = getter(obj)
+        return obj
+    return get
+
+
+def _compileGetter(steps):
+    """ Return a getter for steps, merging consecutive attribute steps into a single attrgetter.
+    """
+    getters = []
+    names = []
+    for kind, key in steps:
+        if kind == 'attr':
+            names.append(key)
+        else:
+            if names:
+                getters.append(operator.attrgetter(".".join(names)))
+                names = []
+            getters.append(operator.itemgetter(key))
+    if names:
+        getters.append(operator.attrgetter(".".join(names)))
+    return _chain(getters)
+
+
+class AttrPath(object):
+    """ Attribute path compiled into a getter/setter chain.
+    Use compileAttrPath() rather than instantiating this directly so that compiled paths are shared.
+    """
+    __slots__ = ('path', 'steps', '_getter', '_parentGetter', '_leafKind', '_leafKey')
+
+    def __init__(self, path):
+        self.path = path
+        self.steps = parseAttrPath(path)
+        self._getter = _compileGetter(self.steps)
+        self._parentGetter = _compileGetter(self.steps[:-1]) if len(self.steps) > 1 else None
+        self._leafKind, self._leafKey = self.steps[-1]
+
+    def __repr__(self):
+        return "AttrPath(" + repr(self.path) + ")"
+
+    @property
+    def getter(self):
+        """ Raw compiled getter(obj). Raises one of MISSING_ERRORS if the path does not exist,
+        and whatever a getter along the path raises.
+        """
+        return self._getter
+
+    def get(self, obj, default=_RAISE):
+        """ Return the value at this path in obj.
+        If the path does not exist in obj, return default if given, otherwise raise.
+        """
+        if default is _RAISE:
+            return self._getter(obj)
+        try:
+            return self._getter(obj)
+        except MISSING_ERRORS:
+            if not self.isMissing(obj):
+                raise  # Raised inside a getter.
+            return default
+
+    def isMissing(self, obj):
+        """ True if a step of this path does not exist in obj, False if the path exists (even if a getter along
+        the path raises). Walks the path one step at a time, so call it only after a lookup has failed.
+        """
+        for kind, key in self.steps:
+            try:
+                obj = getattr(obj, key) if kind == 'attr' else obj[key]
+            except AttributeError:
+                return (kind == 'item') or not _isDefined(obj, key)
+            except (LookupError, TypeError):
+                return kind == 'item'  # E.g. a missing key, an index out of range or subscripting None.
+            except Exception:
+                return False
+        return False
+
+    def set(self, obj, value):
+        """ Set the value at this path in obj. Intermediate objects must already exist.
+        """
+        if self._parentGetter is not None:
+            obj = self._parentGetter(obj)
+        if self._leafKind == 'attr':
+            setattr(obj, self._leafKey, value)
+        else:
+            obj[self._leafKey] = value
+
+    def parent(self, obj):
+        """ Return the object that holds the leaf of this path (obj itself for single step paths).
+        """
+        return self._parentGetter(obj) if self._parentGetter is not None else obj
+
+
+_compiledPaths = {}
+
+
+def compileAttrPath(path):
+    """ Return the (cached) AttrPath for the path string.
+    """
+    try:
+        return _compiledPaths[path]
+    except KeyError:
+        attrPath = AttrPath(path)
+        _compiledPaths[path] = attrPath
+        return attrPath
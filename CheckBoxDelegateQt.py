@@ -4,11 +4,12 @@
 
 try:
     from PyQt5.QtCore import Qt, QEvent, QPoint, QRect
+    from PyQt5.QtGui import QPainter, QPixmap, QPixmapCache
     from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
 except ImportError:
     try:
         from PyQt4.QtCore import Qt, QEvent, QPoint, QRect
-        from PyQt4.QtGui import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+        from PyQt4.QtGui import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication, QPainter, QPixmap, QPixmapCache
     except ImportError:
         raise ImportError("CheckBoxDelegateQt: Requires PyQt5 or PyQt4.")
 
@@ -20,10 +21,27 @@ class CheckBoxDelegateQt(QStyledItemDelegate):
     """ Delegate for editing bool values via a checkbox with no label centered in its cell.
     Does not actually create a QCheckBox, but instead overrides the paint() method to draw the checkbox directly.
     Mouse events are handled by the editorEvent() method which updates the model's bool value.
+
+    Each distinct checkbox appearance (checked/unchecked, editable/read only, size) is drawn by the style only once
+    into a pixmap in Qt's global QPixmapCache, and then blitted into every cell that looks the same.
+    Cache keys include the current style and palette, so a style or palette change draws new pixmaps.
+    Call clearPixmapCache() to force all checkboxes to be redrawn.
     """
+
+    # Bumped by clearPixmapCache() so that previously cached pixmaps are no longer used.
+    _pixmapCacheGeneration = 0
+
+    # Size of the style's checkbox indicator, keyed by style.
+    _checkBoxSizes = {}
+
     def __init__(self, parent=None):
         QStyledItemDelegate.__init__(self, parent)
 
+    @classmethod
+    def clearPixmapCache(cls):
+        cls._pixmapCacheGeneration += 1
+        cls._checkBoxSizes = {}
+
     def createEditor(self, parent, option, index):
         """ Important, otherwise an editor is created if the user clicks in this cell.
         """
@@ -33,9 +51,24 @@ class CheckBoxDelegateQt(QStyledItemDelegate):
         """ Paint a checkbox without the label.
         """
         checked = bool(index.model().data(index, Qt.DisplayRole))
+        isEditable = bool(index.flags() & Qt.ItemIsEditable)
+        rect = self.getCheckBoxRect(option)
+        painter.drawPixmap(rect.topLeft(), self.getCheckBoxPixmap(checked, isEditable, rect, painter))
+
+    def getCheckBoxPixmap(self, checked, isEditable, rect, painter):
+        """ Return the (cached) pixmap of a checkbox in the given state.
+        """
+        style = QApplication.style()
+        devicePixelRatio = painter.device().devicePixelRatioF() if hasattr(painter.device(), 'devicePixelRatioF') else 1
+        key = "CheckBoxDelegateQt:%d:%d:%d:%d:%d:%dx%d:%g" % (
+            self._pixmapCacheGeneration, id(style), QApplication.palette().cacheKey(),
+            checked, isEditable, rect.width(), rect.height(), devicePixelRatio)
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
         opts = QStyleOptionButton()
         opts.state |= QStyle.State_Active
-        if index.flags() & Qt.ItemIsEditable:
+        if isEditable:
             opts.state |= QStyle.State_Enabled
         else:
             opts.state |= QStyle.State_ReadOnly
@@ -43,8 +76,16 @@ class CheckBoxDelegateQt(QStyledItemDelegate):
             opts.state |= QStyle.State_On
         else:
             opts.state |= QStyle.State_Off
-        opts.rect = self.getCheckBoxRect(option)
-        QApplication.style().drawControl(QStyle.CE_CheckBox, opts, painter)
+        opts.rect = QRect(QPoint(0, 0), rect.size())
+        pixmap = QPixmap(int(rect.width() * devicePixelRatio), int(rect.height() * devicePixelRatio))
+        if devicePixelRatio != 1:
+            pixmap.setDevicePixelRatio(devicePixelRatio)
+        pixmap.fill(Qt.transparent)
+        pixmapPainter = QPainter(pixmap)
+        style.drawControl(QStyle.CE_CheckBox, opts, pixmapPainter)
+        pixmapPainter.end()
+        QPixmapCache.insert(key, pixmap)
+        return pixmap
 
     def editorEvent(self, event, model, option, index):
         """ Change the data in the model and the state of the checkbox if the
@@ -71,13 +112,17 @@ class CheckBoxDelegateQt(QStyledItemDelegate):
     def getCheckBoxRect(self, option):
         """ Get rect for checkbox centered in option.rect.
         """
-        # Get size of a standard checkbox.
-        opts = QStyleOptionButton()
-        checkBoxRect = QApplication.style().subElementRect(QStyle.SE_CheckBoxIndicator, opts, None)
+        # Get size of a standard checkbox (once per style).
+        style = QApplication.style()
+        checkBoxSize = self._checkBoxSizes.get(id(style), None)
+        if checkBoxSize is None:
+            opts = QStyleOptionButton()
+            checkBoxSize = style.subElementRect(QStyle.SE_CheckBoxIndicator, opts, None).size()
+            self._checkBoxSizes[id(style)] = checkBoxSize
         # Center checkbox in option.rect.
         x = option.rect.x()
         y = option.rect.y()
         w = option.rect.width()
         h = option.rect.height()
-        checkBoxTopLeftCorner = QPoint(x + w / 2 - checkBoxRect.width() / 2, y + h / 2 - checkBoxRect.height() / 2)
-        return QRect(checkBoxTopLeftCorner, checkBoxRect.size())
+        checkBoxTopLeftCorner = QPoint(x + w // 2 - checkBoxSize.width() // 2, y + h // 2 - checkBoxSize.height() // 2)
+        return QRect(checkBoxTopLeftCorner, checkBoxSize)
@@ -0,0 +1,451 @@
+""" ColumnarTableModelQt.py: NumPy array backed variant of ObjectListTableModelQt for large homogeneous datasets.
+
+Instead of a list of Python objects, each displayed 'attr' is stored as a single NumPy array (one column per attr),
+so millions of records cost a few bytes per value rather than a full Python object per record.
+Properties are specified exactly as for ObjectListTableModelQt ('attr', 'header', 'mode', 'choices', 'dtype', ...),
+and ObjectListTableViewQt and its delegates work on top of this model unchanged.
+
+For example:
+    columns = {'name': ["A", "B"], 'age': [42, 7], 'friend.name': ["C", "D"]}
+    properties = [
+        {'attr': "name",        'header': "Person", 'mode': "Read Only"},
+        {'attr': "age",         'header': "Age",    'dtype': int},
+        {'attr': "friend.name", 'header': "Friend"}]
+    model = ColumnarTableModelQt(columns, properties)
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+from datetime import datetime
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("ColumnarTableModelQt: Requires numpy.")
+from ObjectListTableModelViewQt import ObjectListTableModelQt
+from AttrPath import compileAttrPath
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+# NumPy dtypes for a property's Python 'dtype'. Anything else is stored in an object array.
+NUMPY_DTYPES = {
+    bool: np.dtype(np.bool_),
+    int: np.dtype(np.int64),
+    float: np.dtype(np.float64),
+    datetime: np.dtype('M8[us]')}  # Microsecond resolution converts back to datetime.datetime.
+
+# Python types for NumPy dtype kinds (used when a property does not specify a 'dtype').
+PYTHON_TYPES = {'b': bool, 'i': int, 'u': int, 'f': float, 'M': datetime, 'U': str, 'S': bytes}
+
+
+def toPyObject(value):
+    """ Convert a NumPy scalar to the equivalent Python object (e.g. np.float64 --> float, np.datetime64 --> datetime).
+    """
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def arrayIndexRanges(indices):
+    """ Vectorized equivalent of ObjectListTableModelViewQt.indexRanges() for an array of indices.
+    """
+    indices = np.unique(indices)
+    if len(indices) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indices) != 1)
+    firsts = np.concatenate([indices[:1], indices[breaks + 1]])
+    lasts = np.concatenate([indices[breaks], indices[-1:]])
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+
+class ColumnarRecord(object):
+    """ Transient attribute access view of a single row in a ColumnarTableModelQt.
+
+    Reading or writing record.attr reads or writes the 'attr' column at the record's row.
+    Dotted column names such as "friend.name" are available as record.friend.name.
+    A record refers to a row index, so it should not be kept across insertions, removals or moves.
+    """
+    __slots__ = ('_model', '_row', '_prefix')
+
+    def __init__(self, model, row, prefix=""):
+        object.__setattr__(self, '_model', model)
+        object.__setattr__(self, '_row', row)
+        object.__setattr__(self, '_prefix', prefix)
+
+    def __getattr__(self, name):
+        attr = self._prefix + name
+        columns = self._model.columns
+        if attr in columns:
+            return toPyObject(columns[attr][self._row])
+        prefix = attr + "."
+        for key in columns:
+            if key.startswith(prefix):
+                return ColumnarRecord(self._model, self._row, prefix)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self._model.setColumnValue(self._row, self._prefix + name, value)
+
+    def __repr__(self):
+        return "ColumnarRecord(row=" + str(self._row) + ")"
+
+
+class ColumnarRecordList(object):
+    """ Read only sequence of ColumnarRecord views, one per row.
+    Provided as ColumnarTableModelQt.objects so that code written for ObjectListTableModelQt
+    (e.g. len(model.objects) or model.objects[0]) keeps working.
+    """
+    __slots__ = ('_model',)
+
+    def __init__(self, model):
+        self._model = model
+
+    def __len__(self):
+        return self._model.numObjects
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ColumnarRecord(self._model, row) for row in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not (0 <= i < n):
+            raise IndexError("ColumnarRecordList: Index out of range.")
+        return ColumnarRecord(self._model, i)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield ColumnarRecord(self._model, row)
+
+
+class ColumnarTableModelQt(ObjectListTableModelQt):
+    """ ObjectListTableModelQt whose records are stored column-wise in NumPy arrays.
+
+    self.columns is a dict mapping each 'attr' to a 1-D NumPy array with one value per record.
+    Columns for properties with a 'dtype' of bool, int, float or datetime are stored in native NumPy dtypes,
+    all others (e.g. str, choices of arbitrary values) in object arrays. data() reads a single array element
+    and never creates a record object. Insertions, removals, moves and setting a property for all records
+    are vectorized array operations over each column.
+
+    Button actions and undo are not supported, as records are not objects with methods or identity.
+    Records are transient views of a row, so batchUpdate() reports structural changes as a single model reset.
+
+    :param data: Initial records as either a dict of {'attr': array-like}, a NumPy structured array
+        whose field names are the attrs, or a list of objects whose property attrs are copied into columns.
+        Any other iterable of objects (e.g. a generator) is copied into the columns lazily, see setObjectSource().
+    :param properties (list): List of property dicts as for ObjectListTableModelQt.
+    :param isRowObjects (bool): If True, records are rows and properties are columns, otherwise vice-versa.
+    :param isDynamic (bool): If True, records can be inserted/deleted, otherwise not.
+    :param templateObject: Dict of {'attr': value} (or object with those attrs) used to fill inserted records.
+        If None, inserted records copy a neighbouring record, or are filled with default values if there are none.
+    """
+
+    # Records have no identity to follow across insertions, removals and moves.
+    hasObjectIdentity = False
+
+    def __init__(self, data=None, properties=None, isRowObjects=True, isDynamic=True, templateObject=None, parent=None):
+        self.columns = {}
+        self.numObjects = 0
+        ObjectListTableModelQt.__init__(self, None, properties, isRowObjects, isDynamic, templateObject, parent)
+        if isinstance(data, (dict, list, np.ndarray)):
+            self.setColumns(data)
+        elif data is not None:
+            self.setObjectSource(data)
+
+    @property
+    def objects(self):
+        return ColumnarRecordList(self)
+
+    @objects.setter
+    def objects(self, data):
+        if data is None or (isinstance(data, list) and len(data) == 0):
+            self.beginResetObjects()
+            self.columns = {}
+            self.numObjects = 0
+            self.recompileColumnSpecs()
+            self.endResetObjects()
+        else:
+            self.setColumns(data)
+
+    def setColumns(self, data):
+        """ Replace all records. See the class docstring for accepted data.
+        """
+        columns = {}
+        if isinstance(data, dict):
+            for attr, values in data.items():
+                columns[attr] = self._asColumn(values, self._dtypeForAttr(attr))
+        elif isinstance(data, np.ndarray) and (data.dtype.names is not None):
+            for attr in data.dtype.names:
+                columns[attr] = self._asColumn(data[attr], self._dtypeForAttr(attr))
+        else:
+            columns = self._columnsFromObjects(list(data))
+        lengths = set(len(column) for column in columns.values())
+        if len(lengths) > 1:
+            raise ValueError("ColumnarTableModelQt.setColumns: All columns must have the same length.")
+        self.beginResetObjects()
+        self.columns = columns
+        self.numObjects = lengths.pop() if lengths else 0
+        self.recompileColumnSpecs()  # Column dtypes may have changed.
+        self.endResetObjects()
+
+    def _columnsFromObjects(self, objects):
+        """ Copy each property's attr from a list of objects into a dict of columns.
+        """
+        columns = {}
+        for prop in self.properties:
+            attr = prop.get('attr', None)
+            if (attr is None) or (attr in columns) or (prop.get('action', None) == "button"):
+                continue
+            attrPath = compileAttrPath(attr)
+            values = [attrPath.get(obj, self.missingValue) for obj in objects]
+            columns[attr] = self._asColumn(values, self._dtypeForAttr(attr))
+        return columns
+
+    def _spliceColumns(self, i, chunk, num):
+        """ Insert num records from a dict of columns before index i (one concatenation per column).
+        Columns missing from chunk are filled with default values.
+        """
+        for attr in chunk:
+            self.column(attr)
+        for attr, column in self.columns.items():
+            if attr in chunk:
+                values = chunk[attr] if chunk[attr].dtype == column.dtype else chunk[attr].astype(column.dtype)
+            else:
+                values = np.empty(num, dtype=column.dtype)
+                values.fill(self._defaultValue(attr))
+            self.columns[attr] = np.concatenate([column[:i], values, column[i:]])
+        self.numObjects += num
+
+    def appendFetchedObjects(self, objects):
+        """ Copy the property attrs of a chunk of objects fetched from a lazy object source into the columns.
+        """
+        self._spliceColumns(self.numObjects, self._columnsFromObjects(objects), len(objects))
+
+    def _dtypeForAttr(self, attr):
+        """ NumPy dtype for attr's column based on its property 'dtype', or None if unspecified.
+        """
+        for prop in self.properties:
+            if (prop.get('attr', None) == attr) and ('dtype' in prop):
+                dtype = prop['dtype']
+                if isinstance(dtype, np.dtype):
+                    return dtype
+                return NUMPY_DTYPES.get(dtype, np.dtype(object))
+        return None
+
+    def _asColumn(self, values, dtype=None):
+        if isinstance(values, np.ndarray):
+            column = values if (dtype is None) or (values.dtype == dtype) else values.astype(dtype)
+        elif dtype is None:
+            column = np.asarray(values)
+            if column.dtype.kind in "US":
+                column = column.astype(object)  # Variable length str.
+        else:
+            column = np.array(values, dtype=dtype)
+        if column.dtype.kind == 'M' and column.dtype != NUMPY_DTYPES[datetime]:
+            column = column.astype(NUMPY_DTYPES[datetime])
+        if column.ndim != 1:
+            raise ValueError("ColumnarTableModelQt: Columns must be 1-D.")
+        return column
+
+    def _defaultValue(self, attr):
+        """ Value used to fill attr's column for new records without a template or neighbour.
+        """
+        column = self.columns[attr]
+        if column.dtype.kind == 'O':
+            for prop in self.properties:
+                if (prop.get('attr', None) == attr) and (prop.get('dtype', None) is str):
+                    return ""
+            return None
+        if column.dtype.kind == 'M':
+            return np.datetime64('NaT')
+        return column.dtype.type(0)
+
+    def column(self, attr):
+        """ Return the column array for attr, creating a column of default values if it does not exist yet.
+        """
+        column = self.columns.get(attr, None)
+        if column is None:
+            dtype = self._dtypeForAttr(attr)
+            if dtype is None:
+                dtype = np.dtype(object)
+            column = np.zeros(self.numObjects, dtype=dtype) if dtype.kind != 'O' else np.full(self.numObjects, None, dtype=object)
+            self.columns[attr] = column
+            if self.numObjects and dtype.kind == 'O':
+                column[:] = self._defaultValue(attr)
+        return column
+
+    def _writableColumn(self, attr):
+        column = self.column(attr)
+        if not column.flags.writeable:
+            column = column.copy()
+            self.columns[attr] = column
+        return column
+
+    def setColumnValue(self, objectIndex, attr, value):
+        """ Set attr's value for the record at objectIndex.
+        """
+        self._writableColumn(attr)[objectIndex] = value
+
+    def getValue(self, objectIndex, propertyIndex):
+        attr = self.columnSpecs()[propertyIndex].attr
+        column = self.columns.get(attr, None)
+        if column is None:
+            raise AttributeError(attr)
+        value = column[objectIndex]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def getValues(self, propertyIndex, start=0, stop=None):
+        column = self.columns.get(self.columnSpecs()[propertyIndex].attr, None)
+        if column is None:
+            return [self.missingValue] * len(range(start, self.numObjects if stop is None else stop))
+        return column[start:stop].tolist()  # Python objects (e.g. datetime64 --> datetime).
+
+    def isMissing(self, objectIndex, propertyIndex):
+        return self.columnSpecs()[propertyIndex].attr not in self.columns
+
+    def setValue(self, objectIndex, propertyIndex, value):
+        self.setColumnValue(objectIndex, self.columnSpecs()[propertyIndex].attr, value)
+
+    def callMethod(self, objectIndex, propertyIndex):
+        raise TypeError("ColumnarTableModelQt: Records do not have methods.")
+
+    def setUndoEnabled(self, enabled, undoStack=None, maxBytes=64*1024*1024):
+        if enabled:
+            raise TypeError("ColumnarTableModelQt: Undo requires objects with identity.")
+        ObjectListTableModelQt.setUndoEnabled(self, False)
+
+    def resolvePropertyType(self, propertyIndex):
+        try:
+            prop = self.properties[propertyIndex]
+            if 'dtype' in prop.keys():
+                return prop['dtype']
+            column = self.columns.get(prop.get('attr', None), None)
+            if column is None:
+                return None
+            if column.dtype.kind == 'O':
+                return type(column[0]) if len(column) else None
+            return PYTHON_TYPES.get(column.dtype.kind, None)
+        except:
+            return None
+
+    def _templateValues(self, i, factory=None):
+        """ {attr: value} used to fill records inserted at index i.
+        """
+        if factory is None:
+            factory = self.objectFactory
+        template = factory() if factory is not None else self.templateObject
+        values = {}
+        for attr in self.columns:
+            if template is not None:
+                if isinstance(template, dict):
+                    value = template.get(attr, self._defaultValue(attr))
+                else:
+                    value = compileAttrPath(attr).get(template, self._defaultValue(attr))
+            elif self.numObjects:
+                copyIndex = min([max([0, i]), self.numObjects - 1])  # Clamp i to a valid record index.
+                value = self.columns[attr][copyIndex]
+            else:
+                value = self._defaultValue(attr)
+            values[attr] = value
+        return values
+
+    def insertObjects(self, i, num=1, factory=None):
+        """ Insert records before index i with a single begin/end insert signal pair.
+
+        :param num: Either the number of new records to insert (filled from factory(), the templateObject
+            or the neighbouring record), or the records themselves as a dict of {'attr': array-like},
+            a NumPy structured array, or an iterable of objects.
+        :param factory (callable): Optional factory() returning a dict or object whose attrs fill the new records.
+        """
+        for prop in self.properties:
+            if ('attr' in prop) and (prop.get('action', None) != "button"):
+                self.column(prop['attr'])  # Make sure every property has a column.
+        i = min([max([0, i]), self.numObjects])  # Clamp i to within [0, # of records].
+        if isinstance(num, int):
+            if num <= 0:
+                return False
+            chunk = {}
+            for attr, value in self._templateValues(i, factory).items():
+                chunk[attr] = np.empty(num, dtype=self.columns[attr].dtype)
+                chunk[attr].fill(value)
+        else:
+            if isinstance(num, dict):
+                chunk = dict((attr, self._asColumn(values, self._dtypeForAttr(attr))) for attr, values in num.items())
+            elif isinstance(num, np.ndarray) and (num.dtype.names is not None):
+                chunk = dict((attr, self._asColumn(num[attr], self._dtypeForAttr(attr))) for attr in num.dtype.names)
+            else:
+                chunk = self._columnsFromObjects(list(num))
+            lengths = set(len(column) for column in chunk.values())
+            if len(lengths) != 1:
+                return False
+            num = lengths.pop()
+            if num == 0:
+                return False
+        self.beginInsertObjects(i, i + num - 1)
+        self._spliceColumns(i, chunk, num)
+        self.endInsertObjects()
+        return True
+
+    def rememberTemplateObject(self):
+        """ Keep the first record's values as the templateObject (if there is none) before all records are removed.
+        """
+        if (self.templateObject is None) and self.numObjects:
+            self.templateObject = dict((attr, toPyObject(column[0])) for attr, column in self.columns.items())
+
+    def deleteObjectRange(self, start, stop):
+        for attr, column in self.columns.items():
+            self.columns[attr] = np.concatenate([column[:start], column[stop:]])
+        self.numObjects -= (stop - start)
+
+    def deleteObjectRanges(self, ranges):
+        keep = np.ones(self.numObjects, dtype=bool)
+        for first, last in ranges:
+            keep[first:last+1] = False
+        for attr, column in self.columns.items():
+            self.columns[attr] = column[keep]
+        self.numObjects = int(np.count_nonzero(keep))
+
+    def reorderObjects(self, order):
+        order = np.asarray(order, dtype=np.intp)
+        for attr, column in self.columns.items():
+            self.columns[attr] = column[order]
+
+    def setPropertyValues(self, propertyIndex, values, objectIndices=None, perObject=False):
+        """ Vectorized version of ObjectListTableModelQt.setPropertyValues().
+        With perObject, values may also be a NumPy array with one value per record in objectIndices.
+        Values are cast to the column's dtype before anything is written, so a failed cast leaves the column unchanged.
+        """
+        prop = self.properties[propertyIndex]
+        column = self._writableColumn(prop['attr'])
+        if objectIndices is None:
+            where = slice(None)
+            num = self.numObjects
+        else:
+            where = np.asarray(list(objectIndices), dtype=np.intp)
+            num = len(where)
+        if perObject and (len(values) != num):
+            raise ValueError("ColumnarTableModelQt.setPropertyValues: Need one value per record.")
+        try:
+            if column.dtype.kind == 'O':
+                # Fill element-wise so that values which are themselves sequences are stored as single objects.
+                array = np.empty(num, dtype=object)
+                if perObject:
+                    for k, value in enumerate(values):
+                        array[k] = value
+                else:
+                    array.fill(values)
+            else:
+                array = np.asarray(values, dtype=column.dtype)
+                if array.shape != ((num,) if perObject else ()):
+                    return False  # E.g. a sequence for a numeric column.
+        except (TypeError, ValueError):
+            return False
+        column[where] = array
+        if num:
+            if objectIndices is None:
+                objectRanges = [(0, self.numObjects - 1)]
+            else:
+                objectRanges = arrayIndexRanges(where)
+            self.notifyDataChangedRanges(objectRanges, [(propertyIndex, propertyIndex)])
+        return True
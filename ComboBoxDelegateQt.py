@@ -37,29 +37,83 @@ class ComboBoxDelegateQt(QStyledItemDelegate):
         To select from two of your custom objects, set choices = [('A', MyObject()), ('B', MyObject())]
             Combobox entries will be 'A' and 'B'.
             Upon selection model data will be set to the selected MyObject instance and view will show its key (either 'A' or 'B')..
+
+    Looking up the choice for a value is O(1): setting choices builds a hash index of value --> choice position.
+    Unhashable choice values (e.g. lists or objects that define __eq__ without __hash__) fall back to a linear scan
+    of only those values. The index is rebuilt whenever choices is reassigned (or its length changes), and
+    lookupStats counts index 'hits', linear scan 'fallbacks' and 'misses' (values not in choices).
     """
     def __init__(self, choices=None, parent=None):
         QStyledItemDelegate.__init__(self, parent)
+        self.lookupStats = {'hits': 0, 'fallbacks': 0, 'misses': 0}
         self.choices = choices if (choices is not None and type(choices) is list) else []
 
+    @property
+    def choices(self):
+        return self._choices
+
+    @choices.setter
+    def choices(self, choices):
+        self._choices = choices
+        self.rebuildChoiceIndex()
+
+    def rebuildChoiceIndex(self):
+        """ Index choice values by hash. Call this after modifying the choices list in place.
+        """
+        self._choiceTexts = []  # Displayed str rep for each choice.
+        self._choicePositions = {}  # Hashable value --> position of its first occurrence in choices.
+        self._unhashableChoices = []  # [(position, value)] for choice values that cannot be hashed.
+        for i, choice in enumerate(self._choices):
+            if (type(choice) is tuple) and (len(choice) == 2):
+                # choice is a (key, value) tuple.
+                key, val = choice
+                self._choiceTexts.append(str(key))  # key MUST be representable as a str.
+            else:
+                # choice is a value.
+                val = choice
+                self._choiceTexts.append(str(choice))  # choice MUST be representable as a str.
+            try:
+                if val not in self._choicePositions:
+                    self._choicePositions[val] = i
+            except TypeError:
+                self._unhashableChoices.append((i, val))
+        self._numIndexedChoices = len(self._choices)
+
+    def findChoice(self, value):
+        """ Return the position of the first choice whose value == value, or -1 if there is none.
+        """
+        if len(self._choices) != self._numIndexedChoices:
+            self.rebuildChoiceIndex()
+        try:
+            position = self._choicePositions.get(value, -1)
+        except TypeError:
+            position = -1  # Unhashable value can only match an unhashable choice.
+        for i, val in self._unhashableChoices:
+            if (position != -1) and (i > position):
+                break
+            if val == value:
+                self.lookupStats['fallbacks'] += 1
+                return i
+        if position == -1:
+            self.lookupStats['misses'] += 1
+        else:
+            self.lookupStats['hits'] += 1
+        return position
+
+    def resetLookupStats(self):
+        for key in self.lookupStats:
+            self.lookupStats[key] = 0
+
     def createEditor(self, parent, option, index):
         """ Return QComboBox with list of choices (either values or their associated keys if they exist).
         """
         try:
             editor = QComboBox(parent)
             value = index.model().data(index, Qt.DisplayRole)
-            for i, choice in enumerate(self.choices):
-                if (type(choice) is tuple) and (len(choice) == 2):
-                    # choice is a (key, value) tuple.
-                    key, val = choice
-                    editor.addItem(str(key))  # key MUST be representable as a str.
-                    if val == value:
-                        editor.setCurrentIndex(i)
-                else:
-                    # choice is a value.
-                    editor.addItem(str(choice))  # choice MUST be representable as a str.
-                    if choice == value:
-                        editor.setCurrentIndex(i)
+            editor.addItems(self._choiceTexts)  # Choice values or their keys if they exist.
+            i = self.findChoice(value)
+            if i != -1:
+                editor.setCurrentIndex(i)
             return editor
         except:
             return None
@@ -77,7 +131,6 @@ class ComboBoxDelegateQt(QStyledItemDelegate):
                 # choice is a value.
                 value = choice
             model.setData(index, value, Qt.EditRole)
-            index.model().dataChanged.emit(index, index)  # Tell model to update cell display.
         except:
             pass
 
@@ -87,18 +140,10 @@ class ComboBoxDelegateQt(QStyledItemDelegate):
         try:
             if type(value) == QVariant:
                 value = value.toPyObject()  # QVariant ==> object
-            for choice in self.choices:
-                if (type(choice) is tuple) and (len(choice) == 2):
-                    # choice is a (key, value) tuple.
-                    # Display the key, not the value.
-                    key, val = choice
-                    if val == value:
-                        return str(key)
-                else:
-                    # choice is a value.
-                    # Display it's str rep.
-                    if choice == value:
-                        return str(choice)
+            i = self.findChoice(value)
+            if i != -1:
+                # Display the choice key if it exists, otherwise the choice value's str rep.
+                return self._choiceTexts[i]
             # If value is not in our list of choices, show str rep of value.
             return str(value)
         except:
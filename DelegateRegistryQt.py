@@ -0,0 +1,172 @@
+""" DelegateRegistryQt.py: Which delegate ObjectListTableViewQt uses for a property.
+
+A property gets its delegate from the first match among:
+    1. Registered property keys present in the property dict (e.g. 'choices'), in registration order.
+    2. Its 'action' (e.g. "button", "fileDialog").
+    3. Its dtype (or the nearest of the dtype's base classes).
+Otherwise the view's default delegate is used.
+
+Delegate classes may be given as "Module.Class" strings, in which case the module is first imported when
+a property needs that delegate. Projects can register their own delegates (or replace the built-in ones):
+    from DelegateRegistryQt import delegateRegistry
+    delegateRegistry.register("SliderDelegateQt.SliderDelegateQt", propertyKey='range', args=lambda prop: prop['range'])
+    delegateRegistry.register(ColorDelegateQt, dtype=QColor)
+
+Delegates are created as delegateClass(*args(prop)). Properties whose delegates would be created with equal
+arguments share a single delegate instance per view (see DelegateCacheQt). Delegates are not shared between views,
+as a view may close an editor that another view's delegate opened.
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+import importlib
+from collections import OrderedDict
+from datetime import datetime
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+def hashableArgs(value):
+    """ Return a hashable key for equal delegate arguments (equal values of different types are kept apart).
+    Unhashable values that are not lists, tuples or dicts are keyed by identity.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value),) + tuple(hashableArgs(item) for item in value)
+    if isinstance(value, dict):
+        return (dict,) + tuple((hashableArgs(key), hashableArgs(item)) for key, item in value.items())
+    try:
+        hash(value)
+    except TypeError:
+        return (id, id(value))
+    return (type(value), value)
+
+
+class DelegateEntry(object):
+    """ A registered delegate class and how to get its constructor arguments from a property dict.
+
+    :param delegateClass (class or str): Delegate class, or "Module.Class" to import it on first use.
+    :param args (function): Maps a property dict to a tuple of constructor arguments (None for no arguments).
+    :param displaysText (bool): False if the delegate does not draw the value as text (e.g. check boxes, buttons).
+    """
+
+    __slots__ = ('delegateClass', 'args', 'displaysText')
+
+    def __init__(self, delegateClass, args=None, displaysText=True):
+        self.delegateClass = delegateClass
+        self.args = args
+        self.displaysText = displaysText
+
+    def resolveClass(self):
+        if isinstance(self.delegateClass, str):
+            moduleName, className = self.delegateClass.rsplit(".", 1)
+            self.delegateClass = getattr(importlib.import_module(moduleName), className)
+        return self.delegateClass
+
+    def argsFor(self, prop):
+        return () if self.args is None else tuple(self.args(prop))
+
+    def create(self, args):
+        return self.resolveClass()(*args)
+
+
+class DelegateRegistryQt(object):
+    """ Maps property keys, actions and dtypes to delegate classes.
+    """
+
+    def __init__(self):
+        self._propertyKeys = OrderedDict()  # {property key: DelegateEntry}
+        self._actions = {}  # {action: DelegateEntry}
+        self._dtypes = {}  # {dtype: DelegateEntry}
+
+    def register(self, delegateClass, dtype=None, action=None, propertyKey=None, args=None, displaysText=True):
+        """ Use delegateClass(*args(prop)) for properties with the given dtype, 'action' or property key.
+        Registering the same dtype, action or property key again replaces the previous delegate.
+        """
+        if [dtype, action, propertyKey].count(None) != 2:
+            raise ValueError("DelegateRegistryQt.register: Requires exactly one of dtype, action or propertyKey.")
+        entry = DelegateEntry(delegateClass, args, displaysText)
+        if propertyKey is not None:
+            self._propertyKeys.pop(propertyKey, None)
+            self._propertyKeys[propertyKey] = entry
+        elif action is not None:
+            self._actions[action] = entry
+        else:
+            self._dtypes[dtype] = entry
+        return entry
+
+    def unregister(self, dtype=None, action=None, propertyKey=None):
+        if propertyKey is not None:
+            self._propertyKeys.pop(propertyKey, None)
+        if action is not None:
+            self._actions.pop(action, None)
+        if dtype is not None:
+            self._dtypes.pop(dtype, None)
+
+    def entry(self, prop, dtype):
+        """ Return the DelegateEntry for a property dict and its dtype, or None for the view's default delegate.
+        """
+        for key, entry in self._propertyKeys.items():
+            if key in prop:
+                return entry
+        entry = self._actions.get(prop.get('action', ""), None)
+        if entry is not None:
+            return entry
+        for cls in getattr(dtype, '__mro__', (dtype,)):
+            entry = self._dtypes.get(cls, None)
+            if entry is not None:
+                return entry
+        return None
+
+
+class DelegateCacheQt(object):
+    """ One delegate instance per distinct (delegate class, arguments) for a view.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = delegateRegistry if registry is None else registry
+        self._delegates = {}  # {(DelegateEntry, hashableArgs(args)): delegate}
+
+    def delegate(self, prop, dtype):
+        """ Return the (shared) delegate for a property dict and its dtype, or None for the view's default delegate.
+        """
+        entry = self.registry.entry(prop, dtype)
+        if entry is None:
+            return None
+        args = entry.argsFor(prop)
+        key = (entry, hashableArgs(args))
+        delegate = self._delegates.get(key, None)
+        if delegate is None:
+            delegate = self._delegates[key] = entry.create(args)
+        return delegate
+
+    def delegates(self):
+        return list(self._delegates.values())
+
+    def delegatesFor(self, model):
+        """ Return the (shared) delegates of a model's properties, without duplicates.
+        """
+        delegates = []
+        for i, prop in enumerate(model.properties):
+            delegate = self.delegate(prop, model.propertyType(i))
+            if (delegate is not None) and all(delegate is not other for other in delegates):
+                delegates.append(delegate)
+        return delegates
+
+    def retain(self, delegates):
+        """ Drop all cached delegates other than those in delegates (e.g. those used by the view's current model).
+        """
+        ids = set(id(delegate) for delegate in delegates)
+        self._delegates = dict((key, delegate) for key, delegate in self._delegates.items() if id(delegate) in ids)
+
+
+# Registry used by all views, with the built-in delegates (in order of precedence).
+delegateRegistry = DelegateRegistryQt()
+delegateRegistry.register("ComboBoxDelegateQt.ComboBoxDelegateQt", propertyKey='choices', args=lambda prop: (prop['choices'],))
+delegateRegistry.register("FileDialogDelegateQt.FileDialogDelegateQt", action="fileDialog")
+delegateRegistry.register("PushButtonDelegateQt.PushButtonDelegateQt", action="button", args=lambda prop: (prop.get('text', ""),), displaysText=False)
+delegateRegistry.register("CheckBoxDelegateQt.CheckBoxDelegateQt", dtype=bool, displaysText=False)
+delegateRegistry.register("FloatEditDelegateQt.FloatEditDelegateQt", dtype=float)
+delegateRegistry.register("DateTimeEditDelegateQt.DateTimeEditDelegateQt", dtype=datetime, args=lambda prop: (prop.get('text', '%c'),))
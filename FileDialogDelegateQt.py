@@ -1,24 +1,44 @@
 """ FileDialogDelegateQt.py: Delegate that pops up a file dialog when double clicked.
 
-Sets the model data to the selected file name.
+Sets the model data to the selected file name. If the view has a spreadFileNames(index, fileNames) method
+(e.g. ObjectListTableViewQt), several files can be selected at once and are spread across the selected objects.
+While a cell's file is loaded in the background (see ObjectListFileLoaderQt), its load status and progress
+are painted as a progress bar.
 """
 
 
 import os.path
 try:
     from PyQt5.QtCore import Qt, QT_VERSION_STR
-    from PyQt5.QtWidgets import QStyledItemDelegate, QFileDialog
+    from PyQt5.QtWidgets import QStyledItemDelegate, QFileDialog, QApplication, QStyle, QStyleOptionProgressBar
 except ImportError:
     try:
         from PyQt4.QtCore import Qt, QT_VERSION_STR
-        from PyQt4.QtGui import QStyledItemDelegate, QFileDialog
+        from PyQt4.QtGui import QStyledItemDelegate, QFileDialog, QApplication, QStyle, QStyleOptionProgressBar
     except ImportError:
         raise ImportError("FileDialogDelegateQt: Requires PyQt5 or PyQt4.")
+from ItemDataRolesQt import LOAD_STATUS_ROLE, LOAD_PROGRESS_ROLE
 
 
 __author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
 
 
+def getOpenFileNames(parent=None, isMultiple=False):
+    """ Pop up a modal file dialog and return the list of selected "path/to/filename"s (empty if cancelled).
+    """
+    if isMultiple:
+        pathToFileNames = QFileDialog.getOpenFileNames(parent, "Open")
+        if QT_VERSION_STR[0] == '5':
+            pathToFileNames, temp = pathToFileNames
+    else:
+        pathToFileNames = QFileDialog.getOpenFileName(parent, "Open")
+        if QT_VERSION_STR[0] == '5':
+            pathToFileNames, temp = pathToFileNames
+        pathToFileNames = [pathToFileNames]
+    pathToFileNames = [str(pathToFileName) for pathToFileName in pathToFileNames]  # QString ==> str
+    return [pathToFileName for pathToFileName in pathToFileNames if len(pathToFileName)]
+
+
 class FileDialogDelegateQt(QStyledItemDelegate):
     """ Delegate that pops up a file dialog when double clicked.
     Sets the model data to the selected file name.
@@ -30,15 +50,13 @@ class FileDialogDelegateQt(QStyledItemDelegate):
         """ Instead of creating an editor, just popup a modal file dialog
         and set the model data to the selected file name, if any.
         """
-        pathToFileName = ""
-        if QT_VERSION_STR[0] == '4':
-            pathToFileName = QFileDialog.getOpenFileName(None, "Open")
-        elif QT_VERSION_STR[0] == '5':
-            pathToFileName, temp = QFileDialog.getOpenFileName(None, "Open")
-        pathToFileName = str(pathToFileName)  # QString ==> str
-        if len(pathToFileName):
-            index.model().setData(index, pathToFileName, Qt.EditRole)
-            index.model().dataChanged.emit(index, index)  # Tell model to update cell display.
+        view = parent.parent() if (parent is not None) else None  # parent is the view's viewport.
+        canSpread = (view is not None) and hasattr(view, 'spreadFileNames')
+        pathToFileNames = getOpenFileNames(None, canSpread)
+        if len(pathToFileNames) > 1:
+            view.spreadFileNames(index, pathToFileNames)
+        elif len(pathToFileNames):
+            index.model().setData(index, pathToFileNames[0], Qt.EditRole)
         return None
 
     def displayText(self, value, locale):
@@ -53,3 +71,26 @@ class FileDialogDelegateQt(QStyledItemDelegate):
             return fileName
         except:
             return ""
+
+    def paint(self, painter, option, index):
+        """ Paint a progress bar while the cell's file is queued or loading, otherwise the file name.
+        """
+        status = index.data(LOAD_STATUS_ROLE)
+        if status not in ("queued", "loading"):
+            QStyledItemDelegate.paint(self, painter, option, index)
+            return
+        progress = index.data(LOAD_PROGRESS_ROLE)
+        progressBarOption = QStyleOptionProgressBar()
+        progressBarOption.rect = option.rect
+        progressBarOption.state = option.state
+        progressBarOption.textVisible = True
+        progressBarOption.minimum = 0
+        if (status == "loading") and (progress is None):
+            progressBarOption.maximum = 0  # Busy indicator.
+            progressBarOption.text = "loading"
+        else:
+            progressBarOption.maximum = 100
+            progressBarOption.progress = int(round(100 * (progress or 0)))
+            progressBarOption.text = "queued" if (status == "queued") else "%d%%" % progressBarOption.progress
+        style = option.widget.style() if (option.widget is not None) else QApplication.style()
+        style.drawControl(QStyle.CE_ProgressBar, progressBarOption, painter)
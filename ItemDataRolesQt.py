@@ -0,0 +1,28 @@
+""" ItemDataRolesQt.py: Custom data() roles shared by ObjectListTableModelQt, its helpers and the delegates.
+
+Kept apart from the delegate modules so that the model can use the roles without importing any delegate.
+"""
+
+
+try:
+    from PyQt5.QtCore import Qt
+except ImportError:
+    try:
+        from PyQt4.QtCore import Qt
+    except ImportError:
+        raise ImportError("ItemDataRolesQt: Requires PyQt5 or PyQt4.")
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+# data() role for the [(start, length), ...] spans of the current search terms in a cell's displayed text.
+SEARCH_HIGHLIGHT_ROLE = Qt.UserRole + 1
+
+# data() roles for a cell's background load status ("queued", "loading", "done", "failed", "cancelled" or None)
+# and progress (0-1, or None if unknown). See ObjectListFileLoaderQt.
+LOAD_STATUS_ROLE = Qt.UserRole + 2
+LOAD_PROGRESS_ROLE = Qt.UserRole + 3
+
+# data() role that is True while the cell's button action is running (see ObjectListActionRunnerQt).
+BUTTON_BUSY_ROLE = Qt.UserRole + 4
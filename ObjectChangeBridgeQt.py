@@ -0,0 +1,249 @@
+""" ObjectChangeBridgeQt.py: Turns attribute changes of ObservableObjects into coalesced model dataChanged signals.
+
+When your own code changes objects in a model's list (e.g. a background computation updating obj.floatValue),
+the view does not know to repaint them. Resetting the model repaints everything. Instead, enable change
+notifications on the model:
+
+    model.setChangeNotificationsEnabled(True)
+
+For every object in the model and every property 'attr' path (including nested paths such as "child.intValue"),
+the bridge observes each ObservableObject along the path. Any attribute assignment along a path marks that
+object's property cell as changed (reassigning an intermediate object such as obj.child also re-observes the
+new child). Changes from any thread are collected and emitted on the next event loop tick of the model's thread,
+as the fewest dataChanged rectangles covering them.
+
+For objects that are not ObservableObjects, or for changes inside containers, call notifyChanged(obj, attr).
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+import threading
+try:
+    from PyQt5.QtCore import Qt, QObject, pyqtSignal
+except ImportError:
+    try:
+        from PyQt4.QtCore import Qt, QObject, pyqtSignal
+    except ImportError:
+        raise ImportError("ObjectChangeBridgeQt: Requires PyQt5 or PyQt4.")
+from ObservableObject import addObserver, removeObserver, isObservable
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+class ObjectChangeBridgeQt(QObject):
+    """ Observes the objects of an ObjectListTableModelQt and emits coalesced dataChanged signals for their changes.
+
+    :param model (ObjectListTableModelQt): Model whose objects are observed. The bridge follows the model's
+        insert/remove/move/reset signals to observe new objects and stop observing removed ones,
+        and stops observing (and releases) all objects when the model is destroyed.
+    """
+
+    # Emitted (from any thread) when the first change since the last flush() arrives. Queued to flush().
+    _changesPending = pyqtSignal()
+
+    def __init__(self, model, parent=None):
+        QObject.__init__(self, parent)
+        self.model = model
+        self._lock = threading.Lock()
+        self._pending = {}  # {(id(obj), propertyIndex): (obj, needsRewatch)}
+        self._watches = {}  # {id(observed): {attrName: [(root object, propertyIndex, isLeaf), ...]}}
+        self._rootWatches = {}  # {id(root object): [(observed, attrName, watch), ...]}
+        self._changesPending.connect(self.flush, Qt.QueuedConnection)
+        if model.isRowObjects:
+            model.rowsInserted.connect(self._objectsInserted)
+            model.rowsAboutToBeRemoved.connect(self._objectsAboutToBeRemoved)
+        else:
+            model.columnsInserted.connect(self._objectsInserted)
+            model.columnsAboutToBeRemoved.connect(self._objectsAboutToBeRemoved)
+        model.layoutChanged.connect(self._layoutChanged)
+        model.modelAboutToBeReset.connect(self.unwatchAll)
+        model.modelReset.connect(self.watchAll)
+        model.destroyed.connect(self.unwatchAll)
+        self.watchAll()
+
+    # Observation.
+
+    def watchAll(self):
+        """ (Re-)observe every object in the model for every property.
+        """
+        self.unwatchAll()
+        for obj in self.model.objects:
+            self.watchObject(obj)
+
+    def unwatchAll(self, *args):
+        """ Stop observing all objects and drop pending changes.
+        """
+        with self._lock:
+            rootWatches = list(self._rootWatches.values())
+            self._rootWatches = {}
+            self._pending = {}
+        for entries in rootWatches:
+            for observed, attrName, watch in entries:
+                self._removeWatch(observed, attrName, watch)
+
+    def watchObject(self, obj):
+        for propertyIndex in range(len(self.model.properties)):
+            self._watchPath(obj, propertyIndex)
+
+    def unwatchObject(self, obj):
+        self._unwatchRoot(id(obj))
+
+    def _unwatchRoot(self, rootId):
+        with self._lock:
+            entries = self._rootWatches.pop(rootId, [])
+        for observed, attrName, watch in entries:
+            self._removeWatch(observed, attrName, watch)
+
+    def _watchPath(self, root, propertyIndex):
+        """ Observe each ObservableObject along the property's 'attr' path from root.
+        """
+        attrPath = self.model.columnSpecs()[propertyIndex].attrPath
+        if attrPath is None:
+            return
+        obj = root
+        steps = attrPath.steps
+        for k, (kind, key) in enumerate(steps):
+            isLeaf = (k == len(steps) - 1)
+            if kind == 'attr':
+                if isObservable(obj):
+                    self._addWatch(root, obj, key, (root, propertyIndex, isLeaf))
+                if isLeaf:
+                    return
+                try:
+                    obj = getattr(obj, key)
+                except Exception:
+                    return
+            else:
+                # Item assignment is not observable, but the item itself may be.
+                if isLeaf:
+                    return
+                try:
+                    obj = obj[key]
+                except Exception:
+                    return
+
+    def _unwatchPath(self, root, propertyIndex):
+        with self._lock:
+            entries = self._rootWatches.get(id(root), [])
+            removed = [entry for entry in entries if entry[2][1] == propertyIndex]
+            self._rootWatches[id(root)] = [entry for entry in entries if entry[2][1] != propertyIndex]
+        for observed, attrName, watch in removed:
+            self._removeWatch(observed, attrName, watch)
+
+    def _addWatch(self, root, observed, attrName, watch):
+        with self._lock:
+            watches = self._watches.get(id(observed), None)
+            if watches is None:
+                watches = self._watches[id(observed)] = {}
+                addObserver(observed, self._attributeChanged)
+            watches.setdefault(attrName, []).append(watch)
+            self._rootWatches.setdefault(id(root), []).append((observed, attrName, watch))
+
+    def _removeWatch(self, observed, attrName, watch):
+        with self._lock:
+            watches = self._watches.get(id(observed), None)
+            if watches is None:
+                return
+            attrWatches = watches.get(attrName, [])
+            for k, attrWatch in enumerate(attrWatches):
+                if attrWatch is watch:  # Identity, as objects may define __eq__.
+                    del attrWatches[k]
+                    break
+            if not attrWatches:
+                watches.pop(attrName, None)
+            if not watches:
+                del self._watches[id(observed)]
+                removeObserver(observed, self._attributeChanged)
+
+    # Changes.
+
+    def _attributeChanged(self, observed, attrName):
+        """ Observer called (in any thread) after observed.attrName was assigned.
+        """
+        with self._lock:
+            watches = self._watches.get(id(observed), None)
+            attrWatches = list(watches.get(attrName, [])) if watches is not None else []
+            if not attrWatches:
+                return
+            wasIdle = not self._pending
+            for root, propertyIndex, isLeaf in attrWatches:
+                key = (id(root), propertyIndex)
+                needsRewatch = (not isLeaf) or self._pending.get(key, (None, False))[1]
+                self._pending[key] = (root, needsRewatch)
+        if wasIdle:
+            try:
+                self._changesPending.emit()
+            except RuntimeError:
+                pass  # Bridge already deleted.
+
+    def notifyChanged(self, obj, attr=None):
+        """ Mark the properties of obj whose 'attr' path is attr or within attr (all properties if None) as changed.
+        Thread safe. Use this for objects that are not ObservableObjects or for changes inside containers.
+        """
+        propertyIndices = []
+        for propertyIndex, spec in enumerate(self.model.columnSpecs()):
+            if spec.attr is None:
+                continue
+            if (attr is None) or (spec.attr == attr) or spec.attr.startswith(attr + ".") or spec.attr.startswith(attr + "["):
+                propertyIndices.append(propertyIndex)
+        with self._lock:
+            wasIdle = not self._pending
+            for propertyIndex in propertyIndices:
+                key = (id(obj), propertyIndex)
+                self._pending[key] = (obj, True)  # Intermediate objects may have changed too.
+        if wasIdle and propertyIndices:
+            try:
+                self._changesPending.emit()
+            except RuntimeError:
+                pass  # Bridge already deleted.
+
+    def flush(self):
+        """ Emit dataChanged for all changes since the last flush (called automatically on the next event loop tick).
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        if not pending:
+            return
+        objectIndices = self.model.objectIndexMap()
+        changed = []  # [(root object, propertyIndex), ...]
+        for (rootId, propertyIndex), (root, needsRewatch) in pending.items():
+            if rootId not in objectIndices:
+                continue  # No longer in the model.
+            if needsRewatch:
+                self._unwatchPath(root, propertyIndex)
+                self._watchPath(root, propertyIndex)
+            changed.append((root, propertyIndex))
+        changedProperties = list(set(propertyIndex for root, propertyIndex in changed))
+        self.model.invalidate([root for root, propertyIndex in changed], changedProperties)
+        self.model.notifyObjectsChanged(changed)
+
+    # Model structure.
+
+    def _objectsInserted(self, parent, first, last):
+        if parent.isValid():
+            return
+        for objectIndex in range(first, last + 1):
+            self.watchObject(self.model.objects[objectIndex])
+
+    def _objectsAboutToBeRemoved(self, parent, first, last):
+        if parent.isValid():
+            return
+        for objectIndex in range(first, last + 1):
+            self.unwatchObject(self.model.objects[objectIndex])
+
+    def _layoutChanged(self, *args):
+        """ Objects may have been inserted or removed as well as reordered (e.g. within the model's batchUpdate()).
+        """
+        objectIds = self.model.objectIndexMap()
+        with self._lock:
+            removedIds = [rootId for rootId in self._rootWatches if rootId not in objectIds]
+            watchedIds = set(self._rootWatches.keys())
+        for rootId in removedIds:
+            self._unwatchRoot(rootId)
+        for obj in self.model.objects:
+            if id(obj) not in watchedIds:
+                self.watchObject(obj)
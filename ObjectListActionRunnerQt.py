@@ -0,0 +1,229 @@
+""" ObjectListActionRunnerQt.py: Runs the methods of "button" properties off the GUI thread.
+
+Clicking a "button" cell calls the object's 'attr' method in setData(), i.e. on the GUI thread, so a long-running
+method hangs the application. Choose where the method runs with the property's 'runIn':
+
+    properties = [
+        {'attr': "analyze",  'action': "button", 'text': "Analyze", 'runIn': "thread"},    # QThreadPool worker.
+        {'attr': "simulate", 'action': "button", 'text': "Simulate", 'runIn': "process"}]  # Process pool.
+
+"thread": The method runs on a worker thread of a QThreadPool. It must not touch Qt widgets.
+"process": For CPU-bound methods. The object is pickled to a worker process of a
+    concurrent.futures.ProcessPoolExecutor, the method runs on that copy, and the copy's attributes (in its __dict__
+    and any __slots__, see copyAttributes()) are copied back to the object when it finishes. The object and the
+    method's result must be picklable.
+
+While an object's method runs, its button is painted disabled and further clicks are ignored.
+model.runButtonAction(propertyIndex, objectIndices) (or the view's property header menu) runs the method for
+many objects at once, spread across the pool's threads or processes. When a method finishes, all of the object's
+cells are refreshed, as the method may have changed any of its attributes. When the model is destroyed or the
+application quits, the runner waits for running methods to finish (see shutdown()).
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+try:
+    from PyQt5.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+except ImportError:
+    try:
+        from PyQt4.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+    except ImportError:
+        raise ImportError("ObjectListActionRunnerQt: Requires PyQt5 or PyQt4.")
+from ItemDataRolesQt import BUTTON_BUSY_ROLE
+from AttrPath import compileAttrPath
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+def slotNames(cls):
+    """ Return the names of the __slots__ attributes declared by cls and its base classes (mangled for private names).
+    """
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name in ('__dict__', '__weakref__'):
+                continue
+            if name.startswith('__') and not name.endswith('__'):
+                name = '_' + klass.__name__.lstrip('_') + name
+            names.append(name)
+    return names
+
+
+def copyAttributes(source, target):
+    """ Copy the attributes of source (its __dict__ and any __slots__) to target, e.g. from a worker process's copy.
+    Slots that are unset in source are deleted from target.
+    """
+    for name in slotNames(type(source)):
+        try:
+            value = getattr(source, name)
+        except AttributeError:
+            if hasattr(target, name):
+                delattr(target, name)
+            continue
+        setattr(target, name, value)
+    attrs = getattr(source, '__dict__', None)
+    if attrs is not None:
+        target.__dict__.update(attrs)
+
+
+def callMethodInProcess(obj, attr):
+    """ Call obj.attr() in a worker process and return the (changed) object along with the method's result.
+    """
+    result = compileAttrPath(attr).getter(obj)()
+    return obj, result
+
+
+class ActionTask(QRunnable):
+    """ Calls one object's method in a worker thread and reports the result to its runner.
+    """
+    def __init__(self, runner, obj, propertyIndex, method):
+        QRunnable.__init__(self)
+        self.runner = runner
+        self.obj = obj
+        self.propertyIndex = propertyIndex
+        self.method = method
+
+    def run(self):
+        result, error = None, None
+        try:
+            result = self.method()
+        except Exception as err:
+            error = err
+        try:
+            self.runner._actionFinished.emit(self.obj, self.propertyIndex, result, error, None)
+        except RuntimeError:
+            pass  # The runner was deleted (see ObjectListActionRunnerQt.shutdown()).
+
+
+class ObjectListActionRunnerQt(QObject):
+    """ Runs the 'runIn' "thread" or "process" button methods of a model's objects off the GUI thread.
+
+    :param model (ObjectListTableModelQt): Model whose button methods are run. The runner follows the model's
+        signals to map objects back to their cells.
+    :param maxThreadCount (int): Number of worker threads (default QThread.idealThreadCount()).
+    :param maxProcessCount (int): Number of worker processes (default the number of CPUs).
+
+    Signals:
+    actionFinished(obj, propertyIndex, result, error): A method finished (error is None if it succeeded).
+    """
+
+    actionFinished = pyqtSignal(object, int, object, object)
+
+    # Emitted from worker threads with (obj, propertyIndex, result, error, changedObj). Queued to the runner's thread.
+    _actionFinished = pyqtSignal(object, int, object, object, object)
+
+    def __init__(self, model, maxThreadCount=None, maxProcessCount=None, parent=None):
+        QObject.__init__(self, parent)
+        self.model = model
+        self.threadPool = QThreadPool(self)
+        if maxThreadCount is not None:
+            self.threadPool.setMaxThreadCount(maxThreadCount)
+        self.maxProcessCount = maxProcessCount
+        self.processPool = None  # Created on first use.
+        self._running = {}  # {(id(obj), propertyIndex): obj}
+        self._changed = []  # [(obj, propertyIndex), ...] whose busy state changed since the last dataChanged.
+        self._actionFinished.connect(self._taskFinished)
+        # Running methods must not report to a deleted runner.
+        model.destroyed.connect(self.shutdown)
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.shutdown)
+
+    def isBusy(self, objectIndex, propertyIndex):
+        return (id(self.model.objects[objectIndex]), propertyIndex) in self._running
+
+    def isRunning(self):
+        """ True if any method is running.
+        """
+        return len(self._running) > 0
+
+    def run(self, objectIndex, propertyIndex):
+        """ Start the button method for the object at objectIndex where the property's 'runIn' says.
+        Returns False if it is already running for that object.
+        """
+        obj = self.model.objects[objectIndex]
+        key = (id(obj), propertyIndex)
+        if key in self._running:
+            return False
+        spec = self.model.columnSpecs()[propertyIndex]
+        if spec.runIn == "process":
+            future = self._processPool().submit(callMethodInProcess, obj, spec.attr)
+
+            def done(future):
+                # Called in an executor thread, so report back through the queued signal.
+                try:
+                    changedObj, result = future.result()
+                    error = None
+                except Exception as err:
+                    changedObj, result, error = None, None, err
+                try:
+                    self._actionFinished.emit(obj, propertyIndex, result, error, changedObj)
+                except RuntimeError:
+                    pass  # The runner was deleted (see shutdown()).
+            self._running[key] = obj
+            future.add_done_callback(done)
+        else:
+            self._running[key] = obj
+            self.threadPool.start(ActionTask(self, obj, propertyIndex, spec.attrPath.getter(obj)))
+        self._busyChanged(obj, propertyIndex)
+        return True
+
+    def runForObjects(self, objectIndices, propertyIndex):
+        """ Start the button method for each object at objectIndices (skipping those where it is already running).
+        """
+        for objectIndex in objectIndices:
+            self.run(objectIndex, propertyIndex)
+
+    def _processPool(self):
+        if self.processPool is None:
+            try:
+                from concurrent.futures import ProcessPoolExecutor
+            except ImportError:
+                raise ImportError("ObjectListActionRunnerQt: 'runIn' \"process\" requires concurrent.futures.")
+            self.processPool = ProcessPoolExecutor(self.maxProcessCount)
+        return self.processPool
+
+    def waitForDone(self, msecs=-1):
+        """ Wait for running threads (not processes) to finish (their results are applied on the next event loop tick).
+        """
+        return self.threadPool.waitForDone(msecs)
+
+    def shutdown(self):
+        """ Wait for running methods to finish and stop the process pool (if any).
+        Called when the model is destroyed or the application quits.
+        """
+        try:
+            self.threadPool.waitForDone()
+        except RuntimeError:
+            pass  # Already deleted.
+        if self.processPool is not None:
+            self.processPool.shutdown()
+            self.processPool = None
+
+    def _taskFinished(self, obj, propertyIndex, result, error, changedObj):
+        self._running.pop((id(obj), propertyIndex), None)
+        if changedObj is not None:
+            copyAttributes(changedObj, obj)  # Copy the worker process's changes back.
+        objectIndex = self.model.objectIndexMap().get(id(obj), None)
+        if objectIndex is not None:
+            # The method may have changed any of the object's attributes (this also repaints the button).
+            self.model.invalidate([obj])
+            self.model.notifyDataChangedRanges([(objectIndex, objectIndex)], [(0, len(self.model.properties) - 1)])
+        self.actionFinished.emit(obj, propertyIndex, result, error)
+
+    # Busy state dataChanged signals.
+
+    def _busyChanged(self, obj, propertyIndex):
+        wasIdle = not self._changed
+        self._changed.append((obj, propertyIndex))
+        if wasIdle:
+            QTimer.singleShot(0, self._notifyBusyChanged)  # Fan-outs share dataChanged signals.
+
+    def _notifyBusyChanged(self):
+        changed, self._changed = self._changed, []
+        self.model.notifyObjectsChanged(changed, [BUTTON_BUSY_ROLE])
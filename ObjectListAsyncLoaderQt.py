@@ -0,0 +1,187 @@
+""" ObjectListAsyncLoaderQt.py: Evaluates slow 'attr' getters of an ObjectListTableModelQt on a thread pool.
+
+Properties whose 'attr' is a slow @property getter (e.g. reading from disk or computing a derived value)
+freeze scrolling, because data() calls them on the GUI thread. Mark such properties as 'async':
+
+    properties = [{'attr': "summary", 'header': "Summary", 'async': True, 'placeholder': "..."}]
+
+data() then returns the property's 'placeholder' (default None) until the value has been evaluated on a worker
+thread of a QThreadPool. Values are cached (LRU, see ObjectValueCache), and the cells are repainted via dataChanged
+as values arrive. A cell is only requested once while its request is pending, and the most recently requested
+cells (i.e. those the view just painted) are evaluated first. ObjectListTableViewQt cancels the pending requests
+of objects that scroll out of view. Setting the property or invalidating the model's values requests it again.
+When the model is destroyed or the application quits, pending requests are cancelled and running getters are
+waited for (see shutdown()).
+
+Getters are called in worker threads, so they must not touch Qt widgets and must be safe to call concurrently
+with the GUI thread's access to the same objects. Sorting or searching by an 'async' property evaluates it
+synchronously.
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+try:
+    from PyQt5.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+except ImportError:
+    try:
+        from PyQt4.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+    except ImportError:
+        raise ImportError("ObjectListAsyncLoaderQt: Requires PyQt5 or PyQt4.")
+from ObjectListTableModelViewQt import ObjectValueCache
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+# Marks values that are not cached.
+_NOT_CACHED = object()
+
+
+class GetterTask(QRunnable):
+    """ Evaluates one property of one object in a worker thread and reports the value to its loader.
+
+    Tasks are not auto-deleted by the thread pool: the loader keeps each task until it has reported back
+    (or was taken back from the pool), so that cancelling a task that already ran never touches a deleted object.
+    """
+    def __init__(self, loader, obj, propertyIndex, attr, getter, missingValue):
+        QRunnable.__init__(self)
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.obj = obj
+        self.propertyIndex = propertyIndex
+        self.attr = attr
+        self.getter = getter
+        self.missingValue = missingValue
+        self.isCancelled = False
+
+    def run(self):
+        value = _NOT_CACHED
+        if not self.isCancelled:
+            try:
+                value = self.getter(self.obj)
+            except Exception:
+                value = self.missingValue  # Cached, so that a failing getter is not called over and over.
+        try:
+            self.loader._valueReady.emit(self, value)  # Also when cancelled, so that the loader releases the task.
+        except RuntimeError:
+            pass  # The loader was deleted (see ObjectListAsyncLoaderQt.shutdown()).
+
+
+class ObjectListAsyncLoaderQt(QObject):
+    """ Evaluates the 'async' properties of a model's objects on a thread pool and caches their values.
+
+    :param model (ObjectListTableModelQt): Model whose 'async' properties are evaluated.
+        The loader follows the model's signals to map objects back to their cells.
+    :param maxEntries, maxBytes: Bounds of the value cache (see ObjectValueCache).
+    :param maxThreadCount (int): Number of worker threads (default QThread.idealThreadCount()).
+    """
+
+    # Emitted from worker threads with (task, value) when a task has run. Queued to the loader's thread.
+    _valueReady = pyqtSignal(object, object)
+
+    def __init__(self, model, maxEntries=100000, maxBytes=64*1024*1024, maxThreadCount=None, parent=None):
+        QObject.__init__(self, parent)
+        self.model = model
+        self.cache = ObjectValueCache(maxEntries, maxBytes)
+        self.threadPool = QThreadPool(self)
+        if maxThreadCount is not None:
+            self.threadPool.setMaxThreadCount(maxThreadCount)
+        self._pending = {}  # {(id(obj), attr): GetterTask}
+        self._tasks = set()  # Tasks handed to the thread pool that have not reported back yet.
+        self._nextPriority = 0  # Later requests get a higher thread pool priority.
+        self._arrived = []  # [(obj, propertyIndex), ...] whose values arrived since the last dataChanged.
+        self._valueReady.connect(self._taskDone)
+        model.modelReset.connect(self.clear)
+        # Running getters must not report to a deleted loader.
+        model.destroyed.connect(self.shutdown)
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.shutdown)
+
+    def value(self, objectIndex, propertyIndex):
+        """ Return the cached value of the property for the object at objectIndex, or the property's 'placeholder'
+        after requesting the value (unless it is already pending).
+        """
+        obj = self.model.objects[objectIndex]
+        spec = self.model.columnSpecs()[propertyIndex]
+        value = self.cache.find(obj, spec.attr, _NOT_CACHED)
+        if value is not _NOT_CACHED:
+            return value
+        key = (id(obj), spec.attr)
+        if key not in self._pending:
+            task = GetterTask(self, obj, propertyIndex, spec.attr, spec.attrPath.getter, self.model.missingValue)
+            self._pending[key] = task
+            self._tasks.add(task)
+            self._nextPriority += 1
+            self.threadPool.start(task, self._nextPriority)
+        return spec.prop.get('placeholder', None)
+
+    def isPending(self, obj, attr):
+        return (id(obj), attr) in self._pending
+
+    def _taskDone(self, task, value):
+        self._tasks.discard(task)
+        key = (id(task.obj), task.attr)
+        if task.isCancelled or (self._pending.get(key, None) is not task):
+            return  # Cancelled or invalidated while running.
+        del self._pending[key]
+        self.cache.put(task.obj, task.attr, value)
+        wasIdle = not self._arrived
+        self._arrived.append((task.obj, task.propertyIndex))
+        if wasIdle:
+            QTimer.singleShot(0, self._notifyArrived)  # Values arriving together share dataChanged signals.
+
+    def _notifyArrived(self):
+        arrived, self._arrived = self._arrived, []
+        self.model.notifyObjectsChanged(arrived)
+
+    # Cancellation.
+
+    def _cancel(self, key):
+        task = self._pending.pop(key)
+        task.isCancelled = True
+        # Qt >= 5.9. A task that is not taken back (or has started) returns as soon as it is run and reports back.
+        if hasattr(self.threadPool, 'tryTake') and self.threadPool.tryTake(task):
+            self._tasks.discard(task)
+
+    def cancelExcept(self, objects):
+        """ Cancel the pending requests of all objects other than those given (e.g. those in view).
+        """
+        keep = set(id(obj) for obj in objects)
+        for key in [key for key in self._pending if key[0] not in keep]:
+            self._cancel(key)
+
+    def invalidate(self, objects=None, attrs=None):
+        """ Drop cached values and cancel pending requests for the given objects and/or attr paths (all if None).
+        """
+        self.cache.invalidate(objects, attrs)
+        objectIds = None if objects is None else set(id(obj) for obj in objects)
+        if attrs is not None:
+            prefixes = tuple(attr + "." for attr in attrs) + tuple(attr + "[" for attr in attrs)
+        for key in list(self._pending):
+            if (objectIds is not None) and (key[0] not in objectIds):
+                continue
+            if (attrs is not None) and not ((key[1] in attrs) or key[1].startswith(prefixes)):
+                continue
+            self._cancel(key)
+
+    def clear(self):
+        self.invalidate()
+        self._arrived = []
+
+    def shutdown(self):
+        """ Cancel all pending requests and wait for the running getters to return.
+        Called when the model is destroyed or the application quits.
+        """
+        try:
+            for key in list(self._pending):
+                self._cancel(key)
+            self.threadPool.waitForDone()
+        except RuntimeError:
+            pass  # Already deleted.
+
+    def waitForDone(self, msecs=-1):
+        """ Wait for running requests to finish (arrived values are applied on the next event loop tick).
+        """
+        return self.threadPool.waitForDone(msecs)
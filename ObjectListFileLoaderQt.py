@@ -0,0 +1,289 @@
+""" ObjectListFileLoaderQt.py: Runs the file loading of "fileDialog" properties on worker threads.
+
+A "fileDialog" property's loading script runs in its 'attr' @property.setter (or 'attr' method), which normally runs
+on the GUI thread for each object in turn, so loading files for many objects freezes the UI. Mark such properties
+with 'backgroundLoad':
+
+    properties = [{'attr': "fileName", 'header': "File", 'action': "fileDialog", 'backgroundLoad': True}]
+
+Setting the property (via the file dialog, setData() or setPropertyValues()) then queues a load that calls the
+setter on a worker thread, with at most maxConcurrentLoads loads at once. While a cell's load is queued or running,
+data() returns its status ("queued", "loading", "done", "failed" or "cancelled") for LOAD_STATUS_ROLE and its
+progress (0-1, or None if unknown) for LOAD_PROGRESS_ROLE, which FileDialogDelegateQt paints as a progress bar.
+When a load finishes, all of the object's cells are refreshed (the script may have changed any attribute).
+
+Loading scripts may call reportLoadProgress(fraction) to report progress, and should return early if
+isLoadCancelled() becomes True. Loads of the same cell run one after another, a new load cancels the previous one.
+Loading scripts run in worker threads, so they must not touch Qt widgets. When the model is destroyed or the
+application quits, queued loads are cancelled and running loads are waited for (see shutdown()).
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+import threading
+try:
+    from PyQt5.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+except ImportError:
+    try:
+        from PyQt4.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+    except ImportError:
+        raise ImportError("ObjectListFileLoaderQt: Requires PyQt5 or PyQt4.")
+from ItemDataRolesQt import LOAD_STATUS_ROLE, LOAD_PROGRESS_ROLE
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+# The load running in the current worker thread (if any).
+_currentLoad = threading.local()
+
+
+def reportLoadProgress(fraction):
+    """ Report the progress (0-1) of the load running in this thread. Does nothing outside of a background load.
+    """
+    task = getattr(_currentLoad, 'task', None)
+    if task is not None:
+        task.loader._loadProgress.emit(task, float(fraction))
+
+
+def isLoadCancelled():
+    """ True if the load running in this thread was cancelled (e.g. by a newer load of the same cell).
+    """
+    task = getattr(_currentLoad, 'task', None)
+    return (task is not None) and task.isCancelled
+
+
+class LoadTask(QRunnable):
+    """ Loads one file for one object's property in a worker thread.
+
+    Tasks are not auto-deleted by the thread pool: the loader keeps each task until it has reported back
+    (or was taken back from the pool), so that cancelling a task that already ran never touches a deleted object.
+    """
+    def __init__(self, loader, obj, propertyIndex, fileName, load, lock):
+        QRunnable.__init__(self)
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.obj = obj
+        self.propertyIndex = propertyIndex
+        self.fileName = fileName
+        self.load = load  # load() runs the loading script.
+        self.lock = lock  # Shared by all loads of the cell, so they run one after another.
+        self.status = "queued"
+        self.progress = None
+        self.error = None
+        self.isCancelled = False
+        self.hasStarted = False
+
+    def run(self):
+        try:
+            with self.lock:
+                if self.isCancelled:
+                    self.loader._loadFinished.emit(self, None)  # So that the loader releases the task.
+                    return
+                self.hasStarted = True
+                self.loader._loadStarted.emit(self)
+                _currentLoad.task = self
+                error = None
+                try:
+                    self.load()
+                except Exception as err:
+                    error = err
+                finally:
+                    _currentLoad.task = None
+                self.loader._loadFinished.emit(self, error)
+        except RuntimeError:
+            pass  # The loader was deleted (see ObjectListFileLoaderQt.shutdown()).
+
+
+class ObjectListFileLoaderQt(QObject):
+    """ Loads the files of a model's 'backgroundLoad' "fileDialog" properties on a thread pool.
+
+    :param model (ObjectListTableModelQt): Model whose objects load files. The loader follows the model's signals
+        to map objects back to their cells.
+    :param maxConcurrentLoads (int): Maximum number of loads running at once.
+
+    Signals:
+    loadFinished(obj, propertyIndex, error): A load finished (error is None if it succeeded).
+    """
+
+    loadFinished = pyqtSignal(object, int, object)
+
+    # Emitted from worker threads. Queued to the loader's thread. Every task that runs emits _loadFinished.
+    _loadStarted = pyqtSignal(object)
+    _loadProgress = pyqtSignal(object, float)
+    _loadFinished = pyqtSignal(object, object)
+
+    def __init__(self, model, maxConcurrentLoads=2, parent=None):
+        QObject.__init__(self, parent)
+        self.model = model
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(max([1, maxConcurrentLoads]))
+        self._tasks = {}  # {(id(obj), propertyIndex): latest LoadTask}, pruned once the object leaves the model.
+        self._locks = {}  # {(id(obj), propertyIndex): threading.Lock} of cells whose latest load has not finished.
+        self._queued = set()  # Tasks handed to the thread pool that have not reported back yet.
+        self._changed = []  # [(obj, propertyIndex), ...] whose status changed since the last dataChanged.
+        self._loadStarted.connect(self._taskStarted)
+        self._loadProgress.connect(self._taskProgress)
+        self._loadFinished.connect(self._taskFinished)
+        if model.isRowObjects:
+            model.rowsRemoved.connect(self._objectsRemoved)
+        else:
+            model.columnsRemoved.connect(self._objectsRemoved)
+        model.layoutChanged.connect(self._objectsRemoved)  # Objects may also have been removed.
+        model.modelReset.connect(self._modelReset)
+        # Running loads must not report to a deleted loader.
+        model.destroyed.connect(self.shutdown)
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.shutdown)
+
+    def setMaxConcurrentLoads(self, maxConcurrentLoads):
+        self.threadPool.setMaxThreadCount(max([1, maxConcurrentLoads]))
+
+    def load(self, objectIndex, propertyIndex, fileName):
+        """ Queue loading fileName for the object at objectIndex, i.e. calling its 'attr' setter (or method).
+        """
+        obj = self.model.objects[objectIndex]
+        attrPath = self.model.columnSpecs()[propertyIndex].attrPath
+        member = attrPath.get(obj, None)
+        if callable(member):
+            def load():
+                member(fileName)  # e.g. obj.loadFile(fileName)
+        else:
+            def load():
+                attrPath.set(obj, fileName)
+        key = (id(obj), propertyIndex)
+        if key in self._tasks:
+            self._cancelTask(self._tasks[key])
+        lock = self._locks.setdefault(key, threading.Lock())
+        task = LoadTask(self, obj, propertyIndex, fileName, load, lock)
+        self._tasks[key] = task
+        self._queued.add(task)
+        self.threadPool.start(task)
+        self._statusChanged(task)
+
+    def status(self, objectIndex, propertyIndex):
+        """ Return (status, progress) of the latest load for the cell, or (None, None) if there was none.
+        """
+        task = self._tasks.get((id(self.model.objects[objectIndex]), propertyIndex), None)
+        return (None, None) if task is None else (task.status, task.progress)
+
+    def error(self, objectIndex, propertyIndex):
+        """ Return the exception raised by the cell's latest load, or None.
+        """
+        task = self._tasks.get((id(self.model.objects[objectIndex]), propertyIndex), None)
+        return None if task is None else task.error
+
+    def isLoading(self):
+        """ True if any load is queued or running.
+        """
+        return any(task.status in ("queued", "loading") for task in self._tasks.values())
+
+    # Cancellation.
+
+    def _cancelTask(self, task):
+        if task.status not in ("queued", "loading"):
+            return
+        task.isCancelled = True
+        if task.status == "queued":
+            # Qt >= 5.9. A task that is not taken back (it may already have started) reports back when it returns.
+            if hasattr(self.threadPool, 'tryTake') and self.threadPool.tryTake(task):
+                self._queued.discard(task)
+                if self._isLatest(task):
+                    self._locks.pop((id(task.obj), task.propertyIndex), None)
+            task.status = "cancelled"
+            self._statusChanged(task)
+
+    def cancel(self, objectIndices=None, propertyIndices=None):
+        """ Cancel the queued and running loads of the given objects and/or properties (all if None).
+        Running loads stop early if their loading script checks isLoadCancelled().
+        """
+        objectIds = None
+        if objectIndices is not None:
+            objectIds = set(id(self.model.objects[i]) for i in objectIndices)
+        for (objectId, propertyIndex), task in list(self._tasks.items()):
+            if ((objectIds is None) or (objectId in objectIds)) and ((propertyIndices is None) or (propertyIndex in propertyIndices)):
+                self._cancelTask(task)
+
+    def shutdown(self):
+        """ Cancel all loads and wait for the running ones to return.
+        Called when the model is destroyed or the application quits.
+        """
+        try:
+            for task in list(self._tasks.values()):
+                self._cancelTask(task)
+            self.threadPool.waitForDone()
+        except RuntimeError:
+            pass  # Already deleted.
+
+    def waitForDone(self, msecs=-1):
+        """ Wait for queued and running loads to finish (their results are applied on the next event loop tick).
+        """
+        return self.threadPool.waitForDone(msecs)
+
+    # Worker thread notifications.
+
+    def _isLatest(self, task):
+        return self._tasks.get((id(task.obj), task.propertyIndex), None) is task
+
+    def _taskStarted(self, task):
+        if task.status == "queued":
+            task.status = "loading"
+            if self._isLatest(task):
+                self._statusChanged(task)
+
+    def _taskProgress(self, task, fraction):
+        if task.status == "loading":
+            task.progress = min([max([0.0, fraction]), 1.0])
+            if self._isLatest(task):
+                self._statusChanged(task)
+
+    def _taskFinished(self, task, error):
+        self._queued.discard(task)
+        key = (id(task.obj), task.propertyIndex)
+        if self._isLatest(task):
+            self._locks.pop(key, None)  # Later loads of the cell get a new lock.
+        if not task.hasStarted:
+            return  # Cancelled while queued.
+        task.error = error
+        task.status = "cancelled" if task.isCancelled else ("failed" if error is not None else "done")
+        task.progress = 1.0 if task.status == "done" else task.progress
+        objectIndex = self.model.objectIndexMap().get(id(task.obj), None)
+        if objectIndex is not None:
+            # The loading script may have changed any of the object's attributes.
+            self.model.invalidate([task.obj])
+            self.model.notifyDataChangedRanges([(objectIndex, objectIndex)], [(0, len(self.model.properties) - 1)])
+        elif self._isLatest(task):
+            del self._tasks[key]  # The object was removed from the model while loading.
+        self.loadFinished.emit(task.obj, task.propertyIndex, error)
+
+    # Status dataChanged signals.
+
+    def _statusChanged(self, task):
+        wasIdle = not self._changed
+        self._changed.append((task.obj, task.propertyIndex))
+        if wasIdle:
+            QTimer.singleShot(0, self._notifyStatusChanged)  # Changes arriving together share dataChanged signals.
+
+    def _notifyStatusChanged(self):
+        changed, self._changed = self._changed, []
+        self.model.notifyObjectsChanged(changed, [LOAD_STATUS_ROLE, LOAD_PROGRESS_ROLE])
+
+    def _objectsRemoved(self, *args):
+        self._pruneRemovedObjects()
+
+    def _pruneRemovedObjects(self):
+        """ Forget the finished loads of objects that are no longer in the model (so they can be freed).
+        Loads that are still queued or running are forgotten when they finish.
+        """
+        objectIndices = self.model.objectIndexMap()
+        for key, task in list(self._tasks.items()):
+            if (key[0] not in objectIndices) and (task.status not in ("queued", "loading")):
+                del self._tasks[key]
+        for key in [key for key in self._locks if key not in self._tasks]:
+            del self._locks[key]
+
+    def _modelReset(self):
+        self.cancel()
+        self._pruneRemovedObjects()
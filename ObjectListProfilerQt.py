@@ -0,0 +1,208 @@
+""" ObjectListProfilerQt.py: Per property call counters for an ObjectListTableModelQt and its view's delegates.
+
+When a table feels sluggish, the culprit is usually one property: a slow @property getter, an expensive str() of a
+combo box choice, a strftime() of a datetime, etc. Profiling is opt-in:
+
+    view.setProfilingEnabled(True, slowCallThreshold=0.01)  # Model and delegates (or model.setProfilingEnabled()).
+    ...
+    print(model.profiler.report())  # Slowest properties first.
+    model.profiler.reset()
+
+For each (operation, property, role) the profiler counts calls, total and max latency (seconds) and exceptions.
+Operations are "data" (each data() role handler), "setData", and the delegates' "paint" and "displayText".
+displayText() does not get the cell's index, so its calls are attributed to the property being painted
+(or sized) at the time, or to property -1 otherwise. Delegate timings include their calls to data(),
+and "paint" includes "displayText".
+
+A single call taking longer than slowCallThreshold seconds emits slowCall(operation, propertyIndex, role, seconds)
+and logs a warning through the "ObjectListProfilerQt" logger (unless logSlowCalls is False).
+
+When profiling is disabled nothing is instrumented, so it costs nothing.
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+import logging
+import time
+try:
+    from PyQt5.QtCore import Qt, QObject, pyqtSignal
+except ImportError:
+    try:
+        from PyQt4.QtCore import Qt, QObject, pyqtSignal
+    except ImportError:
+        raise ImportError("ObjectListProfilerQt: Requires PyQt5 or PyQt4.")
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+logger = logging.getLogger("ObjectListProfilerQt")
+
+# Highest resolution clock available.
+clock = getattr(time, 'perf_counter', time.time)
+
+# Delegate methods replaced by instrumentDelegate().
+_DELEGATE_METHODS = ('paint', 'sizeHint', 'displayText')
+
+
+class ObjectListProfilerQt(QObject):
+    """ Call counters per (operation, propertyIndex, role) for a model's properties.
+
+    :param model (ObjectListTableModelQt): Profiled model, used to name properties in snapshots.
+    :param slowCallThreshold (float): Seconds above which a single call is reported (None to never report).
+
+    Signals:
+    slowCall(operation, propertyIndex, role, seconds): A single call took longer than slowCallThreshold.
+    """
+
+    slowCall = pyqtSignal(str, int, int, float)
+
+    # If True, slow calls are also logged as warnings.
+    logSlowCalls = True
+
+    def __init__(self, model, slowCallThreshold=None, parent=None):
+        QObject.__init__(self, parent)
+        self.model = model
+        self.slowCallThreshold = slowCallThreshold
+        self._counters = {}  # {(operation, propertyIndex, role): [count, totalSeconds, maxSeconds, exceptions]}
+        self._paintingPropertyIndex = -1  # Property whose cell a delegate is painting/sizing (for displayText).
+        self._delegates = []  # Instrumented delegates.
+
+    def record(self, operation, propertyIndex, role, seconds, failed=False):
+        key = (operation, propertyIndex, role)
+        counter = self._counters.get(key, None)
+        if counter is None:
+            counter = self._counters[key] = [0, 0.0, 0.0, 0]
+        counter[0] += 1
+        counter[1] += seconds
+        if seconds > counter[2]:
+            counter[2] = seconds
+        if failed:
+            counter[3] += 1
+        if (self.slowCallThreshold is not None) and (seconds > self.slowCallThreshold):
+            if self.logSlowCalls:
+                logger.warning("Slow %s of %s (role %d): %.6f s", operation, self.propertyName(propertyIndex), role, seconds)
+            self.slowCall.emit(operation, propertyIndex, role, seconds)
+
+    def call(self, operation, propertyIndex, role, func, *args):
+        """ Return func(*args), recording its latency (and any exception it raises) for the property and role.
+        """
+        start = clock()
+        failed = True
+        try:
+            result = func(*args)
+            failed = False
+            return result
+        finally:
+            self.record(operation, propertyIndex, role, clock() - start, failed)
+
+    def propertyName(self, propertyIndex):
+        specs = self.model.columnSpecs()
+        if 0 <= propertyIndex < len(specs):
+            return specs[propertyIndex].header or specs[propertyIndex].attr or str(propertyIndex)
+        return str(propertyIndex)
+
+    # Counters.
+
+    def snapshot(self):
+        """ Return a list of counter dicts, slowest (by total time) first.
+        """
+        specs = self.model.columnSpecs()
+        entries = []
+        for (operation, propertyIndex, role), (count, totalSeconds, maxSeconds, exceptions) in self._counters.items():
+            spec = specs[propertyIndex] if 0 <= propertyIndex < len(specs) else None
+            entries.append({
+                'operation': operation,
+                'propertyIndex': propertyIndex,
+                'attr': None if spec is None else spec.attr,
+                'header': None if spec is None else spec.header,
+                'role': role,
+                'count': count,
+                'totalSeconds': totalSeconds,
+                'maxSeconds': maxSeconds,
+                'meanSeconds': totalSeconds / count if count else 0.0,
+                'exceptions': exceptions})
+        entries.sort(key=lambda entry: entry['totalSeconds'], reverse=True)
+        return entries
+
+    def reset(self):
+        self._counters = {}
+
+    def report(self, maxEntries=20):
+        """ Return a text table of the slowest maxEntries (operation, property, role) counters.
+        """
+        lines = ["{0:<12s}{1:<24s}{2:>6s}{3:>10s}{4:>12s}{5:>12s}{6:>12s}{7:>6s}".format(
+            "operation", "property", "role", "calls", "total (s)", "mean (us)", "max (ms)", "exc")]
+        for entry in self.snapshot()[:maxEntries]:
+            lines.append("{0:<12s}{1:<24s}{2:>6d}{3:>10d}{4:>12.6f}{5:>12.1f}{6:>12.3f}{7:>6d}".format(
+                entry['operation'], self.propertyName(entry['propertyIndex'])[:23], entry['role'], entry['count'],
+                entry['totalSeconds'], 1e6 * entry['meanSeconds'], 1e3 * entry['maxSeconds'], entry['exceptions']))
+        return "\n".join(lines)
+
+    # Model instrumentation.
+
+    def instrumentColumnSpec(self, spec):
+        """ Replace the spec's data() role handlers with timed versions.
+        """
+        for role, handler in list(spec.roleHandlers.items()):
+            spec.roleHandlers[role] = self.timedRoleHandler(handler)
+
+    def timedRoleHandler(self, handler):
+        def timedHandler(objectIndex, propertyIndex, role):
+            return self.call("data", propertyIndex, role, handler, objectIndex, propertyIndex, role)
+        return timedHandler
+
+    # Delegate instrumentation.
+
+    def instrumentDelegate(self, delegate):
+        """ Time the delegate's paint() and displayText() calls (including those Qt makes internally).
+        The replaced methods are restored by uninstrumentDelegates().
+        Instrument delegates before Qt first calls them (see ObjectListTableViewQt.instrumentDelegates()).
+        """
+        if delegate in self._delegates:
+            return
+        removeInstrumentation(delegate)  # E.g. by the profiler of the view's previous model.
+        paint, sizeHint, displayText = delegate.paint, delegate.sizeHint, delegate.displayText
+        model = self.model
+
+        def cellPropertyIndex(index):
+            return index.column() if model.isRowObjects else index.row()
+
+        def timedPaint(painter, option, index):
+            propertyIndex = cellPropertyIndex(index)
+            self._paintingPropertyIndex = propertyIndex
+            try:
+                return self.call("paint", propertyIndex, Qt.DisplayRole, paint, painter, option, index)
+            finally:
+                self._paintingPropertyIndex = -1
+
+        def attributedSizeHint(option, index):
+            self._paintingPropertyIndex = cellPropertyIndex(index)
+            try:
+                return sizeHint(option, index)
+            finally:
+                self._paintingPropertyIndex = -1
+
+        def timedDisplayText(value, locale):
+            return self.call("displayText", self._paintingPropertyIndex, Qt.DisplayRole, displayText, value, locale)
+        delegate.paint = timedPaint
+        delegate.sizeHint = attributedSizeHint
+        delegate.displayText = timedDisplayText
+        self._delegates.append(delegate)
+
+    def uninstrumentDelegates(self):
+        for delegate in self._delegates:
+            removeInstrumentation(delegate)
+        self._delegates = []
+
+
+def removeInstrumentation(delegate):
+    """ Restore the delegate's own methods replaced by ObjectListProfilerQt.instrumentDelegate().
+    """
+    for name in _DELEGATE_METHODS:
+        try:
+            delattr(delegate, name)  # Drop the instance attribute, uncovering the class's method.
+        except (AttributeError, RuntimeError):
+            pass
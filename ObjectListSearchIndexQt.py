@@ -0,0 +1,343 @@
+""" ObjectListSearchIndexQt.py: Incremental text search over the displayed properties of an ObjectListTableModelQt.
+
+Scanning str() of every cell per keystroke costs O(objects x properties). Instead, this index keeps the displayed
+text of each searched cell (lower case) and an inverted index from the substrings of up to n characters (default
+trigrams, bigrams and single characters) of that text to the cells that contain them. A term of up to n characters
+is a single lookup. A longer term is looked up by intersecting the postings of its n-grams, so only a few candidate
+cells need to be checked for the full term.
+
+Cell text is what the view's delegates display, so combo box (key, value) choices are found by their keys,
+datetimes by their formatted text and file names without their path. The index follows the model's signals,
+so edits, insertions, removals, moves and layout changes update it incrementally.
+
+Normally the index is created via the model:
+    model.setSearchIndexEnabled(True, propertyIndices=None)
+    objectIndices = model.search("smi dat")  # Objects matching every term in any searched property.
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+try:
+    from PyQt5.QtCore import QObject, QLocale, QPersistentModelIndex, pyqtSignal
+    from PyQt5.QtWidgets import QStyledItemDelegate
+except ImportError:
+    try:
+        from PyQt4.QtCore import QObject, QLocale, QPersistentModelIndex, pyqtSignal
+        from PyQt4.QtGui import QStyledItemDelegate
+    except ImportError:
+        raise ImportError("ObjectListSearchIndexQt: Requires PyQt5 or PyQt4.")
+from DelegateRegistryQt import DelegateCacheQt
+from ObjectListTableModelViewQt import changesValues, indexRanges
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+class ObjectListSearchIndexQt(QObject):
+    """ Substring (up to n-gram) inverted index over the displayed text of chosen properties of the objects in a model.
+
+    :param model (ObjectListTableModelQt): Model whose objects are indexed. The index follows the model's signals.
+    :param propertyIndices (list): Indices of the properties to search. Defaults to all properties with an 'attr'
+        that display text (i.e. not check boxes or buttons) and are not 'async'.
+    :param gramLength (int): Length n of the longest indexed substrings.
+
+    Signals:
+    matchesChanged(first, last): Objects first..last may have started or stopped matching the current query.
+    """
+
+    matchesChanged = pyqtSignal(int, int)
+
+    # Once a query's earlier terms leave at most this many matching objects, its remaining terms are
+    # checked against those objects' text instead of being looked up in the index.
+    maxVerifiedEntries = 1000
+
+    def __init__(self, model, propertyIndices=None, gramLength=3, parent=None):
+        QObject.__init__(self, parent)
+        self.model = model
+        self.gramLength = max([1, gramLength])
+        self._delegateCache = DelegateCacheQt()  # Delegates whose displayText() the indexed text matches.
+        if propertyIndices is None:
+            # Slow 'async' properties are not evaluated for every object unless asked for.
+            propertyIndices = [i for i in range(len(model.properties))
+                               if (self.displayTextFunction(i) is not None) and not model.properties[i].get('async', False)]
+        self.propertyIndices = list(propertyIndices)
+        self.terms = []  # Lower case terms of the current query.
+        self._entryIds = []  # Entry id for each object index. Entry ids stay with objects as they move.
+        self._nextEntryId = 0
+        self._positions = None  # {entryId: objectIndex}, rebuilt on demand.
+        self._texts = {}  # {cellId: lower case display text}, where cellId = entryId * numProperties + k.
+        self._postings = {}  # {substring of 1 to n characters: set of cellIds}
+        self._layoutIndexes = None  # Persistent index for each object index during a layout change.
+        self._matchedEntries = None  # Entry ids matching the query (None if no query).
+        self._displayTexts = [self.displayTextFunction(i) for i in self.propertyIndices]
+        if model.isRowObjects:
+            model.rowsInserted.connect(self._objectsInserted)
+            model.rowsRemoved.connect(self._objectsRemoved)
+            model.rowsMoved.connect(self._objectsMoved)
+        else:
+            model.columnsInserted.connect(self._objectsInserted)
+            model.columnsRemoved.connect(self._objectsRemoved)
+            model.columnsMoved.connect(self._objectsMoved)
+        model.dataChanged.connect(self._dataChanged)
+        model.layoutAboutToBeChanged.connect(self._layoutAboutToBeChanged)
+        model.layoutChanged.connect(self._layoutChanged)
+        model.modelReset.connect(self.refresh)
+        self.refresh()
+
+    def displayTextFunction(self, propertyIndex):
+        """ Return a function mapping the property's values to the text its delegate displays,
+        or None if the property does not display searchable text.
+        """
+        prop = self.model.properties[propertyIndex]
+        if 'attr' not in prop:
+            return None
+        dtype = self.model.propertyType(propertyIndex)
+        entry = self._delegateCache.registry.entry(prop, dtype)
+        if (entry is not None) and not entry.displaysText:
+            return None
+        delegate = self._delegateCache.delegate(prop, dtype)
+        if delegate is None:
+            delegate = QStyledItemDelegate()
+        locale = QLocale()
+
+        def displayText(value):
+            return "" if value is None else delegate.displayText(value, locale)
+        return displayText
+
+    # Indexing.
+
+    def refresh(self):
+        """ Re-index all objects from scratch.
+        """
+        numObjects = len(self.model.objects)
+        self._entryIds = list(range(numObjects))
+        self._nextEntryId = numObjects
+        self._positions = None
+        self._texts = {}
+        self._postings = {}
+        self._indexObjects(0, numObjects)
+        if self.terms:
+            self.search(" ".join(self.terms))  # Entry ids were reassigned.
+        if numObjects:
+            self.matchesChanged.emit(0, numObjects - 1)
+
+    def _grams(self, text):
+        """ Return the distinct substrings of text with 1 to n characters.
+        """
+        grams = set()
+        for length in range(1, min([self.gramLength, len(text)]) + 1):
+            grams.update([text[i:i+length] for i in range(len(text) - length + 1)])
+        return grams
+
+    def _setText(self, cellId, text):
+        oldText = self._texts.get(cellId, "")
+        if text == oldText:
+            return
+        oldGrams = self._grams(oldText)
+        newGrams = self._grams(text)
+        for gram in oldGrams - newGrams:
+            cellIds = self._postings[gram]
+            cellIds.discard(cellId)
+            if not cellIds:
+                del self._postings[gram]
+        for gram in newGrams - oldGrams:
+            self._postings.setdefault(gram, set()).add(cellId)
+        if text:
+            self._texts[cellId] = text
+        else:
+            self._texts.pop(cellId, None)
+
+    def _indexObjects(self, start, stop, propertyPositions=None):
+        """ (Re-)index the displayed text for objects [start, stop) and the properties at propertyPositions (default all).
+        """
+        if propertyPositions is None:
+            propertyPositions = range(len(self.propertyIndices))
+        numProperties = len(self.propertyIndices)
+        entryIds = self._entryIds[start:stop]
+        for k in propertyPositions:
+            displayText = self._displayTexts[k]
+            values = self.model.getValues(self.propertyIndices[k], start, stop)
+            for entryId, value in zip(entryIds, values):
+                self._setText(entryId * numProperties + k, displayText(value).lower())
+
+    def _dropEntries(self, entryIds):
+        numProperties = len(self.propertyIndices)
+        for entryId in entryIds:
+            for k in range(numProperties):
+                self._setText(entryId * numProperties + k, "")
+            if self._matchedEntries is not None:
+                self._matchedEntries.discard(entryId)
+
+    def _objectsInserted(self, parent, first, last):
+        if parent.isValid():
+            return
+        count = last - first + 1
+        self._entryIds[first:first] = list(range(self._nextEntryId, self._nextEntryId + count))
+        self._nextEntryId += count
+        self._positions = None
+        self._indexObjects(first, last + 1)
+        self._rematch(range(first, last + 1))
+        self.matchesChanged.emit(first, last)
+
+    def _objectsRemoved(self, parent, first, last):
+        if parent.isValid():
+            return
+        self._dropEntries(self._entryIds[first:last + 1])
+        del self._entryIds[first:last + 1]
+        self._positions = None
+
+    def _objectsMoved(self, parent, start, end, destination, row):
+        entryIds = self._entryIds[start:end + 1]
+        del self._entryIds[start:end + 1]
+        if row > end:
+            row -= len(entryIds)
+        self._entryIds[row:row] = entryIds
+        self._positions = None
+        self.matchesChanged.emit(min([start, row]), max([end, row + len(entryIds) - 1]))
+
+    def _layoutAboutToBeChanged(self, *args):
+        # Persistent indexes follow their objects through the layout change (or become invalid if removed).
+        model = self.model
+        if not model.properties:
+            self._layoutIndexes = None
+        elif model.isRowObjects:
+            self._layoutIndexes = [QPersistentModelIndex(model.index(i, 0)) for i in range(len(self._entryIds))]
+        else:
+            self._layoutIndexes = [QPersistentModelIndex(model.index(0, i)) for i in range(len(self._entryIds))]
+
+    def _layoutChanged(self, *args):
+        persistentIndexes, self._layoutIndexes = self._layoutIndexes, None
+        if persistentIndexes is None:
+            self.refresh()
+            return
+        numObjects = len(self.model.objects)
+        entryIds = [None] * numObjects
+        removedEntryIds = []
+        for entryId, index in zip(self._entryIds, persistentIndexes):
+            if index.isValid():
+                entryIds[index.row() if self.model.isRowObjects else index.column()] = entryId
+            else:
+                removedEntryIds.append(entryId)
+        self._dropEntries(removedEntryIds)
+        insertedIndices = [objectIndex for objectIndex, entryId in enumerate(entryIds) if entryId is None]
+        for objectIndex in insertedIndices:
+            entryIds[objectIndex] = self._nextEntryId
+            self._nextEntryId += 1
+        self._entryIds = entryIds
+        self._positions = None
+        for first, last in indexRanges(insertedIndices):
+            self._indexObjects(first, last + 1)
+        self._rematch(insertedIndices)
+        if numObjects:
+            self.matchesChanged.emit(0, numObjects - 1)
+
+    def _dataChanged(self, topLeft, bottomRight, roles=None):
+        if not topLeft.isValid() or not changesValues(roles):
+            return
+        if self.model.isRowObjects:
+            firstObject, lastObject = topLeft.row(), bottomRight.row()
+            firstProperty, lastProperty = topLeft.column(), bottomRight.column()
+        else:
+            firstObject, lastObject = topLeft.column(), bottomRight.column()
+            firstProperty, lastProperty = topLeft.row(), bottomRight.row()
+        propertyPositions = [k for k, i in enumerate(self.propertyIndices) if firstProperty <= i <= lastProperty]
+        if propertyPositions:
+            self._indexObjects(firstObject, lastObject + 1, propertyPositions)
+            self._rematch(range(firstObject, lastObject + 1))
+            self.matchesChanged.emit(firstObject, lastObject)
+
+    # Searching.
+
+    def _cellsContaining(self, term):
+        """ Return the set of cellIds whose text contains term.
+        """
+        n = self.gramLength
+        if len(term) <= n:
+            return set(self._postings.get(term, set()))
+        postings = [self._postings.get(term[i:i+n], set()) for i in range(len(term) - n + 1)]
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for gramCellIds in postings[1:]:
+            if not candidates:
+                break
+            candidates &= gramCellIds
+        return set([cellId for cellId in candidates if term in self._texts[cellId]])
+
+    def _entryContains(self, entryId, term):
+        numProperties = len(self.propertyIndices)
+        return any(term in self._texts.get(entryId * numProperties + k, "") for k in range(numProperties))
+
+    def _entryMatches(self, entryId):
+        return all(self._entryContains(entryId, term) for term in self.terms)
+
+    def _rematch(self, objectIndices):
+        """ Update whether the objects at objectIndices match the current query.
+        """
+        if self._matchedEntries is None:
+            return
+        for objectIndex in objectIndices:
+            entryId = self._entryIds[objectIndex]
+            if self._entryMatches(entryId):
+                self._matchedEntries.add(entryId)
+            else:
+                self._matchedEntries.discard(entryId)
+
+    def search(self, text):
+        """ Set the query and return the sorted indices of the objects for which every whitespace separated term
+        in text (case insensitive) is contained in the displayed text of at least one searched property.
+        An empty query matches all objects.
+        """
+        self.terms = text.lower().split()
+        if not self.terms:
+            self._matchedEntries = None
+            return list(range(len(self._entryIds)))
+        numProperties = max([1, len(self.propertyIndices)])
+        matchedEntries = None
+        for term in sorted(self.terms, key=len, reverse=True):  # Longest (most selective) terms first.
+            if (matchedEntries is not None) and (len(matchedEntries) <= self.maxVerifiedEntries):
+                # Checking a few candidates' text directly is cheaper than looking up a (short) term.
+                matchedEntries = set([entryId for entryId in matchedEntries if self._entryContains(entryId, term)])
+                continue
+            entries = set([cellId // numProperties for cellId in self._cellsContaining(term)])
+            matchedEntries = entries if matchedEntries is None else (matchedEntries & entries)
+            if not matchedEntries:
+                break
+        self._matchedEntries = matchedEntries
+        return self.matches()
+
+    def matches(self):
+        """ Return the sorted indices of the objects matching the current query.
+        """
+        if self._matchedEntries is None:
+            return list(range(len(self._entryIds)))
+        positions = self._entryPositions()
+        return sorted([positions[entryId] for entryId in self._matchedEntries])
+
+    def _entryPositions(self):
+        if self._positions is None:
+            self._positions = dict((entryId, objectIndex) for objectIndex, entryId in enumerate(self._entryIds))
+        return self._positions
+
+    def isMatch(self, objectIndex):
+        """ True if the object at objectIndex matches the current query (always True if there is no query).
+        """
+        if self._matchedEntries is None:
+            return True
+        return (0 <= objectIndex < len(self._entryIds)) and (self._entryIds[objectIndex] in self._matchedEntries)
+
+    def highlights(self, objectIndex, propertyIndex):
+        """ Return [(start, length), ...] spans of the query terms in the displayed text of a matching object's property.
+        """
+        if not self.terms or not self.isMatch(objectIndex) or (propertyIndex not in self.propertyIndices):
+            return []
+        cellId = self._entryIds[objectIndex] * len(self.propertyIndices) + self.propertyIndices.index(propertyIndex)
+        text = self._texts.get(cellId, "")
+        spans = []
+        for term in self.terms:
+            start = text.find(term)
+            while start != -1:
+                spans.append((start, len(term)))
+                start = text.find(term, start + 1)
+        return sorted(spans)
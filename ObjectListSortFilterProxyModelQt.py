@@ -0,0 +1,530 @@
+""" ObjectListSortFilterProxyModelQt.py: Sort/filter proxy for ObjectListTableModelQt (and ColumnarTableModelQt).
+
+A QSortFilterProxyModel calls data() O(n log n) times per sort, walking each object's attribute path every time.
+This proxy instead pulls each sort column's values once into a list of sort keys (one key per source object),
+sorts object indices by those keys, and keeps the resulting proxy <--> source mapping as index lists.
+Edits, insertions and removals in the source model update the keys and mapping incrementally rather than
+re-sorting everything.
+
+Objects must be rows (isRowObjects=True) so that sorting reorders objects.
+
+For example:
+    model = ObjectListTableModelQt(objects, properties)
+    proxy = ObjectListSortFilterProxyModelQt(model)
+    proxy.setSortColumns([(2, Qt.AscendingOrder), (0, Qt.DescendingOrder)])  # Sort by property 2, then 0.
+    proxy.setFilterFunction(lambda obj: obj.age >= 18)
+    view = ObjectListTableViewQt(proxy)  # Clicking a column header sorts by that column.
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+try:
+    from PyQt5.QtCore import Qt, QAbstractProxyModel, QModelIndex, QPersistentModelIndex
+except ImportError:
+    try:
+        from PyQt4.QtCore import Qt, QModelIndex, QPersistentModelIndex
+        from PyQt4.QtGui import QAbstractProxyModel
+    except ImportError:
+        raise ImportError("ObjectListSortFilterProxyModelQt: Requires PyQt5 or PyQt4.")
+from ObjectListTableModelViewQt import changesValues, indexRanges
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+try:
+    NUMBER_TYPES = (bool, int, long, float)  # Python 2
+except NameError:
+    NUMBER_TYPES = (bool, int, float)
+
+
+try:
+    STRING_TYPES = (str, unicode)  # Python 2
+except NameError:
+    STRING_TYPES = (str, bytes)
+
+
+class TotalOrderValue(object):
+    """ Wraps a value so that comparisons never raise: values that cannot be compared with each other
+    (e.g. dicts, bound methods, naive vs. timezone aware datetimes) are ordered by (type name, str(), id()) instead.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def fallbackKey(self):
+        try:
+            text = str(self.value)
+        except Exception:
+            text = ""
+        return (type(self.value).__name__, text, id(self.value))
+
+    def __eq__(self, other):
+        try:
+            return bool(self.value == other.value)
+        except Exception:
+            return self.value is other.value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        try:
+            return bool(self.value < other.value)
+        except Exception:
+            return self.fallbackKey() < other.fallbackKey()
+
+    __hash__ = None
+
+
+def sortKey(value):
+    """ Return a sort key for value that never compares unrelated types (e.g. str with datetime)
+    and orders missing values (None or NaN) after everything else.
+    Numbers and strings are compared directly, other values through a TotalOrderValue so that sorting never fails.
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return (2, "", 0)
+    if isinstance(value, NUMBER_TYPES):
+        return (0, "", value)  # All numbers compare with each other.
+    if isinstance(value, STRING_TYPES):
+        return (1, type(value).__name__, value)
+    return (1, type(value).__name__, TotalOrderValue(value))
+
+
+class ObjectListSortFilterProxyModelQt(QAbstractProxyModel):
+    """ Sorted and filtered view of the objects (rows) in an ObjectListTableModelQt.
+
+    sortColumns: List of (propertyIndex, Qt.SortOrder) with the most significant column first.
+        Sorting is stable, so objects that compare equal stay in their source order.
+        Properties without values to sort by ("button" actions or no 'attr') are ignored (see isSortable()).
+        Values are compared by sortKey(), and properties with (key, value) 'choices' are sorted by their displayed key.
+    filterFunction: filterFunction(obj) returns True for objects to show (None shows all objects).
+    Search: setSearchText() shows only objects matching the source model's search (see ObjectListSearchIndexQt).
+    """
+
+    # Above this many changed/inserted source rows or removed ranges, the proxy is rebuilt in one go
+    # rather than updating each row individually.
+    maxIncrementalRows = 100
+
+    def __init__(self, sourceModel=None, parent=None):
+        QAbstractProxyModel.__init__(self, parent)
+        self.sortColumns = []
+        self.filterFunction = None
+        self._searchIndex = None  # Source model's ObjectListSearchIndexQt while filtering by search text.
+        self._keyedSortColumns = []  # The sortable sortColumns.
+        self._keys = {}  # {propertyIndex: [sort key for each source row]}
+        self._proxyToSource = []  # Source row for each proxy row.
+        self._sourceToProxy = []  # Proxy row for each source row (-1 if filtered out).
+        self._isResetting = False
+        self._isLayoutChanging = False
+        self._layoutProxyIndexes = []  # Persistent indexes saved across a source layout change.
+        self._layoutSourceIndexes = []
+        if sourceModel is not None:
+            self.setSourceModel(sourceModel)
+
+    def setSourceModel(self, sourceModel):
+        if not getattr(sourceModel, 'isRowObjects', False):
+            raise RuntimeError("ObjectListSortFilterProxyModelQt.setSourceModel: Requires an ObjectListTableModelQt with isRowObjects=True.")
+        self.beginResetModel()
+        oldSourceModel = self.sourceModel()
+        if oldSourceModel is not None:
+            for signal, slot in self._sourceConnections(oldSourceModel):
+                try:
+                    signal.disconnect(slot)
+                except (TypeError, RuntimeError):
+                    pass
+        QAbstractProxyModel.setSourceModel(self, sourceModel)
+        for signal, slot in self._sourceConnections(sourceModel):
+            signal.connect(slot)
+        self.sortColumns = [(column, order) for column, order in self.sortColumns if column < len(sourceModel.properties)]
+        self._rebuild()
+        self.endResetModel()
+
+    def _sourceConnections(self, sourceModel):
+        return [
+            (sourceModel.dataChanged, self._sourceDataChanged),
+            (sourceModel.headerDataChanged, self._sourceHeaderDataChanged),
+            (sourceModel.rowsInserted, self._sourceRowsInserted),
+            (sourceModel.rowsAboutToBeRemoved, self._sourceRowsAboutToBeRemoved),
+            (sourceModel.rowsRemoved, self._sourceRowsRemoved),
+            (sourceModel.rowsAboutToBeMoved, self._sourceLayoutAboutToBeChanged),
+            (sourceModel.rowsMoved, self._sourceLayoutChanged),
+            (sourceModel.layoutAboutToBeChanged, self._sourceLayoutAboutToBeChanged),
+            (sourceModel.layoutChanged, self._sourceLayoutChanged),
+            (sourceModel.modelAboutToBeReset, self._sourceModelAboutToBeReset),
+            (sourceModel.modelReset, self._sourceModelReset),
+            (sourceModel.columnsInserted, self._sourceColumnsChanged),
+            (sourceModel.columnsRemoved, self._sourceColumnsChanged),
+            (sourceModel.columnsMoved, self._sourceColumnsChanged)]
+
+    # Sorting and filtering.
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """ Sort by column, keeping the previous sort columns as tie breakers. A column < 0 restores the source order.
+        """
+        if column < 0:
+            self.setSortColumns([])
+        else:
+            self.setSortColumns([(column, order)] + [(c, o) for c, o in self.sortColumns if c != column])
+
+    def setSortColumns(self, sortColumns):
+        """ Sort by a list of (propertyIndex, Qt.SortOrder), most significant first.
+        """
+        self.sortColumns = list(sortColumns)
+        self.invalidate()
+
+    def setFilterFunction(self, filterFunction):
+        """ Show only the objects for which filterFunction(obj) returns True (all objects if None).
+        """
+        self.filterFunction = filterFunction
+        self.invalidate()
+
+    def setSearchText(self, text):
+        """ Show only the objects matching a search of the source model for text (all objects if text is empty).
+        """
+        sourceModel = self.sourceModel()
+        sourceModel.search(text)
+        if sourceModel.searchIndex is not self._searchIndex:
+            if self._searchIndex is not None:
+                try:
+                    self._searchIndex.matchesChanged.disconnect(self._searchMatchesChanged)
+                except (TypeError, RuntimeError):
+                    pass
+            self._searchIndex = sourceModel.searchIndex
+            self._searchIndex.matchesChanged.connect(self._searchMatchesChanged)
+        self.invalidate()
+
+    def filterAcceptsRow(self, sourceRow):
+        """ True if the object at sourceRow passes the search and the filterFunction.
+        """
+        if (self._searchIndex is not None) and not self._searchIndex.isMatch(sourceRow):
+            return False
+        if self.filterFunction is None:
+            return True
+        try:
+            return bool(self.filterFunction(self.sourceModel().objects[sourceRow]))
+        except:
+            return False
+
+    def invalidate(self):
+        """ Re-pull all sort keys, and re-filter and re-sort all objects.
+        Call this if objects were changed without the source model emitting dataChanged.
+        """
+        self._sourceLayoutAboutToBeChanged()
+        self._sourceLayoutChanged()
+
+    def isSortable(self, propertyIndex):
+        """ False for properties without values to sort by ("button" actions or no 'attr').
+        """
+        prop = self.sourceModel().properties[propertyIndex]
+        return ('attr' in prop) and (prop.get('action', None) != "button")
+
+    def sortKeyFunction(self, propertyIndex):
+        """ Return a function that maps the property's values to sort keys.
+        """
+        choices = self.sourceModel().properties[propertyIndex].get('choices', None)
+        if choices and all((type(choice) is tuple) and (len(choice) == 2) for choice in choices):
+            # Sort (key, value) choices by their displayed key.
+            choiceKeys = {}
+            unhashableChoices = []
+            for key, value in reversed(choices):  # Reversed so that the first matching choice wins.
+                try:
+                    choiceKeys[value] = key
+                except TypeError:
+                    unhashableChoices.insert(0, (key, value))
+
+            def choiceSortKey(value):
+                try:
+                    return sortKey(choiceKeys[value])
+                except (KeyError, TypeError):
+                    for key, choiceValue in unhashableChoices:
+                        if choiceValue == value:
+                            return sortKey(key)
+                    return sortKey(value)
+            return choiceSortKey
+        return sortKey
+
+    def _sortKeys(self, propertyIndex, start, stop):
+        """ Sort keys for the property's values in source rows [start, stop).
+        """
+        keyFunction = self.sortKeyFunction(propertyIndex)
+        return [keyFunction(value) for value in self.sourceModel().getValues(propertyIndex, start, stop)]
+
+    def _sortedRows(self, sourceRows):
+        """ Return the source rows sorted by sortColumns, with ties in source order.
+        """
+        sourceRows = sorted(sourceRows)
+        for propertyIndex, order in reversed(self._keyedSortColumns):
+            # Python's sort is stable, also in reverse, so each pass keeps the order of the less significant columns.
+            sourceRows.sort(key=self._keys[propertyIndex].__getitem__, reverse=(order == Qt.DescendingOrder))
+        return sourceRows
+
+    def _lessThan(self, sourceRowA, sourceRowB):
+        """ True if source row A belongs before source row B in the proxy. Consistent with _sortedRows().
+        """
+        for propertyIndex, order in self._keyedSortColumns:
+            keys = self._keys[propertyIndex]
+            keyA = keys[sourceRowA]
+            keyB = keys[sourceRowB]
+            if keyA != keyB:
+                return (keyB < keyA) if (order == Qt.DescendingOrder) else (keyA < keyB)
+        return sourceRowA < sourceRowB
+
+    def _insertPosition(self, sourceRow):
+        """ Binary search for the proxy row at which sourceRow belongs.
+        """
+        lo = 0
+        hi = len(self._proxyToSource)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._lessThan(self._proxyToSource[mid], sourceRow):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _rebuild(self):
+        """ Re-pull all sort keys and recompute the proxy <--> source mapping.
+        """
+        sourceModel = self.sourceModel()
+        numRows = sourceModel.rowCount() if sourceModel is not None else 0
+        self._keyedSortColumns = [(column, order) for column, order in self.sortColumns if self.isSortable(column)] if sourceModel is not None else []
+        self._keys = {}
+        for propertyIndex, order in self._keyedSortColumns:
+            self._keys[propertyIndex] = self._sortKeys(propertyIndex, 0, numRows)
+        self._setMapping(self._sortedRows([row for row in range(numRows) if self.filterAcceptsRow(row)]), numRows)
+
+    def _setMapping(self, proxyToSource, numSourceRows):
+        self._proxyToSource = proxyToSource
+        self._sourceToProxy = [-1] * numSourceRows
+        self._updateSourceToProxy(0)
+
+    def _updateSourceToProxy(self, firstProxyRow, lastProxyRow=None):
+        """ Refresh _sourceToProxy for the proxy rows in [firstProxyRow, lastProxyRow] (default through the end).
+        """
+        if lastProxyRow is None:
+            lastProxyRow = len(self._proxyToSource) - 1
+        for proxyRow in range(firstProxyRow, lastProxyRow + 1):
+            self._sourceToProxy[self._proxyToSource[proxyRow]] = proxyRow
+
+    # Incremental updates of single rows.
+
+    def _insertSourceRow(self, sourceRow):
+        proxyRow = self._insertPosition(sourceRow)
+        self.beginInsertRows(QModelIndex(), proxyRow, proxyRow)
+        self._proxyToSource.insert(proxyRow, sourceRow)
+        self._updateSourceToProxy(proxyRow)
+        self.endInsertRows()
+
+    def _removeProxyRow(self, proxyRow):
+        self.beginRemoveRows(QModelIndex(), proxyRow, proxyRow)
+        sourceRow = self._proxyToSource.pop(proxyRow)
+        self._sourceToProxy[sourceRow] = -1
+        self._updateSourceToProxy(proxyRow)
+        self.endRemoveRows()
+
+    def _repositionProxyRow(self, proxyRow):
+        """ Move a proxy row whose sort keys have changed to where it now belongs.
+        """
+        sourceRow = self._proxyToSource.pop(proxyRow)
+        newProxyRow = self._insertPosition(sourceRow)
+        self._proxyToSource.insert(proxyRow, sourceRow)
+        if newProxyRow == proxyRow:
+            return
+        destination = newProxyRow if newProxyRow < proxyRow else newProxyRow + 1
+        self.beginMoveRows(QModelIndex(), proxyRow, proxyRow, QModelIndex(), destination)
+        del self._proxyToSource[proxyRow]
+        self._proxyToSource.insert(newProxyRow, sourceRow)
+        self._updateSourceToProxy(min([proxyRow, newProxyRow]), max([proxyRow, newProxyRow]))
+        self.endMoveRows()
+
+    # Source model signals.
+
+    def _sourceDataChanged(self, topLeft, bottomRight, roles=None):
+        if not topLeft.isValid():
+            return
+        firstRow, lastRow = topLeft.row(), bottomRight.row()
+        firstColumn, lastColumn = topLeft.column(), bottomRight.column()
+        if changesValues(roles):
+            changedSortColumns = [propertyIndex for propertyIndex, order in self._keyedSortColumns if firstColumn <= propertyIndex <= lastColumn]
+            self._updateSourceRows(firstRow, lastRow, changedSortColumns, self.filterFunction is not None)
+        if lastRow - firstRow + 1 > self.maxIncrementalRows:
+            proxyRanges = [(0, len(self._proxyToSource) - 1)] if len(self._proxyToSource) else []  # Cheaper than mapping each row.
+        else:
+            proxyRows = [self._sourceToProxy[sourceRow] for sourceRow in range(firstRow, lastRow + 1)]
+            proxyRanges = indexRanges([proxyRow for proxyRow in proxyRows if proxyRow != -1])
+        for first, last in proxyRanges:
+            if roles:
+                self.dataChanged.emit(self.index(first, firstColumn), self.index(last, lastColumn), roles)
+            else:
+                self.dataChanged.emit(self.index(first, firstColumn), self.index(last, lastColumn))
+
+    def _searchMatchesChanged(self, firstRow, lastRow):
+        if self._isResetting or self._isLayoutChanging:
+            return  # The pending rebuild will refilter all rows.
+        if len(self._sourceToProxy) != self.sourceModel().rowCount():
+            return  # Inserted rows not handled yet, they will be filtered as they are inserted.
+        self._updateSourceRows(firstRow, min([lastRow, len(self._sourceToProxy) - 1]), [], True)
+
+    def _updateSourceRows(self, firstRow, lastRow, changedSortColumns, isRefiltered):
+        """ Re-pull the changed sort keys of source rows firstRow..lastRow, and re-place the rows (if refiltered,
+        also show or hide them).
+        """
+        if not (changedSortColumns or isRefiltered) or (lastRow < firstRow):
+            return  # Order and visibility are unchanged.
+        if lastRow - firstRow + 1 > self.maxIncrementalRows:
+            self.invalidate()
+            return
+        for sourceRow in range(firstRow, lastRow + 1):
+            for propertyIndex in changedSortColumns:
+                self._keys[propertyIndex][sourceRow] = self._sortKeys(propertyIndex, sourceRow, sourceRow + 1)[0]
+            proxyRow = self._sourceToProxy[sourceRow]
+            isAccepted = self.filterAcceptsRow(sourceRow)
+            if proxyRow == -1:
+                if isAccepted:
+                    self._insertSourceRow(sourceRow)
+            elif not isAccepted:
+                self._removeProxyRow(proxyRow)
+            elif changedSortColumns:
+                self._repositionProxyRow(proxyRow)
+
+    def _sourceHeaderDataChanged(self, orientation, first, last):
+        if orientation == Qt.Horizontal:
+            self.headerDataChanged.emit(orientation, first, last)
+        elif len(self._proxyToSource):
+            self.headerDataChanged.emit(orientation, 0, len(self._proxyToSource) - 1)
+
+    def _sourceRowsInserted(self, parent, first, last):
+        if parent.isValid():
+            return
+        count = last - first + 1
+        self._proxyToSource = [(row + count) if (row >= first) else row for row in self._proxyToSource]
+        self._sourceToProxy[first:first] = [-1] * count
+        for propertyIndex in self._keys:
+            self._keys[propertyIndex][first:first] = self._sortKeys(propertyIndex, first, last + 1)
+        newRows = [row for row in range(first, last + 1) if self.filterAcceptsRow(row)]
+        if len(newRows) > self.maxIncrementalRows:
+            self._saveLayout()
+            self._setMapping(self._sortedRows(self._proxyToSource + newRows), len(self._sourceToProxy))
+            self._restoreLayout()
+        else:
+            for sourceRow in newRows:
+                self._insertSourceRow(sourceRow)
+
+    def _sourceRowsAboutToBeRemoved(self, parent, first, last):
+        if parent.isValid():
+            return
+        proxyRows = [self._sourceToProxy[row] for row in range(first, last + 1)]
+        ranges = indexRanges([proxyRow for proxyRow in proxyRows if proxyRow != -1])
+        if len(ranges) > self.maxIncrementalRows:
+            self.beginResetModel()
+            self._isResetting = True
+            return
+        for firstProxyRow, lastProxyRow in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), firstProxyRow, lastProxyRow)
+            del self._proxyToSource[firstProxyRow:lastProxyRow + 1]
+            self._updateSourceToProxy(firstProxyRow)
+            self.endRemoveRows()
+
+    def _sourceRowsRemoved(self, parent, first, last):
+        if parent.isValid():
+            return
+        if self._isResetting:
+            self._sourceModelReset()
+            return
+        count = last - first + 1
+        self._proxyToSource = [(row - count) if (row > last) else row for row in self._proxyToSource]
+        del self._sourceToProxy[first:last + 1]
+        for keys in self._keys.values():
+            del keys[first:last + 1]
+
+    def _saveLayout(self):
+        """ Emit layoutAboutToBeChanged and remember the source index of each persistent proxy index.
+        """
+        self.layoutAboutToBeChanged.emit()
+        self._isLayoutChanging = True
+        self._layoutProxyIndexes = self.persistentIndexList()
+        self._layoutSourceIndexes = [QPersistentModelIndex(self.mapToSource(index)) for index in self._layoutProxyIndexes]
+
+    def _restoreLayout(self):
+        """ Point persistent proxy indexes at their source index's new proxy row and emit layoutChanged.
+        """
+        newIndexes = []
+        for sourceIndex in self._layoutSourceIndexes:
+            proxyRow = self._sourceToProxy[sourceIndex.row()] if sourceIndex.isValid() else -1
+            newIndexes.append(self.index(proxyRow, sourceIndex.column()) if proxyRow != -1 else QModelIndex())
+        self.changePersistentIndexList(self._layoutProxyIndexes, newIndexes)
+        self._layoutProxyIndexes = []
+        self._layoutSourceIndexes = []
+        self._isLayoutChanging = False
+        self.layoutChanged.emit()
+
+    def _sourceLayoutAboutToBeChanged(self, *args):
+        self._saveLayout()
+
+    def _sourceLayoutChanged(self, *args):
+        self._rebuild()
+        self._restoreLayout()
+
+    def _sourceModelAboutToBeReset(self):
+        self.beginResetModel()
+        self._isResetting = True
+
+    def _sourceModelReset(self):
+        self._rebuild()
+        self._isResetting = False
+        self.endResetModel()
+
+    def _sourceColumnsChanged(self, *args):
+        self.beginResetModel()
+        self.sortColumns = [(column, order) for column, order in self.sortColumns if column < len(self.sourceModel().properties)]
+        self._rebuild()
+        self.endResetModel()
+
+    # QAbstractProxyModel interface.
+
+    def mapToSource(self, proxyIndex):
+        if not proxyIndex.isValid() or not (0 <= proxyIndex.row() < len(self._proxyToSource)):
+            return QModelIndex()
+        return self.sourceModel().index(self._proxyToSource[proxyIndex.row()], proxyIndex.column())
+
+    def mapFromSource(self, sourceIndex):
+        if not sourceIndex.isValid() or not (0 <= sourceIndex.row() < len(self._sourceToProxy)):
+            return QModelIndex()
+        proxyRow = self._sourceToProxy[sourceIndex.row()]
+        if proxyRow == -1:
+            return QModelIndex()
+        return self.index(proxyRow, sourceIndex.column())
+
+    def sourceRow(self, proxyRow):
+        """ Return the source object index for proxyRow.
+        """
+        return self._proxyToSource[proxyRow]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not ((0 <= row < len(self._proxyToSource)) and (0 <= column < self.columnCount())):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            return QAbstractProxyModel.parent(self)  # QObject.parent()
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._proxyToSource)
+
+    def columnCount(self, parent=QModelIndex()):
+        sourceModel = self.sourceModel()
+        return 0 if (parent.isValid() or (sourceModel is None)) else sourceModel.columnCount()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (not parent.isValid()) and self.sourceModel().canFetchMore(QModelIndex())
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self.sourceModel().fetchMore(QModelIndex())
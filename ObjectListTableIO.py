@@ -0,0 +1,466 @@
+""" ObjectListTableIO.py: Streaming export/import of an ObjectListTableModelQt's properties (CSV, JSON Lines, Arrow).
+
+Files have one column per property (named by its 'header', or its 'attr' if it has no header) and one row per object.
+Export streams the model's objects in chunks of chunkSize through the properties' compiled 'attr' accessors, so only
+one chunk of rows is held in memory at a time. Values are formatted the way the delegates display them:
+
+    - Properties with (key, value) 'choices' are written as their keys.
+    - datetime properties are written in their 'text' format (default "%c") in CSV and JSON Lines.
+    - None is written as an empty CSV field or a JSON null.
+
+Import reads chunks of chunkSize rows, parses them back (keys --> choice values, 'text' formatted datetimes, and the
+property's type for CSV text), and inserts each chunk with a single insertObjects() call, i.e. one insertion signal
+(and one undo step) per chunk. File columns are matched to properties by header or 'attr', other columns are ignored.
+For ObjectListTableModelQt, new objects are created by the model's objectFactory, templateObject or neighbouring
+object (see newObjects()) and the file's values are set through the 'attr' paths. ColumnarTableModelQt takes
+each chunk as a dict of columns. CSV text is parsed according to the property's type (see propertyType()), so give
+the properties a 'dtype' when importing CSV into a model whose types cannot be resolved yet (e.g. an empty
+ColumnarTableModelQt), otherwise their values stay text.
+
+    exportCsv(model, "table.csv")
+    importCsv(model, "table.csv")
+
+Arrow IPC (.arrow) and Parquet (.parquet) files require pyarrow. They are typed, so values are written as is
+(e.g. datetimes as timestamps and choice values rather than their keys). Importing an Arrow file into an empty ColumnarTableModelQt
+memory maps the file and hands its numeric, bool and timestamp buffers to the model's columns without copying them
+(columns are copied on their first edit).
+
+Only the objects loaded so far are exported from a lazily loaded model (call fetchAll() first to export everything).
+Button properties are skipped.
+
+Tab separated (TSV) text of cell ranges, as exchanged with spreadsheets via the clipboard, is written by
+iterTsvChunks() and written back to the model by pasteTsv() (see ObjectListTableViewQt.copySelection() and
+pasteClipboard()).
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+import copy
+import csv
+import io
+import json
+from contextlib import contextmanager
+from datetime import datetime
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None  # Arrow IPC and Parquet files require pyarrow.
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+# Number of rows read or written at a time.
+DEFAULT_CHUNK_SIZE = 10000
+
+# CSV text for a bool property's True (anything else but "" reads as False).
+TRUE_TEXTS = ("True", "true", "TRUE", "1", "yes")
+
+
+class PropertyCodec(object):
+    """ Formats one property's values for a file, and parses them back, the way its delegate displays them.
+    """
+    __slots__ = ('propertyIndex', 'spec', 'name', 'dtype', 'dateTimeFormat', 'choiceKeys', 'choiceValues')
+
+    def __init__(self, model, propertyIndex):
+        spec = model.columnSpecs()[propertyIndex]
+        self.propertyIndex = propertyIndex
+        self.spec = spec
+        self.name = spec.header if spec.header else spec.attr
+        self.dtype = model.propertyType(propertyIndex)
+        self.dateTimeFormat = spec.prop.get('text', "%c") if self.dtype is datetime else None
+        self.choiceKeys = {}  # {choice value: key}
+        self.choiceValues = {}  # {key: choice value}
+        for choice in spec.prop.get('choices', []):
+            if (type(choice) is tuple) and (len(choice) == 2):
+                key, val = choice
+                self.choiceValues.setdefault(str(key), val)
+                try:
+                    self.choiceKeys.setdefault(val, str(key))
+                except TypeError:
+                    pass  # Unhashable values are written as is.
+
+    def format(self, value):
+        """ Return value as written to a text file.
+        """
+        if self.choiceKeys:
+            try:
+                key = self.choiceKeys.get(value, None)
+            except TypeError:
+                key = None
+            if key is not None:
+                return key
+        if (self.dateTimeFormat is not None) and isinstance(value, datetime):
+            return value.strftime(self.dateTimeFormat)
+        return value
+
+    def parse(self, value):
+        """ Return the property value for a value read from a file (CSV text, JSON value or Arrow value).
+        """
+        if self.choiceValues and isinstance(value, str) and (value in self.choiceValues):
+            return copy.deepcopy(self.choiceValues[value])  # As ComboBoxDelegateQt does.
+        if not isinstance(value, str) or (self.dtype is str) or (self.dtype is None):
+            return value
+        if value == "":
+            return None  # Written for None.
+        if self.dtype is datetime:
+            return datetime.strptime(value, self.dateTimeFormat)
+        if self.dtype is bool:
+            return value in TRUE_TEXTS
+        if self.dtype in (int, float):
+            return self.dtype(value)
+        return value
+
+    def values(self, model, start, stop):
+        """ Return the property's values for the objects in [start, stop).
+        """
+        return model.getValues(self.propertyIndex, start, stop)
+
+
+def propertyCodecs(model, propertyIndices=None):
+    """ Return a PropertyCodec for each property at propertyIndices (default all) that has an 'attr' and is not a button.
+    """
+    specs = model.columnSpecs()
+    if propertyIndices is None:
+        propertyIndices = range(len(specs))
+    return [PropertyCodec(model, i) for i in propertyIndices if (specs[i].attr is not None) and not specs[i].isButton]
+
+
+@contextmanager
+def openFile(fileOrPath, mode):
+    """ Yield fileOrPath if it is an open file, otherwise open (and finally close) the file at that path.
+    """
+    if hasattr(fileOrPath, 'read') or hasattr(fileOrPath, 'write'):
+        yield fileOrPath
+        return
+    if 'b' in mode:
+        f = open(fileOrPath, mode)
+    else:
+        f = io.open(fileOrPath, mode, newline="", encoding="utf-8")
+    try:
+        yield f
+    finally:
+        f.close()
+
+
+# Export.
+
+def iterRowChunks(model, codecs, chunkSize=DEFAULT_CHUNK_SIZE):
+    """ Yield the formatted rows of the model's objects as lists of at most chunkSize row tuples.
+    """
+    numObjects = len(model.objects)
+    for start in range(0, numObjects, chunkSize):
+        stop = min([start + chunkSize, numObjects])
+        columns = [[codec.format(value) for value in codec.values(model, start, stop)] for codec in codecs]
+        yield list(zip(*columns))
+
+
+def exportCsv(model, fileOrPath, propertyIndices=None, chunkSize=DEFAULT_CHUNK_SIZE, **csvFormat):
+    """ Write a header row of property names and a row per object to a CSV file. Returns the number of objects written.
+    csvFormat are passed on to csv.writer() (e.g. delimiter="\\t").
+    """
+    codecs = propertyCodecs(model, propertyIndices)
+    numObjects = 0
+    with openFile(fileOrPath, "w") as f:
+        writer = csv.writer(f, **csvFormat)
+        writer.writerow([codec.name for codec in codecs])
+        for rows in iterRowChunks(model, codecs, chunkSize):
+            writer.writerows([["" if value is None else value for value in row] for row in rows])
+            numObjects += len(rows)
+    return numObjects
+
+
+def exportJsonLines(model, fileOrPath, propertyIndices=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    """ Write a JSON object {property name: value} per line for each object. Returns the number of objects written.
+    Values that JSON cannot represent are written as their str().
+    """
+    codecs = propertyCodecs(model, propertyIndices)
+    names = [codec.name for codec in codecs]
+    numObjects = 0
+    with openFile(fileOrPath, "w") as f:
+        for rows in iterRowChunks(model, codecs, chunkSize):
+            f.write("".join(json.dumps(dict(zip(names, row)), default=str) + "\n" for row in rows))
+            numObjects += len(rows)
+    return numObjects
+
+
+def requireArrow():
+    if pyarrow is None:
+        raise ImportError("ObjectListTableIO: Arrow and Parquet files require pyarrow.")
+
+
+def arrowColumn(model, codec, start, stop, dataType=None):
+    """ Return the property's values for the objects in [start, stop) as a pyarrow array.
+    NumPy columns of a ColumnarTableModelQt are passed to pyarrow without per-value objects.
+    """
+    column = getattr(model, 'columns', {}).get(codec.spec.attr, None)
+    if (column is not None) and (column.dtype.kind in "biufM"):
+        return pyarrow.array(column[start:stop], type=dataType)
+    return pyarrow.array(codec.values(model, start, stop), type=dataType)
+
+
+def exportArrow(model, path, propertyIndices=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    """ Write the properties to an Arrow IPC file, or to a Parquet file if path ends with ".parquet", in record
+    batches (row groups) of chunkSize objects. Returns the number of objects written. Requires pyarrow.
+    """
+    requireArrow()
+    codecs = propertyCodecs(model, propertyIndices)
+    names = [codec.name for codec in codecs]
+    numObjects = len(model.objects)
+    isParquet = str(path).endswith(".parquet")
+    writer = None
+    try:
+        for start in range(0, max([numObjects, 1]), chunkSize):
+            stop = min([start + chunkSize, numObjects])
+            if writer is None:
+                batch = pyarrow.RecordBatch.from_arrays([arrowColumn(model, codec, start, stop) for codec in codecs], names)
+                if isParquet:
+                    from pyarrow import parquet
+                    writer = parquet.ParquetWriter(path, batch.schema)
+                else:
+                    writer = pyarrow.ipc.new_file(path, batch.schema)
+            else:
+                # Later chunks take the types of the first chunk.
+                arrays = [arrowColumn(model, codec, start, stop, field.type) for codec, field in zip(codecs, batch.schema)]
+                batch = pyarrow.RecordBatch.from_arrays(arrays, schema=batch.schema)
+            if isParquet:
+                writer.write_table(pyarrow.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return numObjects
+
+
+# Import.
+
+def insertChunk(model, i, codecs, columns):
+    """ Insert the objects for a chunk of columns (one list or array per codec) before index i
+    with a single insertObjects(). Returns the number of inserted objects.
+    """
+    num = len(columns[0]) if columns else 0
+    if num == 0:
+        return 0
+    if model.hasObjectIdentity:
+        # Python objects: create them, then set their attrs.
+        objects = model.newObjects(i, num)
+        if len(objects) != num:
+            raise ValueError("ObjectListTableIO: Importing into an empty model requires a templateObject or objectFactory.")
+        for codec, values in zip(codecs, columns):
+            setValue = codec.spec.attrPath.set
+            for obj, value in zip(objects, values):
+                setValue(obj, value)
+        model.insertObjects(i, objects)
+    else:
+        # Records of e.g. ColumnarTableModelQt: a dict of columns.
+        model.insertObjects(i, dict((codec.spec.attr, values) for codec, values in zip(codecs, columns)))
+    return num
+
+
+def matchCodecs(model, names):
+    """ Return [(column position, codec), ...] for the file's column names that match a property's header or 'attr'.
+    """
+    codecs = propertyCodecs(model)
+    byName = {}
+    for codec in codecs:
+        byName.setdefault(codec.spec.attr, codec)
+    for codec in codecs:
+        byName[codec.name] = codec  # Headers take precedence over attrs.
+    return [(position, byName[name]) for position, name in enumerate(names) if name in byName]
+
+
+def importRowChunks(model, names, rowChunks, i=None):
+    """ Parse and insert chunks of rows (sequences of values in the order of names) before index i (default append).
+    Returns the number of inserted objects.
+    """
+    matched = matchCodecs(model, names)
+    codecs = [codec for position, codec in matched]
+    i = len(model.objects) if i is None else i
+    numInserted = 0
+    for rows in rowChunks:
+        columns = [[codec.parse(row[position]) for row in rows] for position, codec in matched]
+        num = insertChunk(model, i + numInserted, codecs, columns)
+        numInserted += num
+    return numInserted
+
+
+def chunked(iterable, chunkSize):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunkSize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def importCsv(model, fileOrPath, i=None, chunkSize=DEFAULT_CHUNK_SIZE, **csvFormat):
+    """ Insert an object per row of a CSV file with a header row of property names before index i (default append).
+    Returns the number of inserted objects.
+    """
+    with openFile(fileOrPath, "r") as f:
+        reader = csv.reader(f, **csvFormat)
+        try:
+            names = next(reader)
+        except StopIteration:
+            return 0
+        rows = (row for row in reader if row)
+        return importRowChunks(model, names, chunked(rows, chunkSize), i)
+
+
+def importJsonLines(model, fileOrPath, i=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    """ Insert an object per JSON object line {property name: value} before index i (default append).
+    Returns the number of inserted objects.
+    """
+    names = [codec.name for codec in propertyCodecs(model)]
+    with openFile(fileOrPath, "r") as f:
+        records = (json.loads(line) for line in f if line.strip())
+        rowChunks = ([[record.get(name, None) for name in names] for record in chunk] for chunk in chunked(records, chunkSize))
+        return importRowChunks(model, names, rowChunks, i)
+
+
+def importArrow(model, path, i=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    """ Insert an object per row of an Arrow IPC file (or a Parquet file if path ends with ".parquet")
+    before index i (default append). Returns the number of inserted objects. Requires pyarrow.
+
+    An Arrow IPC file imported into an empty ColumnarTableModelQt is memory mapped and its columns are
+    handed to the model without copying them (with a single model reset).
+    """
+    requireArrow()
+    if str(path).endswith(".parquet"):
+        from pyarrow import parquet
+        parquetFile = parquet.ParquetFile(path)
+        names = parquetFile.schema_arrow.names
+        batches = parquetFile.iter_batches(batch_size=chunkSize)
+    else:
+        table = pyarrow.ipc.open_file(pyarrow.memory_map(str(path), "r")).read_all()  # Memory mapped, not copied.
+        names = table.schema.names
+        if (not model.hasObjectIdentity) and hasattr(model, 'setColumns') and (len(model.objects) == 0):
+            return setArrowColumns(model, table)
+        batches = (table.slice(start, chunkSize) for start in range(0, table.num_rows, chunkSize))
+    matched = matchCodecs(model, names)
+    codecs = [codec for position, codec in matched]
+    i = len(model.objects) if i is None else i
+    numInserted = 0
+    for batch in batches:
+        columns = [arrowValues(codec, batch.column(position), model.hasObjectIdentity) for position, codec in matched]
+        numInserted += insertChunk(model, i + numInserted, codecs, columns)
+    return numInserted
+
+
+def arrowValues(codec, array, isObjects=True):
+    """ Return the values of a pyarrow array for the codec's property: a list of Python objects for objects,
+    or a NumPy array (a view of the Arrow buffer where possible) for columnar records.
+    """
+    if hasattr(array, 'combine_chunks'):
+        array = array.combine_chunks()  # pyarrow.ChunkedArray of a Table.
+    if isObjects:
+        return [codec.parse(value) for value in array.to_pylist()]
+    return array.to_numpy(zero_copy_only=False)  # A view where the buffer's layout allows it.
+
+
+def setArrowColumns(model, table):
+    """ Replace all records of a ColumnarTableModelQt by the matching columns of a pyarrow Table (zero copy where
+    possible). Returns the number of records.
+    """
+    columns = {}
+    for position, codec in matchCodecs(model, table.schema.names):
+        chunkedArray = table.column(position)
+        array = chunkedArray.chunk(0) if chunkedArray.num_chunks == 1 else chunkedArray
+        columns[codec.spec.attr] = arrowValues(codec, array, False)
+    model.setColumns(columns)
+    return table.num_rows
+
+
+# Tab separated cell ranges (clipboard).
+
+def cellValues(model, propertyIndex, objectIndices):
+    """ Return the property's values for the objects at objectIndices (one getValues() call if they are consecutive).
+    """
+    if objectIndices and (list(objectIndices) == list(range(objectIndices[0], objectIndices[0] + len(objectIndices)))):
+        return model.getValues(propertyIndex, objectIndices[0], objectIndices[0] + len(objectIndices))
+    return [model.getValues(propertyIndex, objectIndex, objectIndex + 1)[0] for objectIndex in objectIndices]
+
+
+def iterTsvChunks(model, rowIndices, columnIndices, selected=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    """ Yield the tab separated text of the cells in rows rowIndices x columns columnIndices of the model,
+    in chunks of at most chunkSize lines. Values are formatted as in CSV files, button cells and cells whose
+    (row position, column position) is not in selected (if given) are left empty.
+    """
+    specs = model.columnSpecs()
+    codecs = {}  # {propertyIndex: PropertyCodec or None for buttons}
+    propertyIndices = columnIndices if model.isRowObjects else rowIndices
+    for propertyIndex in set(propertyIndices):
+        isValue = (specs[propertyIndex].attr is not None) and not specs[propertyIndex].isButton
+        codecs[propertyIndex] = PropertyCodec(model, propertyIndex) if isValue else None
+
+    def formattedValues(propertyIndex, objectIndices):
+        codec = codecs[propertyIndex]
+        if codec is None:
+            return [""] * len(objectIndices)
+        return ["" if value is None else value for value in map(codec.format, cellValues(model, propertyIndex, objectIndices))]
+    for start in range(0, len(rowIndices), chunkSize):
+        chunkRows = rowIndices[start:start + chunkSize]
+        if model.isRowObjects:
+            rows = list(zip(*[formattedValues(propertyIndex, chunkRows) for propertyIndex in columnIndices]))
+        else:
+            rows = [formattedValues(propertyIndex, columnIndices) for propertyIndex in chunkRows]
+        if selected is not None:
+            rows = [[value if (start + i, j) in selected else "" for j, value in enumerate(row)] for i, row in enumerate(rows)]
+        text = io.StringIO()
+        csv.writer(text, delimiter="\t", lineterminator="\n").writerows(rows)
+        yield text.getvalue()
+
+
+def parseTsv(text):
+    """ Return the list of rows (lists of str) of tab separated text (quoted as spreadsheets do).
+    """
+    return [row for row in csv.reader(io.StringIO(text.replace("\r\n", "\n")), delimiter="\t")]
+
+
+def pasteTsv(model, rows, rowIndices, columnIndices, selected=None):
+    """ Set the cells in rows rowIndices x columns columnIndices of the model to the text of rows[i][j]
+    (for the positions (i, j) in selected, if given), converted to each property's type.
+
+    All values are parsed first, and if any of them cannot be converted (or the cell is read only), nothing is set
+    and a ValueError listing the offending cells is raised. Otherwise the values are set per property with
+    setPropertyValues() in a single batchUpdate() (one merged change signal and one undo step).
+    Returns the number of cells set.
+    """
+    specs = model.columnSpecs()
+    codecs = {}
+    values = {}  # {propertyIndex: ([objectIndex, ...], [value, ...])}
+    errors = []
+    for i, rowIndex in enumerate(rowIndices):
+        for j, columnIndex in enumerate(columnIndices):
+            if ((selected is not None) and ((i, j) not in selected)) or (j >= len(rows[i])):
+                continue
+            objectIndex, propertyIndex = (rowIndex, columnIndex) if model.isRowObjects else (columnIndex, rowIndex)
+            spec = specs[propertyIndex]
+            text = rows[i][j]
+            if (spec.attr is None) or spec.isButton or ("Write" not in spec.prop.get('mode', "Read/Write")):
+                errors.append("%s: read only" % (spec.header or spec.attr))
+                continue
+            if propertyIndex not in codecs:
+                codecs[propertyIndex] = PropertyCodec(model, propertyIndex)
+            try:
+                value = codecs[propertyIndex].parse(text)
+            except (TypeError, ValueError):
+                errors.append("%s: %r" % (spec.header or spec.attr, text))
+                continue
+            objectIndices, propertyValues = values.setdefault(propertyIndex, ([], []))
+            objectIndices.append(objectIndex)
+            propertyValues.append(value)
+    if errors:
+        raise ValueError("Cannot paste %d cell(s): %s%s" % (len(errors), ", ".join(errors[:5]), ", ..." if len(errors) > 5 else ""))
+    numCells = 0
+    with model.batchUpdate():
+        for propertyIndex, (objectIndices, propertyValues) in values.items():
+            model.setPropertyValues(propertyIndex, propertyValues, objectIndices, perObject=True)
+            numCells += len(objectIndices)
+    return numCells
@@ -18,48 +18,219 @@ email: <marcel.goldschen@gmail.com>
 """
 
 
+import bisect
 import copy
+import itertools
+import logging
+import random
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 try:
-    from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant, QT_VERSION_STR
-    from PyQt5.QtWidgets import QTableView, QMenu, QInputDialog, QErrorMessage, QDialog, QDialogButtonBox, QVBoxLayout
+    from PyQt5.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QVariant, QT_VERSION_STR
+    from PyQt5.QtGui import QBrush, QColor, QKeySequence
+    from PyQt5.QtWidgets import QApplication, QTableView, QStyledItemDelegate, QMenu, QInputDialog, QErrorMessage, QDialog, QDialogButtonBox, QVBoxLayout
 except ImportError:
     try:
         from PyQt4.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant, QT_VERSION_STR, QString
-        from PyQt4.QtGui import QTableView, QMenu, QInputDialog, QErrorMessage, QDialog, QDialogButtonBox, QVBoxLayout
+        from PyQt4.QtGui import QAbstractProxyModel, QBrush, QColor, QKeySequence, QApplication, QTableView, QStyledItemDelegate, QMenu, QInputDialog, QErrorMessage, QDialog, QDialogButtonBox, QVBoxLayout
     except ImportError:
         raise ImportError("ObjectListTableModelViewQt: Requires PyQt5 or PyQt4.")
-from CheckBoxDelegateQt import CheckBoxDelegateQt
-from FloatEditDelegateQt import FloatEditDelegateQt
-from DateTimeEditDelegateQt import DateTimeEditDelegateQt
-from ComboBoxDelegateQt import ComboBoxDelegateQt
-from PushButtonDelegateQt import PushButtonDelegateQt
-from FileDialogDelegateQt import FileDialogDelegateQt
+from ItemDataRolesQt import SEARCH_HIGHLIGHT_ROLE, LOAD_STATUS_ROLE, LOAD_PROGRESS_ROLE, BUTTON_BUSY_ROLE
+from DelegateRegistryQt import DelegateCacheQt
+from AttrPath import compileAttrPath, MISSING_ERRORS
 
 
 __author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
 
 
+logger = logging.getLogger("ObjectListTableModelViewQt")
+
+
 def getAttrRecursive(obj, attr):
     """ Recursive introspection (i.e. get the member 'b' of a member 'a' by name as 'a.b').
+    The path is compiled once and cached, see AttrPath.compileAttrPath().
     """
-    try:
-        p = attr.index(".")
-        obj = getattr(obj, attr[0:p])
-        return getAttrRecursive(obj, attr[p+1:])
-    except ValueError:
-        return getattr(obj, attr)
+    return compileAttrPath(attr).getter(obj)
 
 
 def setAttrRecursive(obj, attr, value):
     """ Recursive introspection (i.e. set the member 'b' of a member 'a' by name as 'a.b').
+    The path is compiled once and cached, see AttrPath.compileAttrPath().
     """
-    try:
-        p = attr.index(".")
-        obj = getattr(obj, attr[0:p])
-        setAttrRecursive(obj, attr[p+1:], value)
-    except ValueError:
-        setattr(obj, attr, value)
+    compileAttrPath(attr).set(obj, value)
+
+
+def changesValues(roles):
+    """ True if a dataChanged signal with these roles may have changed displayed values (no roles means all roles).
+    """
+    return (not roles) or (Qt.DisplayRole in roles) or (Qt.EditRole in roles)
+
+
+def indexRanges(indices):
+    """ Group indices into a sorted list of contiguous (first, last) ranges (inclusive), e.g. [5, 1, 2] --> [(1, 2), (5, 5)].
+    """
+    ranges = []
+    for i in sorted(set(indices)):
+        if ranges and (i == ranges[-1][1] + 1):
+            ranges[-1] = (ranges[-1][0], i)
+        else:
+            ranges.append((i, i))
+    return ranges
+
+
+def mergeRanges(ranges):
+    """ Merge (first, last) ranges (inclusive) into a sorted list of disjoint ranges, e.g. [(4, 6), (1, 2), (3, 3)] --> [(1, 6)].
+    """
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and (first <= merged[-1][1] + 1):
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+# Flags of every property cell. Editable is added for properties whose 'mode' includes "Write".
+ITEM_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+if hasattr(Qt, 'ItemNeverHasChildren'):
+    ITEM_FLAGS |= Qt.ItemNeverHasChildren  # Qt >= 5.1, as returned by QAbstractTableModel.flags().
+
+
+class ColumnSpec(object):
+    """ A property dict compiled once into what the model needs for each of the property's cells.
+
+    prop: The property dict itself.
+    attr, attrPath: The property's 'attr' (or None) and its compiled AttrPath.
+    header: The property's 'header' (or None).
+    flags: Qt.ItemFlags for the property's cells.
+    isButton, isFileDialog: The property's 'action'.
+    isBackgroundLoad: True for "fileDialog" properties whose files are loaded on worker threads.
+    runIn: Where a "button" property's method runs: None (GUI thread), "thread" or "process".
+    dtype: The property's type once known (see ObjectListTableModelQt.propertyType()).
+    roleHandlers: {role: handler(objectIndex, propertyIndex, role)} used by data().
+    """
+    __slots__ = ('prop', 'attr', 'attrPath', 'header', 'flags', 'isButton', 'isFileDialog', 'isBackgroundLoad', 'runIn',
+                 'dtype', 'roleHandlers')
+
+    def __init__(self, prop):
+        self.prop = prop
+        self.attr = prop.get('attr', None)
+        self.attrPath = compileAttrPath(self.attr) if (self.attr is not None) else None
+        self.header = prop.get('header', None)
+        self.flags = (ITEM_FLAGS | Qt.ItemIsEditable) if ("Write" in prop.get('mode', "Read/Write")) else ITEM_FLAGS
+        action = prop.get('action', None)
+        self.isButton = (action == "button")
+        self.isFileDialog = (action == "fileDialog")
+        self.isBackgroundLoad = self.isFileDialog and prop.get('backgroundLoad', False)
+        self.runIn = prop.get('runIn', None) if self.isButton else None
+        self.dtype = prop.get('dtype', None)
+        self.roleHandlers = {}
+
+
+class ObjectValueCache(object):
+    """ LRU cache of attribute values keyed by (object identity, attr path).
+
+    Each entry holds a reference to its object so that an id() cannot be reused by another object
+    while the entry exists. Entries are evicted least recently used first whenever the cache holds
+    more than maxEntries values or more than approximately maxBytes (estimated with sys.getsizeof).
+
+    :param maxEntries (int): Maximum number of cached values.
+    :param maxBytes (int): Approximate memory bound for the cached values.
+    """
+
+    # Approximate per entry overhead (key tuple, entry tuple and dict slots) in bytes.
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, maxEntries=100000, maxBytes=64*1024*1024):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.numBytes = 0
+        self._entries = OrderedDict()  # (id(obj), attr) --> (obj, value, numBytes)
+        self._attrsById = {}  # id(obj) --> set of cached attrs for obj
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, obj, attr, getter):
+        """ Return the cached value of attr for obj, calling getter(obj) on a cache miss.
+        Exceptions raised by getter are not cached.
+        """
+        key = (id(obj), attr)
+        entry = self._entries.get(key, None)
+        if (entry is not None) and (entry[0] is obj):
+            self._entries.move_to_end(key)
+            return entry[1]
+        value = getter(obj)
+        self._put(key, obj, value)
+        return value
+
+    def find(self, obj, attr, default=None):
+        """ Return the cached value of attr for obj, or default if it is not cached.
+        """
+        key = (id(obj), attr)
+        entry = self._entries.get(key, None)
+        if (entry is None) or (entry[0] is not obj):
+            return default
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, obj, attr, value):
+        self._put((id(obj), attr), obj, value)
+
+    def _put(self, key, obj, value):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.numBytes -= old[2]
+        numBytes = sys.getsizeof(value) + self.ENTRY_OVERHEAD
+        self._entries[key] = (obj, value, numBytes)
+        self._attrsById.setdefault(key[0], set()).add(key[1])
+        self.numBytes += numBytes
+        while self._entries and ((len(self._entries) > self.maxEntries) or (self.numBytes > self.maxBytes)):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.numBytes -= entry[2]
+        attrs = self._attrsById.get(key[0], None)
+        if attrs is not None:
+            attrs.discard(key[1])
+            if not attrs:
+                del self._attrsById[key[0]]
+
+    def invalidate(self, objects=None, attrs=None):
+        """ Drop cached values for the given objects and/or attr paths (all if None).
+        Invalidating an attr path also invalidates paths to its children (e.g. "a" invalidates "a.b").
+        """
+        if (objects is None) and (attrs is None):
+            self.clear()
+            return
+        if attrs is not None:
+            attrs = set(attrs)
+            prefixes = tuple(attr + "." for attr in attrs) + tuple(attr + "[" for attr in attrs)
+
+            def matches(attr):
+                return (attr in attrs) or attr.startswith(prefixes)
+        if objects is None:
+            keys = [key for key in self._entries if matches(key[1])]
+        else:
+            keys = []
+            for obj in objects:
+                objectId = id(obj)
+                for attr in self._attrsById.get(objectId, ()):
+                    if (attrs is None) or matches(attr):
+                        keys.append((objectId, attr))
+        for key in keys:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._attrsById.clear()
+        self.numBytes = 0
 
 
 class ObjectListTableModelQt(QAbstractTableModel):
@@ -72,6 +243,8 @@ class ObjectListTableModelQt(QAbstractTableModel):
     'attr': Name of an object attribute. If specified, data() and setData() will get/set the attribute's value
         for the associated object.
         - May be a path to a child attribute such as "path.to.a.child.attr".
+        - Paths may also index dicts and sequences such as "values[0]" or "info['key'].name".
+        - If the path does not exist for an object, data() returns the model's missingValue (default None).
     'header': Text to display in the table's property header.
     'dtype': Attribute type. If not specified, this is inferred either from the templateObject or an object in the list.
     'mode': "Read/Write" or "Read Only". If not specified, defaults to "Read/Write".
@@ -79,11 +252,15 @@ class ObjectListTableModelQt(QAbstractTableModel):
     'action': Name of a special action associated with this cell. Actions include:
         "button": Clicking on the cell is treated as a button press.
             - setData() calls the object's method specified by the property's 'attr' key.
+            - If 'runIn' is "thread" or "process", the method runs off the GUI thread, see ObjectListActionRunnerQt.
         "fileDialog": Double clicking on the cell pops up a file dialog.
             - setData() sets the property's 'attr' value to the "path/to/filename" returned form the dialog.
             - If you want some file loading script to run each time the file name is set, set 'attr' to the object
               @property.setter that set's the file name and runs the script.
+            - If 'backgroundLoad' is True, the setter runs on a worker thread, see ObjectListFileLoaderQt.
     'text': String used by certain properties. For example, used to specify a datetime's format or a button's text.
+    'async': If True, the 'attr' getter is evaluated on a thread pool and data() returns the property's
+        'placeholder' (default None) until the value arrives. For slow @property getters, see ObjectListAsyncLoaderQt.
 
     By specifying each object property (or action) displayed in the model/view as a dict,
     it is easy to simply add new key:value pairs for new custom delegates, and extend the model/view
@@ -95,19 +272,303 @@ class ObjectListTableModelQt(QAbstractTableModel):
             {'attr': "birthday",    'header': "D.O.B.", 'text': "%x"      },  # Read/Write column of object.birthday datetimes (format="%x").
             {'attr': "friend.name", 'header': "Friend"                    }]  # Read/Write column of object.friend.name strings.
 
-    :param objects (list): List of objects.
+    :param objects (list): List of objects. Any other iterable (e.g. a generator) is loaded lazily, see setObjectSource().
     :param properties (list): List of property dicts {'attr'=str, 'header'=str, 'isReadOnly'=bool, 'choices'=[], ...}
     :param isRowObjects (bool): If True, objects are rows and properties are columns, otherwise vice-versa.
     :param isDynamic (bool): If True, objects can be inserted/deleted, otherwise not.
     :param templateObject (object): Object that will be deep copied to create new objects when inserting into the list.
+
+    Value cache (opt-in, see setValueCacheEnabled()):
+        Caches attribute values keyed by (object identity, 'attr' path) so that the many data() requests Qt makes
+        per cell per paint only call expensive @property getters once. The cache is invalidated automatically by
+        setData(), insertObjects(), removeObjects(), moveObjects() and clearObjects(). If objects are changed
+        outside of the model, call invalidate(objects, properties).
+
+    Column specs (see columnSpecs()):
+        Each property dict is compiled once into a ColumnSpec holding its flags, header, compiled 'attr' path and
+        a per-role data() handler table. Specs are recompiled whenever properties is reassigned or changes length.
+        If you change a property dict in place, call recompileColumnSpecs().
+
+    Change notifications (opt-in, see setChangeNotificationsEnabled()):
+        Objects that inherit ObservableObject report attribute assignments, which are mapped back to their
+        property cells (also through nested 'attr' paths) and emitted as coalesced dataChanged signals on the
+        next event loop tick. This also works for changes made in other threads.
+
+    Batched updates (see batchUpdate()):
+        Within a "with model.batchUpdate():" block, cell changes are collected and emitted when the block ends as
+        the fewest merged dataChanged rectangles, and insertions/removals/moves as a single layout change
+        (or model reset) instead of one signal pair each.
+
+    Undo/redo (opt-in, see setUndoEnabled()):
+        Edits, insertions, removals and moves made through the model are recorded as compact deltas (old/new values
+        and object references, never copies of the list) on a QUndoStack with an approximate memory cap.
+
+    Search (opt-in, see setSearchIndexEnabled()):
+        Keeps an ObjectListSearchIndexQt n-gram index of the displayed text of searchable properties, so search()
+        finds matching objects without scanning every cell. Cells containing the current search terms have a
+        searchHighlightBrush background, and data() returns the terms' spans in their text for SEARCH_HIGHLIGHT_ROLE.
+
+    Profiling (opt-in, see setProfilingEnabled()):
+        Counts calls, total/max latency and exceptions of each property's data() role handlers and setData()
+        (and of the view's delegates, see ObjectListTableViewQt.setProfilingEnabled()), see ObjectListProfilerQt.
+
+    Lazy loading (see setObjectSource()):
+        If objects is an iterable other than a list (e.g. a generator or a database cursor), only the first
+        fetchChunkSize objects are loaded up front. Views pull further chunks through Qt's canFetchMore()/fetchMore()
+        as the user scrolls, and rowCount()/columnCount() report the number of objects loaded so far.
+        Inserting/removing/moving objects works on the loaded objects, and fetched objects are always appended.
     """
+
+    # Value returned by data() for properties whose 'attr' path does not exist in an object.
+    missingValue = None
+
+    # Number of objects pulled from a lazy object source per fetchMore().
+    fetchChunkSize = 256
+
+    # Optional factory() for creating new objects in insertObjects(), used instead of deep copying a template.
+    objectFactory = None
+
+    # removeObjectsAt() emits one remove signal per contiguous range of indices up to this many ranges,
+    # beyond which it rebuilds the list in a single pass within a single layout change (see removeObjectRanges()).
+    maxRemoveRangeSignals = 100
+
+    # Background of cells that contain the current search terms.
+    searchHighlightBrush = QBrush(QColor(255, 230, 0, 128))
+
+    # batchUpdate() merges the cell changes within a batch into at most this many dataChanged rectangles,
+    # beyond which it emits a single dataChanged for the bounding rectangle of all changed cells.
+    maxBatchDataChangedRanges = 100
+
+    # True if objects keep their identity across insertions, removals and moves. batchUpdate() then reports
+    # structural changes as a single layout change that keeps persistent indexes on their objects,
+    # otherwise as a single model reset.
+    hasObjectIdentity = True
+
     def __init__(self, objects=None, properties=None, isRowObjects=True, isDynamic=True, templateObject=None, parent=None):
         QAbstractTableModel.__init__(self, parent)
-        self.objects = objects if (objects is not None) else []
+        self._batchDepth = 0  # Nesting depth of batchUpdate().
+        self._batchMode = None  # None, "layout" or "reset" once the batch has changed the structure.
+        self._batchRectangles = {}  # {roles: [(objectRanges, propertyRanges), ...]} of cells changed in the batch.
+        self._batchValuesChanged = False  # True if cells changed in a batch that is reported as a layout change.
+        self._objectIndices = None  # {id(obj): objectIndex}, see objectIndexMap().
+        self._batchPersistentIndexes = []  # [(persistent index, object), ...] saved for a batch layout change.
+        self._objectSource = None  # Iterator of objects that have not been fetched yet.
+        self._objectSourceNext = []  # Look ahead object from _objectSource (so we know when it is exhausted).
+        self.objects = objects if isinstance(objects, list) else []
         self.properties = properties if (properties is not None) else []
         self.isRowObjects = isRowObjects
         self.isDynamic = isDynamic
         self.templateObject = templateObject
+        self._loggedGetterErrors = set()  # {(attr, exception type), ...} already logged by logGetterError().
+        self.valueCache = None  # ObjectValueCache or None if disabled.
+        self.searchIndex = None  # ObjectListSearchIndexQt or None if disabled.
+        self.changeBridge = None  # ObjectChangeBridgeQt or None if disabled.
+        self.undoRecorder = None  # ObjectListUndoRecorderQt or None if disabled.
+        self.asyncLoader = None  # ObjectListAsyncLoaderQt, created when first needed for 'async' properties.
+        self.fileLoader = None  # ObjectListFileLoaderQt, created when first needed for 'backgroundLoad' properties.
+        self.actionRunner = None  # ObjectListActionRunnerQt, created when first needed for 'runIn' button properties.
+        self.profiler = None  # ObjectListProfilerQt or None if disabled.
+        if (objects is not None) and not isinstance(objects, list):
+            self.setObjectSource(objects)
+        for signal in (self.rowsInserted, self.rowsRemoved, self.rowsMoved, self.columnsInserted, self.columnsRemoved,
+                       self.columnsMoved, self.layoutChanged, self.modelReset):
+            signal.connect(self._objectsChanged)
+
+    def setObjectSource(self, iterable, chunkSize=None):
+        """ Lazily append objects from iterable (e.g. a generator) as views fetch more.
+        The first chunk is fetched immediately so that views can infer property types.
+        """
+        if chunkSize is not None:
+            self.fetchChunkSize = chunkSize
+        self._objectSource = iter(iterable)
+        self._objectSourceNext = []
+        self.fetchMore()
+
+    def isFullyLoaded(self):
+        """ Return False if there are still objects to be fetched from a lazy object source.
+        """
+        return self._objectSource is None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._objectSource is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        """ Append the next fetchChunkSize objects from the lazy object source.
+        """
+        if parent.isValid() or (self._objectSource is None):
+            return
+        chunk = self._objectSourceNext
+        chunk.extend(itertools.islice(self._objectSource, max([1, self.fetchChunkSize]) - len(chunk)))
+        # Look ahead by one object so that canFetchMore() is False as soon as the source is exhausted.
+        try:
+            self._objectSourceNext = [next(self._objectSource)]
+        except StopIteration:
+            self._objectSource = None
+            self._objectSourceNext = []
+        if len(chunk):
+            n = len(self.objects)
+            self.beginInsertObjects(n, n + len(chunk) - 1)
+            self.appendFetchedObjects(chunk)
+            self.endInsertObjects()
+
+    def fetchAll(self):
+        """ Fetch all remaining objects from the lazy object source.
+        """
+        while self._objectSource is not None:
+            self.fetchMore()
+
+    def appendFetchedObjects(self, objects):
+        """ Append a chunk of objects fetched from the lazy object source to the storage.
+        """
+        self.objects.extend(objects)
+
+    def setValueCacheEnabled(self, enabled, maxEntries=100000, maxBytes=64*1024*1024):
+        """ Enable/disable the LRU value cache with the given entry and approximate memory bounds.
+        """
+        self.valueCache = ObjectValueCache(maxEntries, maxBytes) if enabled else None
+
+    @property
+    def properties(self):
+        return self._properties
+
+    @properties.setter
+    def properties(self, properties):
+        self._properties = properties
+        self._columnSpecs = None  # Compiled on next use.
+        if getattr(self, 'changeBridge', None) is not None:
+            self.changeBridge.watchAll()  # Observe the new property paths.
+
+    def columnSpecs(self):
+        """ Return the list of ColumnSpec compiled from the property dicts (one per property).
+        """
+        specs = self._columnSpecs
+        if (specs is None) or (len(specs) != len(self._properties)):
+            specs = self._columnSpecs = [self.compileColumnSpec(prop) for prop in self._properties]
+            if self.profiler is not None:
+                for spec in specs:
+                    self.profiler.instrumentColumnSpec(spec)
+        return specs
+
+    def recompileColumnSpecs(self):
+        """ Recompile the column specs on next use (e.g. after changing a property dict in place).
+        """
+        self._columnSpecs = None
+
+    def compileColumnSpec(self, prop):
+        """ Return the ColumnSpec for a property dict. Override to add data() role handlers.
+        """
+        spec = ColumnSpec(prop)
+        if spec.attr is not None:
+            # 'async' values are cached by object identity, which records of e.g. ColumnarTableModelQt don't have.
+            isAsync = prop.get('async', False) and self.hasObjectIdentity
+            spec.roleHandlers[Qt.DisplayRole] = self.asyncValueData if isAsync else self.valueData
+            spec.roleHandlers[Qt.EditRole] = self.asyncValueData if isAsync else self.valueData
+        spec.roleHandlers[Qt.BackgroundRole] = self.searchHighlightData
+        spec.roleHandlers[SEARCH_HIGHLIGHT_ROLE] = self.searchHighlightData
+        if spec.isButton:
+            spec.roleHandlers[BUTTON_BUSY_ROLE] = self.buttonBusyData
+        if spec.isFileDialog:
+            spec.isBackgroundLoad = spec.isBackgroundLoad and self.hasObjectIdentity
+            spec.roleHandlers[LOAD_STATUS_ROLE] = self.loadStatusData
+            spec.roleHandlers[LOAD_PROGRESS_ROLE] = self.loadStatusData
+        return spec
+
+    def setSearchIndexEnabled(self, enabled, propertyIndices=None, gramLength=3):
+        """ Enable/disable the search index over the displayed text of the properties at propertyIndices
+        (default all properties that display text). See ObjectListSearchIndexQt.
+        """
+        if self.searchIndex is not None:
+            self.searchIndex.setParent(None)
+            self.searchIndex.deleteLater()
+            self.searchIndex = None
+        if enabled:
+            from ObjectListSearchIndexQt import ObjectListSearchIndexQt
+            self.searchIndex = ObjectListSearchIndexQt(self, propertyIndices, gramLength, self)
+        self.notifySearchHighlightsChanged()
+
+    def setChangeNotificationsEnabled(self, enabled):
+        """ Enable/disable coalesced dataChanged signals for attribute changes of ObservableObjects in the list
+        (e.g. made by your own code outside of the model/view). See ObjectChangeBridgeQt.
+        """
+        if self.changeBridge is not None:
+            self.changeBridge.unwatchAll()
+            self.changeBridge.setParent(None)
+            self.changeBridge.deleteLater()
+            self.changeBridge = None
+        if enabled:
+            from ObjectChangeBridgeQt import ObjectChangeBridgeQt
+            self.changeBridge = ObjectChangeBridgeQt(self, self)
+
+    def setUndoEnabled(self, enabled, undoStack=None, maxBytes=64*1024*1024):
+        """ Enable/disable recording changes made through the model as commands on undoStack (default a new QUndoStack,
+        see undoRecorder.undoStack), keeping approximately at most maxBytes of history. See ObjectListUndoQt.
+        """
+        if self.undoRecorder is not None:
+            self.undoRecorder.setParent(None)
+            self.undoRecorder.deleteLater()
+            self.undoRecorder = None
+        if enabled:
+            from ObjectListUndoQt import ObjectListUndoRecorderQt
+            self.undoRecorder = ObjectListUndoRecorderQt(self, undoStack, maxBytes, self)
+
+    def setProfilingEnabled(self, enabled, slowCallThreshold=None):
+        """ Enable/disable per property call counters for data() and setData(), see ObjectListProfilerQt.
+        Single calls taking longer than slowCallThreshold seconds are reported (None to never report).
+        """
+        if enabled:
+            if self.profiler is None:
+                from ObjectListProfilerQt import ObjectListProfilerQt
+                self.profiler = ObjectListProfilerQt(self, slowCallThreshold, parent=self)
+            self.profiler.slowCallThreshold = slowCallThreshold
+        elif self.profiler is not None:
+            self.profiler.uninstrumentDelegates()
+            self.profiler = None
+        self.recompileColumnSpecs()  # Instrument (or restore) the data() role handlers.
+
+    def isRecordingUndo(self):
+        return (self.undoRecorder is not None) and self.undoRecorder.isRecording
+
+    def search(self, text):
+        """ Return the sorted indices of the objects whose searched properties contain every whitespace separated term
+        in text (case insensitive), and highlight the terms in the view. An empty text matches all objects.
+        """
+        if self.searchIndex is None:
+            raise RuntimeError("ObjectListTableModelQt.search: Call setSearchIndexEnabled(True) first.")
+        matches = self.searchIndex.search(text)
+        self.notifySearchHighlightsChanged()
+        return matches
+
+    def notifySearchHighlightsChanged(self):
+        """ Emit dataChanged for the search highlight roles of all cells.
+        """
+        if (len(self.objects) == 0) or (len(self.properties) == 0):
+            return
+        self.notifyDataChangedRanges([(0, len(self.objects) - 1)], [(0, len(self.properties) - 1)],
+                                     [Qt.BackgroundRole, SEARCH_HIGHLIGHT_ROLE])
+
+    def invalidate(self, objects=None, properties=None):
+        """ Drop cached values for objects and/or properties (all if None).
+        properties may be property dicts, property indices or 'attr' paths.
+        This also drops the values of 'async' properties, so they are evaluated again.
+        """
+        if (self.valueCache is None) and (self.asyncLoader is None):
+            return
+        attrs = None
+        if properties is not None:
+            attrs = []
+            for prop in properties:
+                if isinstance(prop, int):
+                    prop = self.properties[prop]
+                if isinstance(prop, dict):
+                    prop = prop.get('attr', None)
+                if prop is not None:
+                    attrs.append(prop)
+        if self.valueCache is not None:
+            self.valueCache.invalidate(objects, attrs)
+        if self.asyncLoader is not None:
+            self.asyncLoader.invalidate(objects, attrs)
 
     def getObject(self, index):
         if not index.isValid():
@@ -133,91 +594,291 @@ class ObjectListTableModelQt(QAbstractTableModel):
     def columnCount(self, parent=None, *args, **kwargs):
         return len(self.properties) if self.isRowObjects else len(self.objects)
 
+    def getValue(self, objectIndex, propertyIndex):
+        """ Return the value of the property at propertyIndex for the object at objectIndex.
+        Raises one of AttrPath.MISSING_ERRORS if the property's 'attr' path does not exist for the object,
+        and whatever the property's getter raises. See getValueOrMissing().
+        """
+        obj = self.objects[objectIndex]
+        spec = self.columnSpecs()[propertyIndex]
+        if spec.attrPath is None:
+            raise KeyError('attr')
+        if self.valueCache is not None:
+            return self.valueCache.get(obj, spec.attr, spec.attrPath.getter)
+        return spec.attrPath.getter(obj)
+
+    def getValues(self, propertyIndex, start=0, stop=None):
+        """ Return the list of values of the property at propertyIndex for the objects in [start, stop).
+        Objects for which the property's 'attr' path does not exist give missingValue.
+        """
+        if stop is None:
+            stop = len(self.objects)
+        return [self.getValueOrMissing(objectIndex, propertyIndex) for objectIndex in range(start, stop)]
+
+    def getValueOrMissing(self, objectIndex, propertyIndex):
+        """ Return getValue(), or missingValue if it raises (as data() shows the cell).
+        Getters that raise for a path that does exist are logged once per property and exception type.
+        """
+        try:
+            return self.getValue(objectIndex, propertyIndex)
+        except Exception as error:
+            if not (isinstance(error, MISSING_ERRORS) and self.isMissing(objectIndex, propertyIndex)):
+                self.logGetterError(propertyIndex, error)
+            return self.missingValue
+
+    def isMissing(self, objectIndex, propertyIndex):
+        """ True if the property's 'attr' path does not exist for the object at objectIndex.
+        """
+        spec = self.columnSpecs()[propertyIndex]
+        return (spec.attrPath is None) or spec.attrPath.isMissing(self.objects[objectIndex])
+
+    def logGetterError(self, propertyIndex, error):
+        spec = self.columnSpecs()[propertyIndex]
+        key = (spec.attr, type(error))
+        if key not in self._loggedGetterErrors:
+            self._loggedGetterErrors.add(key)
+            logger.warning("Getter of %s raised %s: %s", spec.attr, type(error).__name__, error)
+
+    def setValue(self, objectIndex, propertyIndex, value):
+        """ Set the value of the property at propertyIndex for the object at objectIndex.
+        """
+        obj = self.objects[objectIndex]
+        spec = self.columnSpecs()[propertyIndex]
+        spec.attrPath.set(obj, value)
+        self.invalidate([obj], [spec.prop])
+
+    def callMethod(self, objectIndex, propertyIndex):
+        """ Call the method named by the property's 'attr' for the object at objectIndex (e.g. for button actions).
+        """
+        obj = self.objects[objectIndex]
+        result = self.columnSpecs()[propertyIndex].attrPath.getter(obj)()  # Call obj.attr()
+        self.invalidate([obj])  # The method may have changed any of the object's attributes.
+        return result
+
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return None
-        obj = self.getObject(index)
-        prop = self.getProperty(index)
-        if (obj is None) or (prop is None):
+        if self.isRowObjects:
+            objectIndex, propertyIndex = index.row(), index.column()
+        else:
+            objectIndex, propertyIndex = index.column(), index.row()
+        specs = self.columnSpecs()
+        if not ((0 <= objectIndex < len(self.objects)) and (0 <= propertyIndex < len(specs))):
             return None
-        try:
-            if role in [Qt.DisplayRole, Qt.EditRole]:
-                return getAttrRecursive(obj, prop['attr'])
-        except:
+        handler = specs[propertyIndex].roleHandlers.get(role, None)
+        return None if handler is None else handler(objectIndex, propertyIndex, role)
+
+    def valueData(self, objectIndex, propertyIndex, role):
+        """ data() handler for the display and edit roles.
+        """
+        return self.getValueOrMissing(objectIndex, propertyIndex)
+
+    def asyncValueData(self, objectIndex, propertyIndex, role):
+        """ data() handler for the display and edit roles of 'async' properties.
+        """
+        if self.asyncLoader is None:
+            from ObjectListAsyncLoaderQt import ObjectListAsyncLoaderQt
+            self.asyncLoader = ObjectListAsyncLoaderQt(self, parent=self)
+        return self.asyncLoader.value(objectIndex, propertyIndex)
+
+    def loadStatusData(self, objectIndex, propertyIndex, role):
+        """ data() handler for the LOAD_STATUS_ROLE and LOAD_PROGRESS_ROLE roles of "fileDialog" properties.
+        """
+        if self.fileLoader is None:
             return None
-        return None
+        status, progress = self.fileLoader.status(objectIndex, propertyIndex)
+        return status if role == LOAD_STATUS_ROLE else progress
+
+    def buttonBusyData(self, objectIndex, propertyIndex, role):
+        """ data() handler for the BUTTON_BUSY_ROLE role of "button" properties.
+        """
+        if self.actionRunner is None:
+            return False
+        return self.actionRunner.isBusy(objectIndex, propertyIndex)
+
+    def getActionRunner(self):
+        """ Return the ObjectListActionRunnerQt for 'runIn' button properties (created on first use).
+        """
+        if self.actionRunner is None:
+            from ObjectListActionRunnerQt import ObjectListActionRunnerQt
+            self.actionRunner = ObjectListActionRunnerQt(self, parent=self)
+        return self.actionRunner
+
+    def getFileLoader(self):
+        """ Return the ObjectListFileLoaderQt for 'backgroundLoad' properties (created on first use).
+        """
+        if self.fileLoader is None:
+            from ObjectListFileLoaderQt import ObjectListFileLoaderQt
+            self.fileLoader = ObjectListFileLoaderQt(self, parent=self)
+        return self.fileLoader
+
+    def searchHighlightData(self, objectIndex, propertyIndex, role):
+        """ data() handler for the background and SEARCH_HIGHLIGHT_ROLE roles.
+        """
+        if self.searchIndex is None:
+            return None
+        spans = self.searchIndex.highlights(objectIndex, propertyIndex)
+        if role == SEARCH_HIGHLIGHT_ROLE:
+            return spans
+        return self.searchHighlightBrush if spans else None
 
     def setData(self, index, value, role=Qt.EditRole):
         if not index.isValid():
             return False
-        obj = self.getObject(index)
-        prop = self.getProperty(index)
-        if (obj is None) or (prop is None):
-            return None
+        if self.isRowObjects:
+            objectIndex, propertyIndex = index.row(), index.column()
+        else:
+            objectIndex, propertyIndex = index.column(), index.row()
+        if not ((0 <= objectIndex < len(self.objects)) and (0 <= propertyIndex < len(self.columnSpecs()))):
+            return False
         try:
-            action = prop.get('action', None)
-            if action is not None:
-                if action == "button":
-                    getAttrRecursive(obj, prop['attr'])()  # Call obj.attr()
-                    return True
-                elif action == "fileDialog":
-                    pass  # File loading handled via @property.setter obj.attr below. Otherwise just sets the file name text.
-            if role == Qt.EditRole:
-                if type(value) == QVariant:
-                    value = value.toPyObject()
-                if (QT_VERSION_STR[0] == '4') and (type(value) == QString):
-                    value = str(value)
-                setAttrRecursive(obj, prop['attr'], value)
-                return True
+            if self.profiler is not None:
+                return self.profiler.call("setData", propertyIndex, role, self.setDataAt, objectIndex, propertyIndex, value, role)
+            return self.setDataAt(objectIndex, propertyIndex, value, role)
         except:
             return False
+
+    def setDataAt(self, objectIndex, propertyIndex, value, role=Qt.EditRole):
+        """ setData() for the property at propertyIndex of the object at objectIndex (raises on failure).
+        """
+        specs = self.columnSpecs()
+        if specs[propertyIndex].runIn is not None:
+            self.getActionRunner().run(objectIndex, propertyIndex)  # Cells are refreshed when it finishes.
+            return True
+        if specs[propertyIndex].isButton:
+            self.callMethod(objectIndex, propertyIndex)
+            # The method may have changed any of the object's attributes.
+            self.notifyDataChangedRanges([(objectIndex, objectIndex)], [(0, len(specs) - 1)])
+            return True
+        # For "fileDialog" actions, file loading is handled via the @property.setter obj.attr below.
+        # Otherwise this just sets the file name text.
+        if role == Qt.EditRole:
+            if type(value) == QVariant:
+                value = value.toPyObject()
+            if (QT_VERSION_STR[0] == '4') and (type(value) == QString):
+                value = str(value)
+            if specs[propertyIndex].isBackgroundLoad:
+                self.getFileLoader().load(objectIndex, propertyIndex, value)
+                return True
+            if self.isRecordingUndo():
+                oldValue = self.valueData(objectIndex, propertyIndex, role)
+            self.setValue(objectIndex, propertyIndex, value)
+            if self.isRecordingUndo():
+                from ObjectListUndoQt import SetValuesDelta
+                change = [self.objects[objectIndex], propertyIndex, oldValue, value]
+                self.undoRecorder.record(SetValuesDelta([change]), "Edit %s" % (specs[propertyIndex].header or specs[propertyIndex].attr))
+            self.notifyDataChangedRanges([(objectIndex, objectIndex)], [(propertyIndex, propertyIndex)])
+            return True
         return False
 
     def flags(self, index):
-        flags = QAbstractTableModel.flags(self, index)
-        if not index.isValid():
-            return flags
-        prop = self.getProperty(index)
-        if prop is None:
-            return flags
-        flags |= Qt.ItemIsEnabled
-        flags |= Qt.ItemIsSelectable
-        mode = prop.get('mode', "Read/Write")
-        if "Write" in mode:
-            flags |= Qt.ItemIsEditable
-        return flags
+        if index.isValid():
+            propertyIndex = index.column() if self.isRowObjects else index.row()
+            specs = self.columnSpecs()
+            if 0 <= propertyIndex < len(specs):
+                return specs[propertyIndex].flags
+        return QAbstractTableModel.flags(self, index)
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role != Qt.DisplayRole:
             return None
         if ((orientation == Qt.Horizontal) and self.isRowObjects) or ((orientation == Qt.Vertical) and not self.isRowObjects):
             # Display property headers.
-            try:
-                return self.properties[section]['header']  # Property header.
-            except (IndexError, KeyError):
-                return None
+            specs = self.columnSpecs()
+            return specs[section].header if (0 <= section < len(specs)) else None
         else:
             # Display object indices (1-based).
             return (section + 1) if (0 <= section < len(self.objects)) else None
 
-    def insertObjects(self, i, num=1):
-        if ((len(self.objects) == 0) and (self.templateObject is None)) or (num <= 0):
-            return False
-        i = min([max([0, i]), len(self.objects)])  # Clamp i to within [0, # of objects].
+    def beginInsertObjects(self, first, last):
+        """ beginInsertRows() or beginInsertColumns() depending on the object orientation.
+        """
+        if self._deferStructureSignals():
+            return
         if self.isRowObjects:
-            self.beginInsertRows(QModelIndex(), i, i + num - 1)
+            self.beginInsertRows(QModelIndex(), first, last)
         else:
-            self.beginInsertColumns(QModelIndex(), i, i + num - 1)
-        for objectIndex in range(i, i + num):
-            if self.templateObject is not None:
-                self.objects.insert(objectIndex, copy.deepcopy(self.templateObject))
-            elif len(self.objects):
-                copyIndex = min([max([0, objectIndex]), len(self.objects) - 1])  # Clamp objectIndex to a valid object index.
-                self.objects.insert(objectIndex, copy.deepcopy(self.objects[copyIndex]))
+            self.beginInsertColumns(QModelIndex(), first, last)
+
+    def endInsertObjects(self):
+        if self._batchDepth:
+            return
         if self.isRowObjects:
             self.endInsertRows()
         else:
             self.endInsertColumns()
+
+    def beginRemoveObjects(self, first, last):
+        """ beginRemoveRows() or beginRemoveColumns() depending on the object orientation.
+        """
+        if self._deferStructureSignals():
+            return
+        if self.isRowObjects:
+            self.beginRemoveRows(QModelIndex(), first, last)
+        else:
+            self.beginRemoveColumns(QModelIndex(), first, last)
+
+    def endRemoveObjects(self):
+        if self._batchDepth:
+            return
+        if self.isRowObjects:
+            self.endRemoveRows()
+        else:
+            self.endRemoveColumns()
+
+    def beginResetObjects(self):
+        """ beginResetModel(), or part of the batch's single layout change or reset within batchUpdate().
+        """
+        if self._deferStructureSignals():
+            return
+        self.beginResetModel()
+
+    def endResetObjects(self):
+        if self._batchDepth:
+            return
+        self.endResetModel()
+
+    def newObjects(self, i, num, factory=None):
+        """ Return a list of num new objects for insertion at index i.
+        New objects are created by calling factory() (or self.objectFactory()) if given, otherwise they are deep copies
+        of the templateObject or of the neighbouring object at index i.
+        """
+        if factory is None:
+            factory = self.objectFactory
+        if factory is not None:
+            return [factory() for _ in range(num)]
+        if self.templateObject is not None:
+            template = self.templateObject
+        elif len(self.objects):
+            template = self.objects[min([max([0, i]), len(self.objects) - 1])]  # Clamp i to a valid object index.
+        else:
+            return []
+        return [copy.deepcopy(template) for _ in range(num)]
+
+    def insertObjects(self, i, num=1, factory=None):
+        """ Insert objects before index i with a single begin/end insert signal pair.
+
+        :param num: Either the number of new objects to create (see newObjects()),
+            or an iterable of ready-made objects to insert.
+        :param factory (callable): Optional factory() used to create new objects instead of deep copying a template.
+        """
+        if isinstance(num, int):
+            if num <= 0:
+                return False
+            objects = self.newObjects(i, num, factory)
+        else:
+            objects = list(num)
+        if len(objects) == 0:
+            return False
+        num = len(objects)
+        i = min([max([0, i]), len(self.objects)])  # Clamp i to within [0, # of objects].
+        self.beginInsertObjects(i, i + num - 1)
+        self.objects[i:i] = objects  # Single splice, O(n + num).
+        self.invalidate(objects)
+        self.endInsertObjects()
+        if self.isRecordingUndo():
+            from ObjectListUndoQt import InsertObjectsDelta
+            self.undoRecorder.record(InsertObjectsDelta(i, objects), "Insert %d objects" % num)
         return True
 
     def removeObjects(self, i, num=1):
@@ -226,52 +887,449 @@ class ObjectListTableModelQt(QAbstractTableModel):
         i = min([max([0, i]), len(self.objects) - 1])  # Clamp i to a valid object index.
         num = min([num, len(self.objects) - i])  # Clamp num to a valid number of objects.
         if num == len(self.objects):
-            # Make sure we have a template for inserting objects later.
-            if self.templateObject is None:
-                self.templateObject = self.objects[0]
-        if self.isRowObjects:
-            self.beginRemoveRows(QModelIndex(), i, i + num - 1)
-            del self.objects[i:i+num]
-            self.endRemoveRows()
+            self.rememberTemplateObject()  # Make sure we have a template for inserting objects later.
+        if self.valueCache is not None:
+            self.invalidate(self.objects[i:i+num])
+        if self.isRecordingUndo():
+            from ObjectListUndoQt import RemoveObjectsDelta
+            self.undoRecorder.record(RemoveObjectsDelta([(i, self.objects[i:i+num])]), "Remove %d objects" % num)
+        self.beginRemoveObjects(i, i + num - 1)
+        self.deleteObjectRange(i, i + num)
+        self.endRemoveObjects()
+        return True
+
+    def removeObjectsAt(self, indices):
+        """ Remove the objects at indices (in any order).
+
+        Indices are grouped into contiguous ranges, and one remove signal is emitted per range.
+        If there are more than maxRemoveRangeSignals ranges, the list is instead rebuilt in a single pass
+        within a single layout change, so that removing many scattered objects stays linear in the list size.
+        Either way, views keep their selection, current index and scroll position on the remaining objects.
+        """
+        n = len(self.objects)
+        ranges = indexRanges(i for i in indices if 0 <= i < n)
+        if not ranges:
+            return False
+        numRemoved = sum(last - first + 1 for first, last in ranges)
+        if numRemoved == n:
+            self.rememberTemplateObject()  # Make sure we have a template for inserting objects later.
+        if self.valueCache is not None:
+            self.invalidate([self.objects[i] for first, last in ranges for i in range(first, last + 1)])
+        if self.isRecordingUndo():
+            from ObjectListUndoQt import RemoveObjectsDelta
+            blocks = [(first, self.objects[first:last + 1]) for first, last in ranges]
+            self.undoRecorder.record(RemoveObjectsDelta(blocks), "Remove %d objects" % numRemoved)
+        if len(ranges) <= self.maxRemoveRangeSignals:
+            for first, last in reversed(ranges):  # Back to front so that earlier ranges are not shifted.
+                self.beginRemoveObjects(first, last)
+                self.deleteObjectRange(first, last + 1)
+                self.endRemoveObjects()
         else:
-            self.beginRemoveColumns(QModelIndex(), i, i + num - 1)
-            del self.objects[i:i+num]
-            self.endRemoveColumns()
+            self.removeObjectRanges(ranges)
         return True
 
+    def removeObjectRanges(self, ranges):
+        """ Remove the objects in a sorted list of (first, last) ranges in a single pass,
+        with layoutAboutToBeChanged()/layoutChanged() and remapped persistent indexes.
+        Persistent indexes of the remaining objects follow them, those of removed objects become invalid.
+        """
+        if self._deferStructureSignals():
+            self.deleteObjectRanges(ranges)
+            return
+        self.layoutAboutToBeChanged.emit()
+        firsts = [first for first, last in ranges]
+        numRemovedThrough = list(itertools.accumulate(last - first + 1 for first, last in ranges))
+        oldPersistentIndexes = self.persistentIndexList()
+        newPersistentIndexes = []
+        for index in oldPersistentIndexes:
+            objectIndex = index.row() if self.isRowObjects else index.column()
+            k = bisect.bisect_right(firsts, objectIndex) - 1  # Last range starting at or before objectIndex.
+            if (k >= 0) and (objectIndex <= ranges[k][1]):
+                newPersistentIndexes.append(QModelIndex())
+                continue
+            newObjectIndex = objectIndex - (numRemovedThrough[k] if k >= 0 else 0)
+            if self.isRowObjects:
+                newPersistentIndexes.append(self.index(newObjectIndex, index.column()))
+            else:
+                newPersistentIndexes.append(self.index(index.row(), newObjectIndex))
+        self.deleteObjectRanges(ranges)
+        self.changePersistentIndexList(oldPersistentIndexes, newPersistentIndexes)
+        self.layoutChanged.emit()
+
+    def rememberTemplateObject(self):
+        """ Keep the first object as the templateObject (if there is none) before all objects are removed.
+        """
+        if (self.templateObject is None) and len(self.objects):
+            self.templateObject = self.objects[0]
+
+    def deleteObjectRange(self, start, stop):
+        """ Delete objects[start:stop] from the storage. Does NOT emit any signals.
+        """
+        del self.objects[start:stop]
+
+    def deleteObjectRanges(self, ranges):
+        """ Delete objects in a sorted list of (first, last) ranges from the storage in a single pass.
+        Does NOT emit any signals.
+        """
+        kept = []
+        start = 0
+        for first, last in ranges:
+            kept.extend(self.objects[start:first])
+            start = last + 1
+        kept.extend(self.objects[start:])
+        self.objects[:] = kept  # In place, so that references to the list stay valid.
+
     def moveObjects(self, indices, moveToIndex):
-        if len(self.objects) <= 1:
+        """ Move the objects at indices so that they are consecutive starting at moveToIndex
+        in the reordered list (i.e. moveToIndex is an index into the list with the moved objects taken out).
+
+        A contiguous block of objects is moved with beginMoveRows()/beginMoveColumns(), any other selection with
+        layoutAboutToBeChanged()/layoutChanged() and remapped persistent indexes. In both cases views keep their
+        selection, scroll position and cached section sizes, and the list is reordered in a single pass.
+        """
+        n = len(self.objects)
+        if n <= 1:
             return False
         try:
-            if type(indices) is not list:
-                indices = list(indices)
-            for i, idx in enumerate(indices):
-                indices[i] = min([max([0, idx]), len(self.objects) - 1])  # Clamp indices to valid object indices.
-            moveToIndex = min([max([0, moveToIndex]), len(self.objects) - 1])  # Clamp moveToIndex to a valid object index.
-            self.beginResetModel()
-            objectsToMove = []
-            for i in indices:
-                objectsToMove.append(self.objects[i])
-            for i in reversed(indices):
-                del self.objects[i]
-            for i, obj in enumerate(objectsToMove):
-                j = moveToIndex + i
-                j = min([max([0, j]), len(self.objects)])  # Clamp j to within [0, # of objects].
-                self.objects.insert(j, obj)
-            self.endResetModel()
-            return True
+            clamped = []
+            for idx in indices:
+                idx = min([max([0, idx]), n - 1])  # Clamp indices to valid object indices.
+                if idx not in clamped:
+                    clamped.append(idx)
+            indices = clamped
+            moveToIndex = min([max([0, moveToIndex]), n - 1])  # Clamp moveToIndex to a valid object index.
         except:
             return False
+        if not indices:
+            return False
+        moved = set(indices)
+        remaining = [k for k in range(n) if k not in moved]
+        j = min([moveToIndex, len(remaining)])
+        order = remaining[:j] + indices + remaining[j:]  # New list is [old list[k] for k in order].
+        if order == list(range(n)):
+            return True  # Nothing to move.
+        if self.valueCache is not None:
+            self.invalidate([self.objects[k] for k in indices])
+        first, last = indices[0], indices[-1]
+        if indices == list(range(first, last + 1)):
+            # Contiguous block. Qt's destination is the index in the old list before which the block is inserted.
+            destination = j if j <= first else j + len(indices)
+            self.beginMoveObjects(first, last, destination)
+            self.reorderObjects(order)
+            self.endMoveObjects()
+        else:
+            self.permuteObjects(order)
+        if self.isRecordingUndo():
+            from ObjectListUndoQt import MoveObjectsDelta
+            self.undoRecorder.record(MoveObjectsDelta(indices, moveToIndex, n), "Move %d objects" % len(indices))
+        return True
+
+    def permuteObjects(self, order):
+        """ Reorder the objects so that the new objects[k] is the old objects[order[k]],
+        with layoutAboutToBeChanged()/layoutChanged() and remapped persistent indexes.
+        """
+        if self._deferStructureSignals():
+            self.reorderObjects(order)
+            return
+        self.layoutAboutToBeChanged.emit()
+        newIndexOf = [0] * len(order)
+        for newIndex, oldIndex in enumerate(order):
+            newIndexOf[oldIndex] = newIndex
+        oldPersistentIndexes = self.persistentIndexList()
+        newPersistentIndexes = []
+        for index in oldPersistentIndexes:
+            if self.isRowObjects:
+                newPersistentIndexes.append(self.index(newIndexOf[index.row()], index.column()))
+            else:
+                newPersistentIndexes.append(self.index(index.row(), newIndexOf[index.column()]))
+        self.reorderObjects(order)
+        self.changePersistentIndexList(oldPersistentIndexes, newPersistentIndexes)
+        self.layoutChanged.emit()
+
+    def beginMoveObjects(self, first, last, destination):
+        """ beginMoveRows() or beginMoveColumns() depending on the object orientation.
+        """
+        if self._deferStructureSignals():
+            return True
+        if self.isRowObjects:
+            return self.beginMoveRows(QModelIndex(), first, last, QModelIndex(), destination)
+        else:
+            return self.beginMoveColumns(QModelIndex(), first, last, QModelIndex(), destination)
+
+    def endMoveObjects(self):
+        if self._batchDepth:
+            return
+        if self.isRowObjects:
+            self.endMoveRows()
+        else:
+            self.endMoveColumns()
+
+    def reorderObjects(self, order):
+        """ Reorder the storage so that the new objects[k] is the old objects[order[k]]. Does NOT emit any signals.
+        """
+        self.objects[:] = [self.objects[k] for k in order]  # In place, so that references to the list stay valid.
 
     def clearObjects(self):
+        self._objectSource = None  # Discard any objects that have not been fetched yet.
+        self._objectSourceNext = []
         if len(self.objects):
-            if self.templateObject is None:
-                self.templateObject = self.objects[0]
-            self.beginResetModel()
-            del self.objects[:]
+            self.rememberTemplateObject()
+            if self.isRecordingUndo():
+                from ObjectListUndoQt import RemoveObjectsDelta
+                self.undoRecorder.record(RemoveObjectsDelta([(0, list(self.objects))]), "Clear objects")
+            self.beginResetObjects()
+            self.deleteObjectRange(0, len(self.objects))
+            if self.valueCache is not None:
+                self.valueCache.clear()
+            self.endResetObjects()
+
+    def setPropertyValues(self, propertyIndex, values, objectIndices=None, perObject=False):
+        """ Set the property at propertyIndex for many objects at once, with one dataChanged signal per contiguous range.
+
+        :param values: The value to set for every object in objectIndices (even if it is a list),
+            or a sequence with one value per object if perObject is True.
+        :param objectIndices: Indices of the objects to set (all objects if None).
+        :param perObject (bool): If True, values holds one value per object.
+        :return (bool): True if the value was set for every object.
+
+        For "fileDialog" properties whose 'attr' is a method, the method is called with the value instead.
+        For 'backgroundLoad' properties, loads are queued and this returns True right away.
+        """
+        prop = self.properties[propertyIndex]
+        objectIndices = range(len(self.objects)) if objectIndices is None else list(objectIndices)
+        if perObject and (len(values) != len(objectIndices)):
+            raise ValueError("ObjectListTableModelQt.setPropertyValues: Need one value per object.")
+        if self.columnSpecs()[propertyIndex].isBackgroundLoad:
+            for k, objectIndex in enumerate(objectIndices):
+                self.getFileLoader().load(objectIndex, propertyIndex, values[k] if perObject else values)
+            return True
+        attrPath = compileAttrPath(prop['attr'])
+        isFileDialog = (prop.get('action', '') == "fileDialog")
+        changedObjectIndices = []
+        changes = [] if self.isRecordingUndo() else None  # For undo: [[obj, propertyIndex, oldValue, newValue], ...]
+        for k, objectIndex in enumerate(objectIndices):
+            obj = self.objects[objectIndex]
+            value = values[k] if perObject else values
+            try:
+                if isFileDialog:
+                    member = attrPath.get(obj, None)
+                    if callable(member):
+                        member(value)  # e.g. obj.loadFile(value)
+                        changedObjectIndices.append(objectIndex)
+                        continue
+                if changes is not None:
+                    oldValue = attrPath.get(obj, self.missingValue)
+                attrPath.set(obj, value)
+                changedObjectIndices.append(objectIndex)
+                if changes is not None:
+                    changes.append([obj, propertyIndex, oldValue, value])
+            except:
+                pass  # Same as setData(), objects that won't take the value are left unchanged.
+        if self.valueCache is not None:
+            self.invalidate([self.objects[i] for i in changedObjectIndices], [prop])
+        self.notifyDataChanged(changedObjectIndices, [propertyIndex])
+        if changes:
+            from ObjectListUndoQt import SetValuesDelta
+            self.undoRecorder.record(SetValuesDelta(changes), "Set %s" % (prop.get('header', None) or prop['attr']))
+        return len(changedObjectIndices) == len(objectIndices)
+
+    def runButtonAction(self, propertyIndex, objectIndices=None):
+        """ Call the "button" property's method for the objects at objectIndices (all objects if None).
+        With 'runIn' "thread" or "process" the calls are spread across the pool's workers,
+        otherwise they run in turn and their changes are emitted as one batch.
+        """
+        if objectIndices is None:
+            objectIndices = range(len(self.objects))
+        spec = self.columnSpecs()[propertyIndex]
+        if spec.runIn is not None:
+            self.getActionRunner().runForObjects(objectIndices, propertyIndex)
+            return
+        with self.batchUpdate():
+            for objectIndex in objectIndices:
+                self.callMethod(objectIndex, propertyIndex)
+                self.notifyDataChangedRanges([(objectIndex, objectIndex)], [(0, len(self.properties) - 1)])
+
+    def notifyDataChanged(self, objectIndices, propertyIndices):
+        """ Emit dataChanged for the given objects and properties, one signal per rectangle of contiguous indices.
+        """
+        self.notifyDataChangedRanges(indexRanges(objectIndices), indexRanges(propertyIndices))
+
+    def notifyDataChangedRanges(self, objectRanges, propertyRanges, roles=None):
+        """ Emit dataChanged for each pair of (first, last) object and property ranges.
+        Within batchUpdate() the ranges are collected and merged with the batch's other changes instead.
+
+        :param roles: Changed data roles (None for all roles). Ignored for Qt4, whose dataChanged has no roles.
+        """
+        if self._batchDepth:
+            if self._batchMode is None:
+                key = tuple(roles) if roles else None
+                self._batchRectangles.setdefault(key, []).append((list(objectRanges), list(propertyRanges)))
+            elif changesValues(roles):  # Views refresh all cells on the batch's layout change or reset.
+                self._batchValuesChanged = True
+            return
+        roles = list(roles) if (roles and QT_VERSION_STR[0] != '4') else None
+        for firstObject, lastObject in objectRanges:
+            for firstProperty, lastProperty in propertyRanges:
+                if self.isRowObjects:
+                    topLeft, bottomRight = self.index(firstObject, firstProperty), self.index(lastObject, lastProperty)
+                else:
+                    topLeft, bottomRight = self.index(firstProperty, firstObject), self.index(lastProperty, lastObject)
+                if roles:
+                    self.dataChanged.emit(topLeft, bottomRight, roles)
+                else:
+                    self.dataChanged.emit(topLeft, bottomRight)
+
+    def notifyObjectsChanged(self, changed, roles=None):
+        """ Emit dataChanged for the cells of [(obj, propertyIndex), ...], skipping objects that are no longer in the
+        model. Cells are grouped into the fewest contiguous ranges per property.
+        """
+        objectIndices = self.objectIndexMap()
+        changedObjectIndices = {}  # {propertyIndex: [objectIndex, ...]}
+        for obj, propertyIndex in changed:
+            objectIndex = objectIndices.get(id(obj), None)
+            if objectIndex is not None:
+                changedObjectIndices.setdefault(propertyIndex, []).append(objectIndex)
+        # Properties with the same changed objects share dataChanged rectangles.
+        propertiesByObjectRanges = {}
+        for propertyIndex, indices in changedObjectIndices.items():
+            propertiesByObjectRanges.setdefault(tuple(indexRanges(indices)), []).append(propertyIndex)
+        for objectRanges, propertyIndices in propertiesByObjectRanges.items():
+            self.notifyDataChangedRanges(list(objectRanges), indexRanges(propertyIndices), roles)
+
+    def objectIndexMap(self):
+        """ Return {id(obj): objectIndex} for the objects in the model. Do NOT modify the returned dict.
+        Cached until the model signals that objects were inserted, removed or reordered.
+        """
+        if self._objectIndices is not None:
+            return self._objectIndices
+        objectIndices = dict((id(obj), objectIndex) for objectIndex, obj in enumerate(self.objects))
+        if self._batchMode is None:  # Within a batch, the structure may change without signals until it ends.
+            self._objectIndices = objectIndices
+        return objectIndices
+
+    def _objectsChanged(self, *args):
+        self._objectIndices = None
+
+    @contextmanager
+    def batchUpdate(self):
+        """ Context manager that collects the model's change signals and emits them merged when the block ends:
+
+            with model.batchUpdate():
+                for row, value in enumerate(values):
+                    model.setData(model.index(row, 1), value)
+                model.insertObjects(0, 10)
+
+        Cell changes (setData(), setPropertyValues(), notifyDataChanged(), ...) are merged into the fewest
+        dataChanged rectangles, or their bounding rectangle if there would be more than maxBatchDataChangedRanges.
+        Insertions, removals and moves change the storage immediately, but are reported as a single layout change
+        that keeps persistent indexes (e.g. the selection) on their objects, or a single model reset if the model
+        does not have hasObjectIdentity. Batches may be nested, in which case signals are emitted when the outermost
+        batch ends. Do not process events within a batch, as views are not told about its changes until it ends.
+        """
+        if (self._batchDepth == 0) and (self.undoRecorder is not None):
+            self.undoRecorder.beginGroup()  # Undo the batch as a whole.
+        self._batchDepth += 1
+        try:
+            yield self
+        finally:
+            self._batchDepth -= 1
+            if self._batchDepth == 0:
+                self.flushBatch()
+                if self.undoRecorder is not None:
+                    self.undoRecorder.endGroup()
+
+    def _deferStructureSignals(self):
+        """ Within batchUpdate(), start the batch's layout change or reset (once) and return True,
+        in which case the caller changes the storage without emitting any signals. Otherwise return False.
+        """
+        if self._batchDepth == 0:
+            return False
+        if self._batchMode is None:
+            self._batchValuesChanged = any(changesValues(roles) for roles in self._batchRectangles)
+            self._batchRectangles = {}  # Views refresh all cells on the layout change or reset.
+            self._objectIndices = None
+            if self.hasObjectIdentity:
+                self.layoutAboutToBeChanged.emit()
+                self._batchPersistentIndexes = []
+                for index in self.persistentIndexList():
+                    objectIndex = index.row() if self.isRowObjects else index.column()
+                    self._batchPersistentIndexes.append((index, self.objects[objectIndex]))
+                self._batchMode = "layout"
+            else:
+                self.beginResetModel()
+                self._batchMode = "reset"
+        return True
+
+    def flushBatch(self):
+        """ Emit the merged signals for the changes collected by batchUpdate(). Called when the outermost batch ends.
+        """
+        mode, self._batchMode = self._batchMode, None
+        rectangles, self._batchRectangles = self._batchRectangles, {}
+        persistentIndexes, self._batchPersistentIndexes = self._batchPersistentIndexes, []
+        valuesChanged, self._batchValuesChanged = self._batchValuesChanged, False
+        if mode == "reset":
             self.endResetModel()
+        elif mode == "layout":
+            # Persistent indexes follow their objects. Those of removed objects become invalid.
+            newObjectIndices = dict((id(obj), objectIndex) for objectIndex, obj in enumerate(self.objects))
+            oldIndexes = []
+            newIndexes = []
+            for index, obj in persistentIndexes:
+                objectIndex = newObjectIndices.get(id(obj), None)
+                oldIndexes.append(index)
+                if objectIndex is None:
+                    newIndexes.append(QModelIndex())
+                elif self.isRowObjects:
+                    newIndexes.append(self.index(objectIndex, index.column()))
+                else:
+                    newIndexes.append(self.index(index.row(), objectIndex))
+            self.changePersistentIndexList(oldIndexes, newIndexes)
+            self.layoutChanged.emit()
+            if valuesChanged and len(self.objects) and len(self.properties):
+                # Listeners that keep values across layout changes (e.g. the search index) need to know about edits.
+                self.notifyDataChangedRanges([(0, len(self.objects) - 1)], [(0, len(self.properties) - 1)])
+        else:
+            for roles, roleRectangles in rectangles.items():
+                self.notifyMergedDataChanged(roleRectangles, roles)
+
+    def notifyMergedDataChanged(self, rectangles, roles=None):
+        """ Emit dataChanged (for roles, None for all roles) for the cells covered by
+        [(objectRanges, propertyRanges), ...] as the fewest rectangles, or as their bounding rectangle
+        if there would be more than maxBatchDataChangedRanges.
+        """
+        objectRangesByProperty = {}  # {propertyIndex: [(first, last), ...]}
+        for objectRanges, propertyRanges in rectangles:
+            for firstProperty, lastProperty in propertyRanges:
+                for propertyIndex in range(firstProperty, lastProperty + 1):
+                    objectRangesByProperty.setdefault(propertyIndex, []).extend(objectRanges)
+        # Properties with the same changed objects share dataChanged rectangles.
+        propertiesByObjectRanges = {}
+        for propertyIndex, objectRanges in objectRangesByProperty.items():
+            propertiesByObjectRanges.setdefault(tuple(mergeRanges(objectRanges)), []).append(propertyIndex)
+        merged = [(list(objectRanges), indexRanges(propertyIndices))
+                  for objectRanges, propertyIndices in propertiesByObjectRanges.items()]
+        if sum(len(objectRanges) * len(propertyRanges) for objectRanges, propertyRanges in merged) > self.maxBatchDataChangedRanges:
+            firstObject = min(objectRanges[0][0] for objectRanges, propertyRanges in merged)
+            lastObject = max(objectRanges[-1][1] for objectRanges, propertyRanges in merged)
+            firstProperty = min(objectRangesByProperty.keys())
+            lastProperty = max(objectRangesByProperty.keys())
+            merged = [([(firstObject, lastObject)], [(firstProperty, lastProperty)])]
+        for objectRanges, propertyRanges in merged:
+            self.notifyDataChangedRanges(objectRanges, propertyRanges, roles)
 
     def propertyType(self, propertyIndex):
+        """ Return the property's type: its 'dtype' if specified, otherwise resolved once from the templateObject or
+        the first object (see resolvePropertyType()). Returns None while the type cannot be resolved.
+        """
+        specs = self.columnSpecs()
+        if not (0 <= propertyIndex < len(specs)):
+            return None
+        spec = specs[propertyIndex]
+        if spec.dtype is None:
+            spec.dtype = self.resolvePropertyType(propertyIndex)
+        return spec.dtype
+
+    def resolvePropertyType(self, propertyIndex):
         try:
             prop = self.properties[propertyIndex]
             if 'dtype' in prop.keys():
@@ -292,6 +1350,9 @@ class ObjectListTableViewQt(QTableView):
     Right clicking in the view's row or column headers brings up a context menu for inserting/deleting/moving objects
     in the list (optional), or setting an attribute's value for all objects simultaneously.
 
+    For dynamic models, objects can also be reordered by dragging their row (or column) header.
+    Dragging the header of a selected object moves all selected objects. Moves go through the model's moveObjects().
+
     Delegates:
     bool: CheckBoxWithoutLabelDelegateQt() - centered check box (no label)
     float: FloatEditDelegateQt() - allows arbitrary precision and scientific notation
@@ -299,68 +1360,86 @@ class ObjectListTableViewQt(QTableView):
     combobox: ComboBoxDelegateQt([choice values or (key, value) tuples]) - list of choice values (or keys if they exist)
     buttons: PushButtonDelegateQt("button text") - clickable button, model's setData() handles the click
     files: FileDialogDelegateQt() - popup a file dialog, model's setData(pathToFileName) handles the rest
+    Delegates are looked up in DelegateRegistryQt.delegateRegistry (where other delegates can be registered), their
+    modules are imported on first use, and properties with the same delegate configuration share one instance.
+
+    Column sizing (see resizeColumns()):
+        QTableView.resizeColumnsToContents() measures every cell, which takes seconds for hundreds of thousands of
+        objects. Instead, setModel() sizes columns according to columnSizingMode:
+        "sample": Fit the first, last and a random columnSizingSampleSize rows (the default).
+        "visible": Fit the rows currently in the viewport.
+        "persisted": Restore the view's savedPropertySizes ({property header or attr: size}, see propertySizes()),
+            and sample any columns without a saved size. The sizes are the property columns' widths, or the property
+            rows' heights if the objects are columns (in which case all object columns are sampled).
+        "contents": Fit every row (QTableView.resizeColumnsToContents()).
+        None: Leave column widths alone.
+        If refitColumnsOnEdit is True, a column is widened whenever changed values no longer fit.
+
+    Copy/paste (see copySelection() and pasteClipboard()):
+        Ctrl+C copies the selected cells as tab separated text (unselected cells within the selection's rows and
+        columns are left empty). Ctrl+V pastes tab separated text (e.g. from a spreadsheet) starting at the top left
+        selected cell, or into every selected cell if it is a single value. Text is converted to each property's type
+        and validated before anything is set, and the whole paste is applied as one batchUpdate() (and undo step).
+
+    Profiling (see setProfilingEnabled()):
+        Times the delegates' paint() and displayText() per property along with the model's data() and setData().
+        Enabling it replaces the view's delegates with fresh, instrumented ones (see instrumentDelegates()).
     """
-    def __init__(self, model, parent=None):
+
+    # How setModel() sizes columns: "sample", "visible", "persisted", "contents" or None.
+    columnSizingMode = "sample"
+
+    # Number of rows sampled from each of the start, end and (randomly) the middle of the table when sizing columns.
+    columnSizingSampleSize = 50
+
+    # If True, widen columns when the model reports changed values that do not fit.
+    refitColumnsOnEdit = True
+
+    def __init__(self, model, parent=None, savedPropertySizes=None):
         QTableView.__init__(self, parent)
+        self._sizedModel = None  # Model whose dataChanged signal is connected to _refitChangedColumns().
+
+        # Property column widths (or row heights) {property header or attr: size} restored by the "persisted" column
+        # sizing mode.
+        self.savedPropertySizes = savedPropertySizes
+
+        # Custom delegates, shared by properties with the same delegate configuration (see DelegateRegistryQt).
+        self._delegateCache = DelegateCacheQt()
+        self._numDelegatedProperties = 0  # Number of property columns/rows assigned a delegate by setModel().
+        self._defaultDelegate = None  # Replaces Qt's default delegate when profiling.
 
-        # Custom delegates.
-        self._checkBoxDelegate = CheckBoxDelegateQt()
-        self._floatEditDelegate = FloatEditDelegateQt()
-        self._dateTimeEditDelegates = []  # Each of these can have different formats.
-        self._comboBoxDelegates = []  # Each of these can have different choices.
-        self._pushButtonDelegates = []  # Each of these can have different text.
-        self._fileDialogDelegate = FileDialogDelegateQt()
+        # Drag and drop object reordering via the object header.
+        self.horizontalHeader().sectionMoved.connect(self._objectHeaderSectionMoved)
+        self.verticalHeader().sectionMoved.connect(self._objectHeaderSectionMoved)
 
         # Set the model.
         self.setModel(model)
 
     def setModel(self, model):
-        if type(model) is not ObjectListTableModelQt:
-            raise RuntimeError("ObjectListTableViewQt.setModel: Model type MUST be ObjectListTableModelQt.")
+        objectModel = model.sourceModel() if isinstance(model, QAbstractProxyModel) else model
+        if not isinstance(objectModel, ObjectListTableModelQt):
+            raise RuntimeError("ObjectListTableViewQt.setModel: Model type MUST be ObjectListTableModelQt (or a proxy of one).")
 
         QTableView.setModel(self, model)
 
-        # Clear current delegate lists.
-        self._dateTimeEditDelegates = []  # Each of these can have different formats.
-        self._comboBoxDelegates = []  # Each of these can have different choices.
-        self._pushButtonDelegates = []  # Each of these can have different text.
+        # Widen columns when edited values no longer fit.
+        if self._sizedModel is not None:
+            try:
+                self._sizedModel.dataChanged.disconnect(self._refitChangedColumns)
+            except (TypeError, RuntimeError):
+                pass
+        model.dataChanged.connect(self._refitChangedColumns)
+        self._sizedModel = model
 
-        # Assign custom delegates.
-        for i, prop in enumerate(model.properties):
-            dtype = model.propertyType(i)
-            if 'choices' in prop.keys():
-                self._comboBoxDelegates.append(ComboBoxDelegateQt(prop['choices']))
-                if model.isRowObjects:
-                    self.setItemDelegateForColumn(i, self._comboBoxDelegates[-1])
-                else:
-                    self.setItemDelegateForRow(i, self._comboBoxDelegates[-1])
-            elif prop.get('action', "") == "fileDialog":
-                if model.isRowObjects:
-                    self.setItemDelegateForColumn(i, self._fileDialogDelegate)
-                else:
-                    self.setItemDelegateForRow(i, self._fileDialogDelegate)
-            elif prop.get('action', "") == "button":
-                self._pushButtonDelegates.append(PushButtonDelegateQt(prop.get('text', "")))
-                if model.isRowObjects:
-                    self.setItemDelegateForColumn(i, self._pushButtonDelegates[-1])
-                else:
-                    self.setItemDelegateForRow(i, self._pushButtonDelegates[-1])
-            elif dtype is bool:
-                if model.isRowObjects:
-                    self.setItemDelegateForColumn(i, self._checkBoxDelegate)
-                else:
-                    self.setItemDelegateForRow(i, self._checkBoxDelegate)
-            elif dtype is float:
-                if model.isRowObjects:
-                    self.setItemDelegateForColumn(i, self._floatEditDelegate)
-                else:
-                    self.setItemDelegateForRow(i, self._floatEditDelegate)
-            elif dtype is datetime:
-                self._dateTimeEditDelegates.append(DateTimeEditDelegateQt(prop.get('text', '%c')))
-                if model.isRowObjects:
-                    self.setItemDelegateForColumn(i, self._dateTimeEditDelegates[-1])
-                else:
-                    self.setItemDelegateForRow(i, self._dateTimeEditDelegates[-1])
+        # Properties and objects are those of the object model, also when viewed through a proxy.
+        isProxy = model is not objectModel
+        model = objectModel
+
+        # Assign custom delegates (timed if the model is being profiled).
+        if model.profiler is not None:
+            self.instrumentDelegates()
+        else:
+            self.assignDelegates()
 
         # Context menus for right click in header.
         # Objects header pops up insert/delete objects menu.
@@ -384,14 +1463,319 @@ class ObjectListTableViewQt(QTableView):
                 self.verticalHeader().setContextMenuPolicy(Qt.CustomContextMenu)
                 self.verticalHeader().customContextMenuRequested.connect(self.getPropertyHeaderContextMenu)
 
-        # Resize columns to fit content.
-        self.resizeColumnsToContents()
+        # Objects can be reordered by dragging their header (unless a proxy determines their order).
+        for header in [self.horizontalHeader(), self.verticalHeader()]:
+            isMovable = model.isDynamic and (not isProxy) and (header is self.objectHeader())
+            if hasattr(header, 'setSectionsMovable'):
+                header.setSectionsMovable(isMovable)  # Qt5
+            else:
+                header.setMovable(isMovable)  # Qt4
+
+        # Clicking a property header sorts by that property if the proxy supports it (starting out unsorted).
+        if isProxy:
+            self.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.setSortingEnabled(isProxy)
+
+        # Resize columns to fit (a bounded sample of) their content.
+        self.resizeColumns()
+
+    def setProfilingEnabled(self, enabled, slowCallThreshold=None):
+        """ Enable/disable profiling of the model (see ObjectListTableModelQt.setProfilingEnabled())
+        and of this view's delegates' paint() and displayText().
+        """
+        self.objectModel().setProfilingEnabled(enabled, slowCallThreshold)
+        if enabled:
+            self.instrumentDelegates()
+
+    def assignDelegates(self):
+        """ Assign each property's (shared) delegate, see DelegateRegistryQt.
+        Properties without a custom delegate get the default delegate, also those of the previous model.
+        """
+        model = self.objectModel()
+        delegates = [self._delegateCache.delegate(prop, model.propertyType(i)) for i, prop in enumerate(model.properties)]
+        delegates += [None] * (self._numDelegatedProperties - len(delegates))
+        for i, delegate in enumerate(delegates):
+            if model.isRowObjects:
+                self.setItemDelegateForColumn(i, delegate)
+                self.setItemDelegateForRow(i, None)
+            else:
+                self.setItemDelegateForRow(i, delegate)
+                self.setItemDelegateForColumn(i, None)
+        self._numDelegatedProperties = len(model.properties)
+        self._delegateCache.retain(delegates)
+
+    def instrumentDelegates(self):
+        """ Time this view's delegates with the model's profiler.
+
+        Once Qt has called a delegate, sip remembers which of its virtual methods have no Python reimplementation,
+        so timing methods assigned to that delegate afterwards would never be called. This therefore replaces
+        all of the view's delegates (including Qt's default delegate) with fresh, instrumented instances.
+        """
+        profiler = self.objectModel().profiler
+        previousCache, previousDefaultDelegate = self._delegateCache, self._defaultDelegate
+        self._delegateCache = DelegateCacheQt()
+        for delegate in self._delegateCache.delegatesFor(self.objectModel()):
+            profiler.instrumentDelegate(delegate)
+        self._defaultDelegate = QStyledItemDelegate(self)
+        profiler.instrumentDelegate(self._defaultDelegate)
+        self.setItemDelegate(self._defaultDelegate)
+        self.assignDelegates()
+        if previousDefaultDelegate is not None:
+            previousDefaultDelegate.deleteLater()
+        del previousCache  # Its delegates are no longer used by the view.
+
+    def resizeColumns(self, mode=None):
+        """ Size columns according to mode (defaults to columnSizingMode). See the class docstring for modes.
+        """
+        if mode is None:
+            mode = self.columnSizingMode
+        if not mode:
+            return
+        if mode == "contents":
+            self.resizeColumnsToContents()
+        elif mode == "visible":
+            self.resizeColumnsToRows(self.visibleRows())
+        elif mode == "persisted":
+            unsizedProperties = self.restorePropertySizes(self.savedPropertySizes)
+            if self.objectModel().isRowObjects:
+                self.resizeColumnsToRows(self.sampleRows(), unsizedProperties)
+            else:
+                self.resizeColumnsToRows(self.sampleRows())
+        else:
+            self.resizeColumnsToRows(self.sampleRows())
+
+    def sampleRows(self, first=0, last=None, sampleSize=None):
+        """ Return the first, last and a random sample of rows between first and last (inclusive).
+        """
+        if last is None:
+            last = self.model().rowCount() - 1
+        if sampleSize is None:
+            sampleSize = self.columnSizingSampleSize
+        if last - first + 1 <= 3 * sampleSize:
+            return list(range(first, last + 1))
+        middle = range(first + sampleSize, last + 1 - sampleSize)
+        rows = set(range(first, first + sampleSize))
+        rows.update(range(last + 1 - sampleSize, last + 1))
+        rows.update(random.sample(middle, sampleSize))
+        return sorted(rows)
+
+    def visibleRows(self):
+        """ Return the rows that are (at least partly) in the viewport.
+        """
+        numRows = self.model().rowCount()
+        if numRows == 0:
+            return []
+        first = max([0, self.rowAt(0)])
+        last = self.rowAt(self.viewport().height() - 1)
+        if last == -1:
+            last = numRows - 1
+        return list(range(first, last + 1))
+
+    def visibleObjectIndices(self):
+        """ Return the sorted object indices of the objects that are (at least partly) in the viewport.
+        """
+        if self.objectModel().isRowObjects:
+            return self.objectIndices(self.visibleRows())
+        numColumns = self.model().columnCount()
+        if numColumns == 0:
+            return []
+        first = max([0, self.columnAt(0)])
+        last = self.columnAt(self.viewport().width() - 1)
+        if last == -1:
+            last = numColumns - 1
+        return self.objectIndices(range(first, last + 1))
+
+    def scrollContentsBy(self, dx, dy):
+        QTableView.scrollContentsBy(self, dx, dy)
+        # Don't evaluate 'async' properties of objects that are no longer in view.
+        model = self.objectModel()
+        if model.asyncLoader is not None:
+            model.asyncLoader.cancelExcept([model.objects[i] for i in self.visibleObjectIndices()])
+
+    def resizeColumnsToRows(self, rows, columns=None):
+        """ Fit columns (default all) to their header and the content of the given rows only.
+        """
+        if columns is None:
+            columns = range(self.model().columnCount())
+        for column in columns:
+            self.setColumnWidth(column, self.columnWidthForRows(column, rows))
+
+    def columnWidthForRows(self, column, rows):
+        """ Return the width needed to fit the column's header and its content in the given rows.
+        """
+        model = self.model()
+        width = self.horizontalHeader().sectionSizeHint(column)
+        gridWidth = 1 if self.showGrid() else 0
+        for row in rows:
+            width = max([width, self.sizeHintForIndex(model.index(row, column)).width() + gridWidth])
+        return width
+
+    def propertySizes(self):
+        """ Return the current property column widths (or row heights if the objects are columns)
+        as {property header or attr: size}, e.g. for restoring them later via savedPropertySizes.
+        """
+        model = self.objectModel()
+        sizes = {}
+        for propertyIndex, prop in enumerate(model.properties):
+            key = prop['header'] if (prop.get('header', None) is not None) else prop.get('attr', None)
+            if key is not None:
+                sizes[key] = self.columnWidth(propertyIndex) if model.isRowObjects else self.rowHeight(propertyIndex)
+        return sizes
+
+    def restorePropertySizes(self, sizes):
+        """ Set the column width (or row height if the objects are columns) of each property whose header or attr
+        is in sizes {property header or attr: size}. Return the list of property indices that were not in sizes.
+        """
+        model = self.objectModel()
+        unsizedProperties = []
+        for propertyIndex, prop in enumerate(model.properties):
+            key = prop['header'] if (prop.get('header', None) is not None) else prop.get('attr', None)
+            if sizes and (key is not None) and (key in sizes):
+                if model.isRowObjects:
+                    self.setColumnWidth(propertyIndex, sizes[key])
+                else:
+                    self.setRowHeight(propertyIndex, sizes[key])
+            else:
+                unsizedProperties.append(propertyIndex)
+        return unsizedProperties
+
+    def _refitChangedColumns(self, topLeft, bottomRight, roles=None):
+        """ Widen the changed columns if a sample of the changed rows no longer fits.
+        """
+        if not self.refitColumnsOnEdit or not self.columnSizingMode or not topLeft.isValid() or not changesValues(roles):
+            return
+        rows = self.sampleRows(topLeft.row(), bottomRight.row())
+        for column in range(topLeft.column(), bottomRight.column() + 1):
+            width = self.columnWidthForRows(column, rows)
+            if width > self.columnWidth(column):
+                self.setColumnWidth(column, width)
+
+    def objectModel(self):
+        """ Return the ObjectListTableModelQt, which is either the view's model or the source model of its proxy model.
+        """
+        model = self.model()
+        return model.sourceModel() if isinstance(model, QAbstractProxyModel) else model
+
+    def objectIndices(self, viewIndices):
+        """ Convert row (or column) indices in the view to sorted object indices in the object model.
+        """
+        model = self.model()
+        if not isinstance(model, QAbstractProxyModel):
+            return list(viewIndices)
+        if self.objectModel().isRowObjects:
+            return sorted([model.mapToSource(model.index(i, 0)).row() for i in viewIndices])
+        return sorted([model.mapToSource(model.index(0, i)).column() for i in viewIndices])
+
+    def selectedObjectIndices(self):
+        """ Return the sorted object indices of the selected objects.
+        """
+        return self.objectIndices(self.selectedRows() if self.objectModel().isRowObjects else self.selectedColumns())
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copySelection()
+        elif event.matches(QKeySequence.Paste):
+            self.pasteClipboard()
+        else:
+            QTableView.keyPressEvent(self, event)
+
+    def sourceRowsAndColumns(self, rows, columns):
+        """ Convert view rows and columns to those of the object model (in the same order).
+        """
+        model = self.model()
+        if not isinstance(model, QAbstractProxyModel) or not (rows and columns):
+            return list(rows), list(columns)
+        sourceRows = [model.mapToSource(model.index(row, columns[0])).row() for row in rows]
+        sourceColumns = [model.mapToSource(model.index(rows[0], column)).column() for column in columns]
+        return sourceRows, sourceColumns
+
+    def copySelection(self):
+        """ Copy the selected cells to the clipboard as tab separated text. Returns the text.
+        """
+        from ObjectListTableIO import iterTsvChunks
+        indexes = self.selectionModel().selectedIndexes()
+        if not indexes:
+            return ""
+        rows = sorted(set(index.row() for index in indexes))
+        columns = sorted(set(index.column() for index in indexes))
+        selected = None
+        if len(indexes) != len(rows) * len(columns):
+            # Not a rectangle, so only fill in the selected cells.
+            rowPositions = dict((row, i) for i, row in enumerate(rows))
+            columnPositions = dict((column, j) for j, column in enumerate(columns))
+            selected = set((rowPositions[index.row()], columnPositions[index.column()]) for index in indexes)
+        sourceRows, sourceColumns = self.sourceRowsAndColumns(rows, columns)
+        text = "".join(iterTsvChunks(self.objectModel(), sourceRows, sourceColumns, selected))
+        QApplication.clipboard().setText(text)
+        return text
+
+    def pasteClipboard(self, text=None):
+        """ Paste tab separated text (default the clipboard's) starting at the top left selected cell,
+        or into every selected cell if the text is a single value. Returns the number of cells set.
+        If any value cannot be converted to its property's type, nothing is set and an error message is shown.
+        """
+        from ObjectListTableIO import parseTsv, pasteTsv
+        if text is None:
+            text = str(QApplication.clipboard().text())
+        rows = parseTsv(text)
+        if not rows:
+            return 0
+        indexes = self.selectionModel().selectedIndexes()
+        if not indexes and self.currentIndex().isValid():
+            indexes = [self.currentIndex()]
+        if not indexes:
+            return 0
+        selected = None
+        if (len(rows) == 1) and (len(rows[0]) == 1) and (len(indexes) > 1):
+            # Fill the selection with the single value.
+            viewRows = sorted(set(index.row() for index in indexes))
+            viewColumns = sorted(set(index.column() for index in indexes))
+            rowPositions = dict((row, i) for i, row in enumerate(viewRows))
+            columnPositions = dict((column, j) for j, column in enumerate(viewColumns))
+            selected = set((rowPositions[index.row()], columnPositions[index.column()]) for index in indexes)
+            rows = [rows[0] * len(viewColumns)] * len(viewRows)
+        else:
+            top = min(index.row() for index in indexes)
+            left = min(index.column() for index in indexes)
+            viewRows = list(range(top, min([top + len(rows), self.model().rowCount()])))
+            viewColumns = list(range(left, min([left + max(len(row) for row in rows), self.model().columnCount()])))
+        sourceRows, sourceColumns = self.sourceRowsAndColumns(viewRows, viewColumns)
+        try:
+            return pasteTsv(self.objectModel(), rows, sourceRows, sourceColumns, selected)
+        except ValueError as error:
+            errorDialog = QErrorMessage(self)
+            errorDialog.showMessage(str(error))
+            errorDialog.exec_()
+            return 0
+
+    def objectHeader(self):
+        """ Return the header whose sections are objects.
+        """
+        return self.verticalHeader() if self.objectModel().isRowObjects else self.horizontalHeader()
+
+    def _objectHeaderSectionMoved(self, logicalIndex, oldVisualIndex, newVisualIndex):
+        """ Turn an object header section drag into a model move.
+        The header's visual order is restored, as the model itself is reordered.
+        """
+        header = self.sender()
+        if (header is not self.objectHeader()) or (oldVisualIndex == newVisualIndex):
+            return
+        header.blockSignals(True)
+        header.moveSection(newVisualIndex, oldVisualIndex)
+        header.blockSignals(False)
+        selectedObjectIndices = self.selectedObjectIndices()
+        indices = selectedObjectIndices if oldVisualIndex in selectedObjectIndices else [oldVisualIndex]
+        # Insert before old index target (after it when dragging forward),
+        # converted to an index into the list with the moved objects taken out.
+        target = newVisualIndex + 1 if newVisualIndex > oldVisualIndex else newVisualIndex
+        moveToIndex = target - len([i for i in indices if i < target])
+        self.objectModel().moveObjects(indices, moveToIndex)
 
     def getObjectHeaderContextMenu(self, pos):
         menu = QMenu()
-        rowOrColumn = "Row" if self.model().isRowObjects else "Column"
-        aboveOrBefore = "Above" if self.model().isRowObjects else "Before"
-        belowOrAfter = "Below" if self.model().isRowObjects else "After"
+        rowOrColumn = "Row" if self.objectModel().isRowObjects else "Column"
+        aboveOrBefore = "Above" if self.objectModel().isRowObjects else "Before"
+        belowOrAfter = "Below" if self.objectModel().isRowObjects else "After"
         menu.addAction("Insert " + rowOrColumn + " " + aboveOrBefore + " Selected", self.insertObjectBeforeSelectedObjects)
         menu.addAction("Insert " + rowOrColumn + " " + belowOrAfter + " Selected", self.insertObjectAfterSelectedObjects)
         menu.addSeparator()
@@ -401,20 +1785,26 @@ class ObjectListTableViewQt(QTableView):
         menu.addAction("Move Selected " + rowOrColumn + "s", self.moveSelectedObjects)
         menu.addSeparator()
         menu.addAction("Delete Selected " + rowOrColumn + "s", self.removeSelectedObjects)
-        header = self.verticalHeader() if self.model().isRowObjects else self.horizontalHeader()
+        header = self.verticalHeader() if self.objectModel().isRowObjects else self.horizontalHeader()
         return menu.exec_(header.viewport().mapToGlobal(pos))
 
     def getPropertyHeaderContextMenu(self, pos):
         menu = QMenu()
-        if len(self.model().objects) > 1:
-            rowOrColumn = "Column" if self.model().isRowObjects else "Row"
+        header = self.horizontalHeader() if self.objectModel().isRowObjects else self.verticalHeader()
+        propertyIndex = header.logicalIndexAt(pos)
+        specs = self.objectModel().columnSpecs()
+        if (0 <= propertyIndex < len(specs)) and specs[propertyIndex].isButton and len(self.objectModel().objects):
+            rowsOrColumns = "Rows" if self.objectModel().isRowObjects else "Columns"
+            menu.addAction("Run For Selected " + rowsOrColumns, lambda: self.runButtonActionForSelectedObjects(propertyIndex))
+            menu.addSeparator()
+        if len(self.objectModel().objects) > 1:
+            rowOrColumn = "Column" if self.objectModel().isRowObjects else "Row"
             menu.addAction("Set All In Selected " + rowOrColumn, self.setPropertyForAllObjects)
-        elif (len(self.model().objects) == 0) and (self.model().templateObject is not None):
-            rowOrColumn = "Row" if self.model().isRowObjects else "Column"
+        elif (len(self.objectModel().objects) == 0) and (self.objectModel().templateObject is not None):
+            rowOrColumn = "Row" if self.objectModel().isRowObjects else "Column"
             menu.addAction("Add Object " + rowOrColumn, self.appendObject)
-        else:
+        elif menu.isEmpty():
             return
-        header = self.horizontalHeader() if self.model().isRowObjects else self.verticalHeader()
         return menu.exec_(header.viewport().mapToGlobal(pos))
 
     def selectedRows(self):
@@ -432,68 +1822,99 @@ class ObjectListTableViewQt(QTableView):
         return sorted(list(columns))
 
     def insertObject(self, i):
-        self.model().insertObjects(i, 1)
+        self.objectModel().insertObjects(i, 1)
 
     def appendObject(self):
-        self.insertObject(len(self.model().objects))
+        self.insertObject(len(self.objectModel().objects))
 
     def removeObject(self, i):
-        self.model().removeObjects(i, 1)
+        self.objectModel().removeObjects(i, 1)
 
     def insertObjectBeforeSelectedObjects(self):
-        selectedObjectIndices = self.selectedRows() if self.model().isRowObjects else self.selectedColumns()
-        self.model().insertObjects(selectedObjectIndices[0], 1)
+        selectedObjectIndices = self.selectedObjectIndices()
+        self.objectModel().insertObjects(selectedObjectIndices[0], 1)
 
     def insertObjectAfterSelectedObjects(self):
-        selectedObjectIndices = self.selectedRows() if self.model().isRowObjects else self.selectedColumns()
-        self.model().insertObjects(selectedObjectIndices[-1] + 1, 1)
+        selectedObjectIndices = self.selectedObjectIndices()
+        self.objectModel().insertObjects(selectedObjectIndices[-1] + 1, 1)
 
     def insertObjectsBeforeSelectedObjects(self):
         num, ok = QInputDialog.getInt(self, "Insert", "Number of objects to insert.", 1, 1)
         if ok:
-            selectedObjectIndices = self.selectedRows() if self.model().isRowObjects else self.selectedColumns()
-            self.model().insertObjects(selectedObjectIndices[0], num)
+            selectedObjectIndices = self.selectedObjectIndices()
+            self.objectModel().insertObjects(selectedObjectIndices[0], num)
 
     def insertObjectsAfterSelectedObjects(self):
         num, ok = QInputDialog.getInt(self, "Insert", "Number of objects to insert.", 1, 1)
         if ok:
-            selectedObjectIndices = self.selectedRows() if self.model().isRowObjects else self.selectedColumns()
-            self.model().insertObjects(selectedObjectIndices[-1] + 1, num)
+            selectedObjectIndices = self.selectedObjectIndices()
+            self.objectModel().insertObjects(selectedObjectIndices[-1] + 1, num)
 
     def removeSelectedObjects(self):
-        selectedObjectIndices = self.selectedRows() if self.model().isRowObjects else self.selectedColumns()
-        for i in reversed(selectedObjectIndices):
-            self.model().removeObjects(i, 1)
+        selectedObjectIndices = self.selectedObjectIndices()
+        self.objectModel().removeObjectsAt(selectedObjectIndices)
 
     def moveSelectedObjects(self):
-        moveToIndex, ok = QInputDialog.getInt(self, "Move", "Move to index.", 1, 1, len(self.model().objects))
+        moveToIndex, ok = QInputDialog.getInt(self, "Move", "Move to index.", 1, 1, len(self.objectModel().objects))
         if ok:
             moveToIndex -= 1  # From 1-based to 0-based.
-            moveToIndex = min([max([0, moveToIndex]), len(self.model().objects)])  # Clamp moveToIndex to a valid object index.
-            selectedObjectIndices = self.selectedRows() if self.model().isRowObjects else self.selectedColumns()
-            self.model().moveObjects(selectedObjectIndices, moveToIndex)
+            moveToIndex = min([max([0, moveToIndex]), len(self.objectModel().objects)])  # Clamp moveToIndex to a valid object index.
+            selectedObjectIndices = self.selectedObjectIndices()
+            self.objectModel().moveObjects(selectedObjectIndices, moveToIndex)
 
     def clearObjects(self):
-        self.model().clearObjects()
+        self.objectModel().clearObjects()
+
+    def spreadFileNames(self, index, fileNames):
+        """ Set a "fileDialog" property to one file per object, starting with the object at index (a view index):
+        for the selected objects if index is one of several selected cells of the property, otherwise for consecutive
+        objects. Used by FileDialogDelegateQt when several files are selected.
+        """
+        isRowObjects = self.objectModel().isRowObjects
+        if isRowObjects:
+            indexes = [i for i in self.selectionModel().selectedIndexes() if i.column() == index.column()]
+            indexes.sort(key=lambda i: i.row())
+        else:
+            indexes = [i for i in self.selectionModel().selectedIndexes() if i.row() == index.row()]
+            indexes.sort(key=lambda i: i.column())
+        if (len(indexes) < 2) or (index not in indexes):
+            first = index.row() if isRowObjects else index.column()
+            numObjects = self.model().rowCount() if isRowObjects else self.model().columnCount()
+            positions = range(first, min([first + len(fileNames), numObjects]))
+            indexes = [self.model().index(k, index.column()) if isRowObjects else self.model().index(index.row(), k) for k in positions]
+        for targetIndex, fileName in zip(indexes, fileNames):
+            self.model().setData(targetIndex, fileName, Qt.EditRole)
+
+    def runButtonActionForSelectedObjects(self, propertyIndex):
+        """ Run the "button" property's method for every selected object (see ObjectListTableModelQt.runButtonAction()).
+        """
+        self.objectModel().runButtonAction(propertyIndex, self.selectedObjectIndices())
 
     def setPropertyForAllObjects(self):
-        selectedPropertyIndices = self.selectedColumns() if self.model().isRowObjects else self.selectedRows()
+        selectedPropertyIndices = self.selectedColumns() if self.objectModel().isRowObjects else self.selectedRows()
         if len(selectedPropertyIndices) != 1:
             errorDialog = QErrorMessage(self)
-            rowOrColumn = "column" if self.model().isRowObjects else "row"
+            rowOrColumn = "column" if self.objectModel().isRowObjects else "row"
             errorDialog.showMessage("Must select a single property " + rowOrColumn + ".")
             errorDialog.exec_()
             return
         try:
             propertyIndex = selectedPropertyIndices[0]
-            dtype = self.model().propertyType(propertyIndex)
+            dtype = self.objectModel().propertyType(propertyIndex)
             if dtype is None:
                 return
-            obj = self.model().objects[0]
-            prop = self.model().properties[propertyIndex]
+            obj = self.objectModel().objects[0]
+            prop = self.objectModel().properties[propertyIndex]
             if "Write" not in prop.get('mode', "Read/Write"):
                 return
-            model = ObjectListTableModelQt([obj], [prop], self.model().isRowObjects, False)
+            if prop.get('action', "") == "fileDialog":
+                # Load the file for every object (in the background for 'backgroundLoad' properties).
+                from FileDialogDelegateQt import getOpenFileNames
+                fileNames = getOpenFileNames(self)
+                if len(fileNames):
+                    self.objectModel().setPropertyValues(propertyIndex, fileNames[0])
+                return
+            model = ObjectListTableModelQt([obj], [prop], self.objectModel().isRowObjects, False)
             view = ObjectListTableViewQt(model)
             dialog = QDialog(self)
             buttons = QDialogButtonBox(QDialogButtonBox.Ok)
@@ -504,23 +1925,11 @@ class ObjectListTableViewQt(QTableView):
             vbox.addWidget(buttons)
             dialog.setWindowModality(Qt.WindowModal)
             dialog.exec_()
-            for objectIndex, obj in enumerate(self.model().objects):
-                row = objectIndex if self.model().isRowObjects else propertyIndex
-                col = propertyIndex if self.model().isRowObjects else objectIndex
-                index = self.model().index(row, col)
-                if objectIndex == 0:
-                    value = self.model().data(index)
-                else:
-                    if prop.get('action', '') == "fileDialog":
-                        try:
-                            getAttrRecursive(obj, prop['attr'])(value)
-                            self.model().dataChanged.emit(index, index)  # Tell model to update cell display.
-                        except:
-                            self.model().setData(index, value)
-                            self.model().dataChanged.emit(index, index)  # Tell model to update cell display.
-                    else:
-                        self.model().setData(index, value)
-                        self.model().dataChanged.emit(index, index)  # Tell model to update cell display.
+            self.objectModel().invalidate([obj])  # obj was edited outside of the object model.
+            row = 0 if self.objectModel().isRowObjects else propertyIndex
+            col = propertyIndex if self.objectModel().isRowObjects else 0
+            value = self.objectModel().data(self.objectModel().index(row, col))
+            self.objectModel().setPropertyValues(propertyIndex, value, range(1, len(self.objectModel().objects)))
         except:
             pass
 
@@ -0,0 +1,292 @@
+""" ObjectListUndoQt.py: Undo/redo for the edits, insertions, removals and moves of an ObjectListTableModelQt.
+
+Rather than snapshotting the object list, each change is recorded as a compact delta:
+    - Cell edits: (object, propertyIndex, old value, new value) for each changed cell.
+    - Insertions and removals: the first index of each block and references to the block's objects.
+    - Moves: the moved indices and their destination.
+Deltas are pushed as commands on a QUndoStack, so the usual undo/redo actions, views and groups all work.
+Consecutive edits of the same cell merge into a single command, and the oldest commands are dropped when the
+stack's estimated memory exceeds maxBytes. Changes within a model.batchUpdate() are recorded as a single command.
+
+Normally the recorder is created via the model:
+    model.setUndoEnabled(True)
+    undoAction = model.undoRecorder.undoStack.createUndoAction(window)
+    redoAction = model.undoRecorder.undoStack.createRedoAction(window)
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+import sys
+from contextlib import contextmanager
+try:
+    from PyQt5.QtCore import QObject
+    from PyQt5.QtWidgets import QUndoStack, QUndoCommand
+except ImportError:
+    try:
+        from PyQt4.QtCore import QObject
+        from PyQt4.QtGui import QUndoStack, QUndoCommand
+    except ImportError:
+        raise ImportError("ObjectListUndoQt: Requires PyQt5 or PyQt4.")
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+# Approximate overhead per recorded change or object reference (tuples, lists, command) in bytes.
+ENTRY_OVERHEAD = 100
+
+
+def objectSize(obj):
+    """ Rough memory estimate for an object held only by the undo stack (the object and its attribute dict).
+    """
+    numBytes = sys.getsizeof(obj)
+    attrs = getattr(obj, '__dict__', None)
+    if attrs is not None:
+        numBytes += sys.getsizeof(attrs) + sum(sys.getsizeof(value) for value in attrs.values())
+    return numBytes
+
+
+class SetValuesDelta(object):
+    """ Property values changed for some objects: [[obj, propertyIndex, oldValue, newValue], ...]
+    """
+    __slots__ = ('changes', 'numBytes')
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.numBytes = sum(sys.getsizeof(change[2]) + sys.getsizeof(change[3]) + ENTRY_OVERHEAD for change in changes)
+
+    def _setValues(self, model, k):
+        """ Set the values at position k (2 = old, 3 = new) of each change.
+        """
+        objectIndices = model.objectIndexMap()
+        changed = []  # [(obj, propertyIndex), ...]
+        for change in self.changes:
+            objectIndex = objectIndices.get(id(change[0]), None)
+            if objectIndex is None:
+                continue
+            model.setValue(objectIndex, change[1], change[k])
+            changed.append((change[0], change[1]))
+        with model.batchUpdate():
+            model.notifyObjectsChanged(changed)
+
+    def apply(self, model):
+        self._setValues(model, 3)
+
+    def revert(self, model):
+        self._setValues(model, 2)
+
+    def isCell(self):
+        return len(self.changes) == 1
+
+    def mergeWith(self, other):
+        """ Merge a later edit of the same single cell into this one. Returns False if other is not such an edit.
+        """
+        if not (self.isCell() and isinstance(other, SetValuesDelta) and other.isCell()):
+            return False
+        change, otherChange = self.changes[0], other.changes[0]
+        if (change[0] is not otherChange[0]) or (change[1] != otherChange[1]):
+            return False
+        change[3] = otherChange[3]
+        self.numBytes = sys.getsizeof(change[2]) + sys.getsizeof(change[3]) + ENTRY_OVERHEAD
+        return True
+
+
+class InsertObjectsDelta(object):
+    """ Objects inserted at index first.
+    """
+    __slots__ = ('first', 'objects', 'numBytes')
+
+    def __init__(self, first, objects):
+        self.first = first
+        self.objects = objects
+        self.numBytes = ENTRY_OVERHEAD * (1 + len(objects))  # References only, while the objects are in the model.
+
+    def apply(self, model):
+        model.insertObjects(self.first, self.objects)
+
+    def revert(self, model):
+        model.removeObjects(self.first, len(self.objects))
+
+
+class RemoveObjectsDelta(object):
+    """ Blocks of objects removed: [(first index, [objects]), ...] in ascending order of first index.
+    """
+    __slots__ = ('blocks', 'numBytes')
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        # Removed objects are only held by the undo stack.
+        self.numBytes = sum(ENTRY_OVERHEAD + sum(objectSize(obj) for obj in objects) for first, objects in blocks)
+
+    def apply(self, model):
+        model.removeObjectsAt([first + k for first, objects in self.blocks for k in range(len(objects))])
+
+    def revert(self, model):
+        with model.batchUpdate():
+            for first, objects in self.blocks:  # Ascending, so each block returns to its original index.
+                model.insertObjects(first, objects)
+
+
+class MoveObjectsDelta(object):
+    """ Objects at indices moved to moveToIndex in a list of numObjects (see ObjectListTableModelQt.moveObjects()).
+    """
+    __slots__ = ('indices', 'moveToIndex', 'numObjects', 'numBytes')
+
+    def __init__(self, indices, moveToIndex, numObjects):
+        self.indices = indices
+        self.moveToIndex = moveToIndex
+        self.numObjects = numObjects
+        self.numBytes = ENTRY_OVERHEAD + 8 * len(indices)
+
+    def apply(self, model):
+        model.moveObjects(self.indices, self.moveToIndex)
+
+    def revert(self, model):
+        moved = set(self.indices)
+        remaining = [k for k in range(self.numObjects) if k not in moved]
+        j = min([self.moveToIndex, len(remaining)])
+        order = remaining[:j] + self.indices + remaining[j:]  # As in moveObjects().
+        inverse = [0] * self.numObjects
+        for newIndex, oldIndex in enumerate(order):
+            inverse[oldIndex] = newIndex
+        model.permuteObjects(inverse)
+
+
+class ObjectListUndoCommand(QUndoCommand):
+    """ QUndoCommand applying a list of deltas to the recorder's model. Recorded commands are pushed after the
+    model made their change, so the redo() called by QUndoStack.push() is skipped.
+    """
+
+    # Commands with the same id() are offered to mergeWith().
+    MERGE_ID = 0x4f4c
+
+    def __init__(self, recorder, deltas, text=""):
+        QUndoCommand.__init__(self, text)
+        self.recorder = recorder
+        self.deltas = deltas
+        self.numBytes = sum(delta.numBytes for delta in deltas)
+        self._isDone = True
+
+    def id(self):
+        if (len(self.deltas) == 1) and isinstance(self.deltas[0], SetValuesDelta) and self.deltas[0].isCell():
+            return self.MERGE_ID
+        return -1
+
+    def mergeWith(self, other):
+        if (len(other.deltas) != 1) or not self.deltas[0].mergeWith(other.deltas[0]):
+            return False
+        numBytes = self.deltas[0].numBytes
+        self.recorder.numBytes += numBytes - self.numBytes - other.numBytes
+        self.numBytes = numBytes
+        return True
+
+    def redo(self):
+        if self._isDone:
+            self._isDone = False
+            return
+        with self.recorder.paused():
+            for delta in self.deltas:
+                delta.apply(self.recorder.model)
+
+    def undo(self):
+        with self.recorder.paused():
+            for delta in reversed(self.deltas):
+                delta.revert(self.recorder.model)
+
+
+class ObjectListUndoRecorderQt(QObject):
+    """ Records the changes made through an ObjectListTableModelQt as commands on a QUndoStack.
+
+    :param model (ObjectListTableModelQt): Model whose changes are recorded. The model calls record().
+    :param undoStack (QUndoStack): Stack for the model's commands (default a new one). The memory cap rebuilds the
+        stack from its newest commands, which is skipped if the stack also holds commands from elsewhere.
+    :param maxBytes (int): Approximate memory bound for the recorded deltas.
+    """
+
+    # When over maxBytes, the oldest commands are dropped until the rest fit in this fraction of maxBytes,
+    # so that the stack is not rebuilt for every new command.
+    trimFraction = 0.75
+
+    def __init__(self, model, undoStack=None, maxBytes=64*1024*1024, parent=None):
+        QObject.__init__(self, parent)
+        self.model = model
+        self.undoStack = undoStack if (undoStack is not None) else QUndoStack(self)
+        self.maxBytes = maxBytes
+        self.numBytes = 0  # Estimated memory of the recorded commands.
+        self.isRecording = True  # False while undoing/redoing.
+        self._group = None  # [deltas, text] collected within a model batch.
+
+    @contextmanager
+    def paused(self):
+        """ Context manager that stops recording (while undoing/redoing changes).
+        """
+        wasRecording = self.isRecording
+        self.isRecording = False
+        try:
+            yield
+        finally:
+            self.isRecording = wasRecording
+
+    def record(self, delta, text=""):
+        """ Push a delta for a change the model has already made (or add it to the current group).
+        """
+        if not self.isRecording:
+            return
+        if self._group is not None:
+            self._group[0].append(delta)
+            if not self._group[1]:
+                self._group[1] = text
+            return
+        self.push([delta], text)
+
+    def beginGroup(self):
+        """ Record all changes until endGroup() as a single command (used by model.batchUpdate()).
+        """
+        if self.isRecording:
+            self._group = [[], ""]
+
+    def endGroup(self):
+        group, self._group = self._group, None
+        if group and group[0]:
+            self.push(group[0], group[1] if len(group[0]) == 1 else "Edit %d changes" % len(group[0]))
+
+    def push(self, deltas, text=""):
+        stack = self.undoStack
+        # Commands above the current index are discarded by push().
+        self.numBytes -= sum(getattr(stack.command(i), 'numBytes', 0) for i in range(stack.index(), stack.count()))
+        command = ObjectListUndoCommand(self, deltas, text)
+        self.numBytes += command.numBytes
+        stack.push(command)
+        if self.numBytes > self.maxBytes:
+            self.trim()
+
+    def trim(self):
+        """ Drop the oldest commands so that the rest fit in trimFraction of maxBytes (keeping at least the newest).
+        """
+        stack = self.undoStack
+        commands = [stack.command(i) for i in range(stack.count())]
+        self.numBytes = sum(getattr(command, 'numBytes', 0) for command in commands)
+        if (self.numBytes <= self.maxBytes) or (stack.index() != stack.count()):
+            return
+        if not all(isinstance(command, ObjectListUndoCommand) for command in commands):
+            return  # Can't rebuild a stack shared with other commands.
+        kept = []
+        numBytes = 0
+        for command in reversed(commands):
+            if kept and (numBytes + command.numBytes > self.trimFraction * self.maxBytes):
+                break
+            kept.append((command.deltas, command.text()))
+            numBytes += command.numBytes
+        stack.clear()
+        self.numBytes = 0
+        for deltas, text in reversed(kept):
+            command = ObjectListUndoCommand(self, deltas, text)
+            self.numBytes += command.numBytes
+            stack.push(command)
+
+    def clear(self):
+        self.undoStack.clear()
+        self.numBytes = 0
+
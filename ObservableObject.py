@@ -0,0 +1,98 @@
+""" ObservableObject.py: Mixin for objects that report attribute assignments to observers.
+
+Inherit from ObservableObject to let models (see ObjectChangeBridgeQt) find out when your code changes an object
+outside of the model/view, e.g. from a background computation:
+
+    class MyObject(ObservableObject):
+        def __init__(self):
+            self.floatValue = 0.0
+
+    addObserver(obj, observer)  # observer(obj, "floatValue") is called after each obj.floatValue = ...
+
+Observers are called in the thread that assigned the attribute.
+Only attribute assignment is observed, not changes inside containers such as obj.values[0] = 1.
+
+Observers are kept in a module level registry keyed by object identity rather than in the objects themselves,
+so that copying or pickling an observed object does not copy its observers.
+Bound method observers are held by weak reference, so observing an object does not keep the observer's owner
+(e.g. a model's ObjectChangeBridgeQt) alive. Observers whose owner is gone are dropped the next time they would be called.
+
+author: Marcel Goldschen-Ohm
+email: <marcel.goldschen@gmail.com>
+"""
+
+
+import weakref
+try:
+    from weakref import WeakMethod
+except ImportError:
+    class WeakMethod(object):  # Python 2
+        """ Weak reference to a bound method: calling it returns the method, or None once its object is gone.
+        """
+        def __init__(self, method):
+            self._selfRef = weakref.ref(method.__self__)
+            self._func = method.__func__
+
+        def __call__(self):
+            obj = self._selfRef()
+            return None if obj is None else self._func.__get__(obj, type(obj))
+
+
+__author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
+
+
+# {id(obj): [observerRef, ...]}, where observerRef() returns observer(obj, attrName) or None if it is gone.
+_observers = {}
+
+
+def _observerRef(observer):
+    if getattr(observer, '__self__', None) is not None and hasattr(observer, '__func__'):  # Bound method.
+        return WeakMethod(observer)
+    return lambda: observer
+
+
+def _removeObserverRef(obj, observerRef):
+    observers = _observers.get(id(obj), None)
+    if observers is None:
+        return
+    try:
+        observers.remove(observerRef)
+    except ValueError:
+        pass
+    if not observers:
+        _observers.pop(id(obj), None)
+
+
+class ObservableObject(object):
+    """ Mixin that calls each observer(self, name) registered via addObserver() after self.name is assigned.
+    """
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        observers = _observers.get(id(self), None)
+        if observers:
+            for observerRef in list(observers):
+                observer = observerRef()
+                if observer is None:
+                    _removeObserverRef(self, observerRef)
+                else:
+                    observer(self, name)
+
+
+def isObservable(obj):
+    return isinstance(obj, ObservableObject)
+
+
+def addObserver(obj, observer):
+    """ Call observer(obj, name) whenever an attribute of obj is assigned. Returns False if obj is not observable.
+    """
+    if not isinstance(obj, ObservableObject):
+        return False
+    _observers.setdefault(id(obj), []).append(_observerRef(observer))
+    return True
+
+
+def removeObserver(obj, observer):
+    for observerRef in list(_observers.get(id(obj), [])):
+        if observerRef() == observer:
+            _removeObserverRef(obj, observerRef)
+            return
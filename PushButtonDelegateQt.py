@@ -1,18 +1,21 @@
 """ PushButtonDelegateQt.py: Delegate for a clickable button in a model view.
 
 Calls the model's setData() method when clicked, wherein the button clicked action should be handled.
+While the model reports the cell as busy (BUTTON_BUSY_ROLE), the button is painted disabled and ignores clicks.
 """
 
 
 try:
-    from PyQt5.QtCore import Qt, QEvent, QT_VERSION_STR
+    from PyQt5.QtCore import Qt, QEvent, QPoint, QRect, QT_VERSION_STR
+    from PyQt5.QtGui import QPainter, QPixmap, QPixmapCache
     from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
 except ImportError:
     try:
-        from PyQt4.QtCore import Qt, QEvent, QT_VERSION_STR
-        from PyQt4.QtGui import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+        from PyQt4.QtCore import Qt, QEvent, QPoint, QRect, QT_VERSION_STR
+        from PyQt4.QtGui import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication, QPainter, QPixmap, QPixmapCache
     except ImportError:
         raise ImportError("PushButtonDelegateQt: Requires PyQt5 or PyQt4.")
+from ItemDataRolesQt import BUTTON_BUSY_ROLE
 
 
 __author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
@@ -21,12 +24,25 @@ __author__ = "Marcel Goldschen-Ohm <marcel.goldschen@gmail.com>"
 class PushButtonDelegateQt(QStyledItemDelegate):
     """ Delegate for a clickable button in a model view.
     Calls the model's setData() method when clicked, wherein the button clicked action should be handled.
+
+    Rendering a push button through the style is expensive, and every cell in a button column looks alike.
+    paint() therefore renders each distinct (text, size, enabled, pressed) button once into Qt's QPixmapCache
+    and draws that pixmap afterwards. The current style and palette are part of the cache key, so changing
+    either one renders new pixmaps. clearPixmapCache() discards all cached buttons.
     """
+
+    # Bumped by clearPixmapCache() so that previously cached pixmaps are no longer used.
+    _pixmapCacheGeneration = 0
+
     def __init__(self, text="", parent=None):
         QStyledItemDelegate.__init__(self, parent)
         self.text = text
         self._isMousePressed = False
 
+    @classmethod
+    def clearPixmapCache(cls):
+        cls._pixmapCacheGeneration += 1
+
     def createEditor(self, parent, option, index):
         """ Important, otherwise an editor is created if the user clicks in this cell.
         """
@@ -35,25 +51,54 @@ class PushButtonDelegateQt(QStyledItemDelegate):
     def paint(self, painter, option, index):
         """ Draw button in cell.
         """
+        isEnabled = not index.data(BUTTON_BUSY_ROLE)
+        pixmap = self.getButtonPixmap(option.rect.size(), self._isMousePressed and isEnabled, painter, isEnabled)
+        painter.drawPixmap(option.rect.topLeft(), pixmap)
+
+    def getButtonPixmap(self, size, isPressed, painter, isEnabled=True):
+        """ Return the (cached) pixmap of a button with this delegate's text.
+        """
+        style = QApplication.style()
+        devicePixelRatio = painter.device().devicePixelRatioF() if hasattr(painter.device(), 'devicePixelRatioF') else 1
+        key = "PushButtonDelegateQt:%d:%d:%d:%d:%d:%dx%d:%g:%s" % (
+            self._pixmapCacheGeneration, id(style), QApplication.palette().cacheKey(),
+            isPressed, isEnabled, size.width(), size.height(), devicePixelRatio, self.text)
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
         opts = QStyleOptionButton()
         opts.state |= QStyle.State_Active
-        opts.state |= QStyle.State_Enabled
+        if isEnabled:
+            opts.state |= QStyle.State_Enabled
         if QT_VERSION_STR[0] == '4':
-            opts.state |= (QStyle.State_Sunken if self._isMousePressed else QStyle.State_Raised)
+            opts.state |= (QStyle.State_Sunken if isPressed else QStyle.State_Raised)
         elif QT_VERSION_STR[0] == '5':
             # When raised in PyQt5, white text cannot be seen on white background.
             # Should probably fix this by initializing form styled button, but for now I'll just sink it all the time.
             opts.state |= QStyle.State_Sunken
-        opts.rect = option.rect
+        opts.rect = QRect(QPoint(0, 0), size)
         opts.text = self.text
-        QApplication.style().drawControl(QStyle.CE_PushButton, opts, painter)
+        pixmap = QPixmap(int(size.width() * devicePixelRatio), int(size.height() * devicePixelRatio))
+        if devicePixelRatio != 1:
+            pixmap.setDevicePixelRatio(devicePixelRatio)
+        pixmap.fill(Qt.transparent)
+        pixmapPainter = QPainter(pixmap)
+        style.drawControl(QStyle.CE_PushButton, opts, pixmapPainter)
+        pixmapPainter.end()
+        QPixmapCache.insert(key, pixmap)
+        return pixmap
 
     def editorEvent(self, event, model, option, index):
         """ Handle mouse events in cell.
         On left button release in this cell, call model's setData() method,
             wherein the button clicked action should be handled.
         Currently, the value supplied to setData() is the button text, but this is arbitrary.
+        Clicks are ignored while the cell is busy.
         """
+        if event.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease, QEvent.MouseButtonDblClick):
+            if index.data(BUTTON_BUSY_ROLE):
+                self._isMousePressed = False
+                return True
         if event.button() == Qt.LeftButton:
             if event.type() == QEvent.MouseButtonPress:
                 if option.rect.contains(event.pos()):
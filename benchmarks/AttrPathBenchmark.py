@@ -0,0 +1,66 @@
+""" AttrPathBenchmark.py: Per cell cost of the original recursive attribute lookup vs. compiled AttrPath accessors.
+
+Run from the repository root:
+    python benchmarks/AttrPathBenchmark.py [numObjects]
+
+No Qt required. Times a get and a set of every object for each path, and reports the cost per cell.
+"""
+
+
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from AttrPath import compileAttrPath
+
+
+def getAttrRecursiveOriginal(obj, attr):
+    """ Original str.index/slice/ValueError based implementation, kept here as the baseline.
+    """
+    try:
+        p = attr.index(".")
+        obj = getattr(obj, attr[0:p])
+        return getAttrRecursiveOriginal(obj, attr[p+1:])
+    except ValueError:
+        return getattr(obj, attr)
+
+
+def setAttrRecursiveOriginal(obj, attr, value):
+    try:
+        p = attr.index(".")
+        obj = getattr(obj, attr[0:p])
+        setAttrRecursiveOriginal(obj, attr[p+1:], value)
+    except ValueError:
+        setattr(obj, attr, value)
+
+
+class Person(object):
+    def __init__(self, name, hasFriend=True):
+        self.name = name
+        self.age = 42
+        self.friend = Person(name + "'s friend", False) if hasFriend else None
+
+
+def run(numObjects=50000, repeat=5):
+    objects = [Person("person " + str(i)) for i in range(numObjects)]
+    results = []
+    for attr in ["name", "friend.name", "friend.age"]:
+        attrPath = compileAttrPath(attr)
+        getter = attrPath.getter
+        timings = {
+            'original get': lambda: [getAttrRecursiveOriginal(obj, attr) for obj in objects],
+            'compiled get': lambda: [getter(obj) for obj in objects],
+            'original set': lambda: [setAttrRecursiveOriginal(obj, attr, 1) for obj in objects],
+            'compiled set': lambda: [attrPath.set(obj, 1) for obj in objects],
+        }
+        for label, func in timings.items():
+            seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+            results.append((attr, label, 1e9 * seconds / numObjects))
+    return results
+
+
+if __name__ == "__main__":
+    numObjects = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print("AttrPathBenchmark: " + str(numObjects) + " objects, ns per cell (best of 5)")
+    for attr, label, nsPerCell in run(numObjects):
+        print("{0:<14s}{1:<14s}{2:8.1f}".format(attr, label, nsPerCell))
@@ -0,0 +1,327 @@
+""" ModelViewBenchmark.py: Headless timings of ObjectListTableModelQt, ObjectListTableViewQt and the delegates.
+
+Run from the repository root:
+    python benchmarks/ModelViewBenchmark.py [--sizes 10000,100000,1000000] [--repeat 3] [--only data,paint]
+                                            [--output results.json] [--compare baseline.json]
+
+Uses Qt's "offscreen" platform unless QT_QPA_PLATFORM is set, so no display is needed. For each list size it builds
+synthetic objects like the MyObject demo in ObjectListTableModelViewQt.py (including the nested child.* paths) and
+times (best of --repeat):
+
+    modelInit                 ObjectListTableModelQt(objects, properties)
+    setModel                  ObjectListTableViewQt(model), i.e. setModel() with delegates and column sizing
+    data                      data(DisplayRole) for every property of (up to) 20000 evenly spaced objects
+    setData                   setData(EditRole) for the editable plain/nested properties of those objects
+    paint.<delegate>          One full viewport repaint of a 1280x1024 view whose columns all use that delegate
+    insertObjects             Inserting 1000 objects in the middle of the list
+    removeObjects             Removing those 1000 objects again
+    moveObjects.contiguous    Moving a block of 1000 objects from the first to the last quarter of the list
+    moveObjects.scattered     Moving 1000 evenly spaced objects to the front of the list
+    setPropertyForAllObjects  The view's "Set All In Selected Column" action (its dialog is accepted at once)
+
+Results are written as JSON (to stdout, or to --output), with one entry per benchmark and size holding the best time
+in seconds, the number of operations (cells, objects or paints) and the operations per second. --compare prints the
+speedup of each entry relative to a previous run's JSON.
+"""
+
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from datetime import datetime
+os.environ.setdefault('QT_QPA_PLATFORM', "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+try:
+    from PyQt5.QtCore import Qt, QT_VERSION_STR, PYQT_VERSION_STR
+    from PyQt5.QtWidgets import QApplication, QDialog
+except ImportError:
+    try:
+        from PyQt4.QtCore import Qt, QT_VERSION_STR, PYQT_VERSION_STR
+        from PyQt4.QtGui import QApplication, QDialog
+    except ImportError:
+        raise ImportError("ModelViewBenchmark: Requires PyQt5 or PyQt4.")
+import ObjectListTableModelViewQt
+from ObjectListTableModelViewQt import ObjectListTableModelQt, ObjectListTableViewQt
+
+
+class BenchObject(object):
+    """ Same attributes as the MyObject demo. Slots keep a million of them (plus children) in memory.
+    """
+    __slots__ = ('name', 'strValue', 'intValue', 'floatValue', 'boolValue', 'dateValue', '_fileName', 'child')
+
+    def __init__(self, name="New Obj", s="", i=0, f=0.0, b=True, hasChild=True):
+        self.name = name
+        self.strValue = s
+        self.intValue = i
+        self.floatValue = f
+        self.boolValue = b
+        self.dateValue = datetime(2015, 1, 1)
+        self._fileName = ""
+        self.child = BenchObject(name, s, i, f, b, False) if hasChild else None
+
+    @property
+    def fileName(self):
+        return self._fileName
+
+    @fileName.setter
+    def fileName(self, fileName):
+        self._fileName = fileName
+
+    def clicked(self):
+        pass
+
+
+# The demo's properties.
+PROPERTIES = [
+    {'attr': "name",           'header': "Read Only Name",      'mode': "Read Only"},
+    {'attr': "strValue",       'header': "String"},
+    {'attr': "intValue",       'header': "Integer"},
+    {'attr': "floatValue",     'header': "Float"},
+    {'attr': "boolValue",      'header': "Bool"},
+    {'attr': "dateValue",      'header': "Date/Time",           'text': "%c"},
+    {'attr': "fileName",       'header': "File Name",           'action': "fileDialog"},
+    {'attr': "clicked",        'header': "Button",              'action': "button", 'text': "Click Me!"},
+    {'attr': "child.intValue", 'header': "Child Int"},
+    {'attr': "strValue",       'header': "String Combo Box",    'choices': ['First Choice', 'Second Choice']},
+    {'attr': "child.intValue", 'header': "Child Int Combo Box", 'choices': [42, 82]},
+    {'attr': "floatValue",     'header': "Float Combo Box",     'choices': [('PI', 3.14), ('-PI', -3.14)]}]
+
+# Property painted by each delegate (the default delegate paints plain text).
+DELEGATE_PROPERTIES = {
+    'default':      {'attr': "child.intValue"},
+    'checkBox':     {'attr': "boolValue"},
+    'floatEdit':    {'attr': "floatValue"},
+    'dateTimeEdit': {'attr': "dateValue", 'text': "%c"},
+    'comboBox':     {'attr': "strValue", 'choices': ['First Choice', 'Second Choice']},
+    'pushButton':   {'attr': "clicked", 'action': "button", 'text': "Click Me!"},
+    'fileDialog':   {'attr': "fileName", 'action': "fileDialog"}}
+
+# Properties written by the setData benchmark: [(propertyIndex, value), ...]
+SET_DATA_PROPERTIES = [(1, "edited"), (2, 7), (3, 2.5), (4, False), (8, 11)]
+
+VIEW_WIDTH, VIEW_HEIGHT = 1280, 1024
+MAX_SAMPLED_OBJECTS = 20000
+NUM_CHANGED_OBJECTS = 1000
+
+
+def makeObjects(numObjects):
+    return [BenchObject("obj " + str(i), "str " + str(i), i, 0.5 * i, i % 2 == 0) for i in range(numObjects)]
+
+
+def sampleObjectIndices(numObjects):
+    step = max([1, numObjects // MAX_SAMPLED_OBJECTS])
+    return list(range(0, numObjects, step))[:MAX_SAMPLED_OBJECTS]
+
+
+def best(func, repeat, setup=None):
+    """ Return the best time in seconds of repeat calls to func(), each after an (untimed) call to setup().
+    """
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        times.append(min(timeit.repeat(func, number=1, repeat=1)))
+    return min(times)
+
+
+def showView(view):
+    view.resize(VIEW_WIDTH, VIEW_HEIGHT)
+    view.show()
+    QApplication.processEvents()
+
+
+class AcceptedDialog(QDialog):
+    """ Stands in for the modal dialog of setPropertyForAllObjects(), which would otherwise wait for a user.
+    """
+    def exec_(self):
+        return QDialog.Accepted
+
+
+class ModelViewBenchmark(object):
+    def __init__(self, sizes, repeat=3, only=None):
+        self.sizes = sizes
+        self.repeat = repeat
+        self.only = only
+        self.results = []
+
+    def isSelected(self, name):
+        return (self.only is None) or any(name == group or name.startswith(group + ".") for group in self.only)
+
+    def record(self, name, numObjects, seconds, ops):
+        result = {'name': name, 'numObjects': numObjects, 'seconds': seconds, 'ops': ops,
+                  'opsPerSecond': ops / seconds if seconds > 0 else None}
+        self.results.append(result)
+        sys.stderr.write("{0:<26s}{1:>9d} objects {2:12.6f} s {3:14.0f} ops/s\n".format(
+            name, numObjects, seconds, result['opsPerSecond'] or 0))
+
+    def run(self):
+        for numObjects in self.sizes:
+            objects = makeObjects(numObjects)
+            self.runForObjects(objects)
+            del objects
+        return self.results
+
+    def runForObjects(self, objects):
+        n, repeat = len(objects), self.repeat
+        if self.isSelected('modelInit'):
+            seconds = best(lambda: ObjectListTableModelQt(objects, PROPERTIES), repeat)
+            self.record('modelInit', n, seconds, n)
+        model = ObjectListTableModelQt(objects, PROPERTIES, templateObject=BenchObject())
+        if self.isSelected('setModel'):
+            views = []
+            seconds = best(lambda: views.append(ObjectListTableViewQt(model)), repeat)
+            self.record('setModel', n, seconds, 1)
+            for view in views:
+                view.setModel(ObjectListTableModelQt([], PROPERTIES))  # Detach before deleting.
+                view.deleteLater()
+            QApplication.processEvents()
+        if self.isSelected('data'):
+            self.benchmarkData(model)
+        if self.isSelected('setData'):
+            self.benchmarkSetData(model)
+        if self.isSelected('paint'):
+            self.benchmarkPaint(objects)
+        view = ObjectListTableViewQt(model)
+        showView(view)
+        if self.isSelected('insertObjects') or self.isSelected('removeObjects'):
+            self.benchmarkInsertRemove(model)
+        if self.isSelected('moveObjects'):
+            self.benchmarkMove(model)
+        if self.isSelected('setPropertyForAllObjects'):
+            self.benchmarkSetPropertyForAllObjects(view)
+        view.close()
+        view.setModel(ObjectListTableModelQt([], PROPERTIES))
+        view.deleteLater()
+        QApplication.processEvents()
+
+    def benchmarkData(self, model):
+        rows = sampleObjectIndices(len(model.objects))
+        indexes = [model.index(row, column) for row in rows for column in range(len(PROPERTIES))]
+        data = model.data
+
+        def readAll():
+            for index in indexes:
+                data(index, Qt.DisplayRole)
+        self.record('data', len(model.objects), best(readAll, self.repeat), len(indexes))
+
+    def benchmarkSetData(self, model):
+        rows = sampleObjectIndices(len(model.objects))
+        edits = [(model.index(row, column), value) for row in rows for column, value in SET_DATA_PROPERTIES]
+        setData = model.setData
+
+        def writeAll():
+            for index, value in edits:
+                setData(index, value, Qt.EditRole)
+        self.record('setData', len(model.objects), best(writeAll, self.repeat), len(edits))
+
+    def benchmarkPaint(self, objects):
+        for delegateName, prop in sorted(DELEGATE_PROPERTIES.items()):
+            name = 'paint.' + delegateName
+            if not self.isSelected(name):
+                continue
+            model = ObjectListTableModelQt(objects, [dict(prop, header=str(i)) for i in range(16)])
+            view = ObjectListTableViewQt(model)
+            showView(view)
+            viewport = view.viewport()
+            seconds = best(viewport.repaint, self.repeat)
+            self.record(name, len(objects), seconds, 1)
+            view.close()
+            view.deleteLater()
+            QApplication.processEvents()
+
+    def benchmarkInsertRemove(self, model):
+        n = len(model.objects)
+        first = n // 2
+        newObjects = makeObjects(NUM_CHANGED_OBJECTS)
+        insertTimes, removeTimes = [], []
+        for i in range(self.repeat):
+            insertTimes.append(min(timeit.repeat(lambda: model.insertObjects(first, newObjects), number=1, repeat=1)))
+            removeTimes.append(min(timeit.repeat(lambda: model.removeObjects(first, len(newObjects)), number=1, repeat=1)))
+        if self.isSelected('insertObjects'):
+            self.record('insertObjects', n, min(insertTimes), len(newObjects))
+        if self.isSelected('removeObjects'):
+            self.record('removeObjects', n, min(removeTimes), len(newObjects))
+
+    def benchmarkMove(self, model):
+        n = len(model.objects)
+        num = min([NUM_CHANGED_OBJECTS, n // 4])
+        if self.isSelected('moveObjects.contiguous'):
+            block = list(range(n // 4, n // 4 + num))
+            seconds = best(lambda: model.moveObjects(block, 3 * n // 4), self.repeat)
+            self.record('moveObjects.contiguous', n, seconds, num)
+        if self.isSelected('moveObjects.scattered'):
+            step = max([1, n // num])
+            scattered = list(range(step - 1, n, step))[:num]
+            seconds = best(lambda: model.moveObjects(scattered, 0), self.repeat)
+            self.record('moveObjects.scattered', n, seconds, len(scattered))
+
+    def benchmarkSetPropertyForAllObjects(self, view):
+        column = 2  # intValue
+        view.clearSelection()
+        if view.objectModel().isRowObjects:
+            view.selectColumn(column)
+        else:
+            view.selectRow(column)
+        QDialogBeforeBenchmark = ObjectListTableModelViewQt.QDialog
+        ObjectListTableModelViewQt.QDialog = AcceptedDialog
+        try:
+            seconds = best(view.setPropertyForAllObjects, self.repeat)
+        finally:
+            ObjectListTableModelViewQt.QDialog = QDialogBeforeBenchmark
+        view.clearSelection()
+        self.record('setPropertyForAllObjects', len(view.objectModel().objects), seconds, len(view.objectModel().objects))
+
+
+def compareResults(results, baseline):
+    """ Print the speedup (baseline seconds / seconds) of each result that is also in baseline.
+    """
+    baselineSeconds = dict(((r['name'], r['numObjects']), r['seconds']) for r in baseline['results'])
+    for result in results:
+        before = baselineSeconds.get((result['name'], result['numObjects']), None)
+        if before is None:
+            continue
+        speedup = before / result['seconds'] if result['seconds'] > 0 else float('inf')
+        sys.stderr.write("{0:<26s}{1:>9d} objects {2:8.2f}x\n".format(result['name'], result['numObjects'], speedup))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless ObjectListTableModelViewQt benchmarks.")
+    parser.add_argument('--sizes', default="10000,100000,1000000", help="Comma separated numbers of objects.")
+    parser.add_argument('--repeat', type=int, default=3, help="Report the best of this many runs.")
+    parser.add_argument('--only', default=None, help="Comma separated benchmarks (or groups like paint) to run.")
+    parser.add_argument('--output', default=None, help="Write the JSON results to this file instead of stdout.")
+    parser.add_argument('--compare', default=None, help="Print speedups relative to this JSON results file.")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    only = None if args.only is None else [name.strip() for name in args.only.split(",") if name.strip()]
+    benchmark = ModelViewBenchmark(sizes, max([1, args.repeat]), only)
+    results = benchmark.run()
+    report = {
+        'benchmark': "ModelViewBenchmark",
+        'date': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'qpaPlatform': os.environ.get('QT_QPA_PLATFORM', ""),
+        'machine': platform.platform(),
+        'repeat': benchmark.repeat,
+        'results': results}
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compareResults(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
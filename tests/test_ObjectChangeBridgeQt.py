@@ -0,0 +1,70 @@
+""" test_ObjectChangeBridgeQt.py: Observers must not outlive the model/bridge that registered them.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+
+import gc
+import os
+import sys
+import unittest
+import weakref
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+try:
+    from PyQt5 import sip
+    from PyQt5.QtWidgets import QApplication
+except ImportError:
+    import sip
+    from PyQt4.QtGui import QApplication
+from ObservableObject import ObservableObject, addObserver, _observers
+from ObjectListTableModelViewQt import ObjectListTableModelQt
+
+
+class Obj(ObservableObject):
+    def __init__(self):
+        self.k = 1
+        self.child = None
+
+
+class Owner(object):
+    def observer(self, obj, name):
+        self.name = name
+
+
+class TestObserverLifetime(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def test_deleted_model_stops_observing(self):
+        objects = [Obj(), Obj()]
+        objects[0].child = Obj()
+        model = ObjectListTableModelQt(objects, [{'attr': "k"}, {'attr': "child.k"}])
+        model.setChangeNotificationsEnabled(True)
+        bridgeRef = weakref.ref(model.changeBridge)
+        objects[1].k = 2  # Pending change queued to the bridge.
+        sip.delete(model)
+        objects[0].k = 7  # Must not raise.
+        objects[0].child.k = 8
+        for obj in objects + [objects[0].child]:
+            self.assertNotIn(id(obj), _observers)
+        del model
+        gc.collect()
+        self.assertIsNone(bridgeRef())
+
+    def test_bound_method_observers_are_weak(self):
+        obj = Obj()
+        owner = Owner()
+        addObserver(obj, owner.observer)
+        obj.k = 2
+        self.assertEqual(owner.name, "k")
+        del owner
+        gc.collect()
+        obj.k = 3  # Drops the dead observer.
+        self.assertNotIn(id(obj), _observers)
+
+
+if __name__ == "__main__":
+    unittest.main()
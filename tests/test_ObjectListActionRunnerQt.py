@@ -0,0 +1,67 @@
+""" test_ObjectListActionRunnerQt.py: Copying a worker process's changes back to slotted objects.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+
+import copy
+import os
+import sys
+import unittest
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from ObjectListActionRunnerQt import copyAttributes
+
+
+class Base(object):
+    __slots__ = ('a', '__p')
+
+    def __init__(self):
+        self.a = 1
+        self.__p = 1
+
+    def private(self):
+        return self.__p
+
+
+class Slotted(Base):
+    __slots__ = 'b'
+
+    def __init__(self):
+        Base.__init__(self)
+        self.b = 1
+
+
+class Mixed(Base):
+    pass
+
+
+class TestCopyAttributes(unittest.TestCase):
+    def test_slots(self):
+        obj = Slotted()
+        changed = copy.deepcopy(obj)
+        changed.a = 10
+        changed.b = 20
+        changed._Base__p = 30
+        copyAttributes(changed, obj)
+        self.assertEqual((obj.a, obj.b, obj.private()), (10, 20, 30))
+
+    def test_unset_slot_is_deleted(self):
+        obj = Slotted()
+        changed = copy.deepcopy(obj)
+        del changed.b
+        copyAttributes(changed, obj)
+        self.assertFalse(hasattr(obj, 'b'))
+
+    def test_slots_and_dict(self):
+        obj = Mixed()
+        changed = copy.deepcopy(obj)
+        changed.a = 11
+        changed.extra = 12
+        copyAttributes(changed, obj)
+        self.assertEqual((obj.a, obj.extra), (11, 12))
+
+
+if __name__ == "__main__":
+    unittest.main()
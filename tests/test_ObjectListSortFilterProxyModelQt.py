@@ -0,0 +1,90 @@
+""" test_ObjectListSortFilterProxyModelQt.py: Sorting columns whose values cannot be ordered.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+
+import datetime
+import os
+import sys
+import unittest
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+try:
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+except ImportError:
+    from PyQt4.QtCore import Qt
+    from PyQt4.QtGui import QApplication
+from ObjectListTableModelViewQt import ObjectListTableModelQt
+from ObjectListSortFilterProxyModelQt import ObjectListSortFilterProxyModelQt
+
+
+class UTC(datetime.tzinfo):
+    def utcoffset(self, dt):
+        return datetime.timedelta(0)
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        return "UTC"
+
+
+class Obj(object):
+    def __init__(self, when, mapping):
+        self.when = when
+        self.mapping = mapping
+
+    def clicked(self):
+        pass
+
+
+class TestUnorderableSortColumns(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.objects = [
+            Obj(datetime.datetime(2020, 1, 3), {'a': 1}),
+            Obj(datetime.datetime(2020, 1, 1, tzinfo=UTC()), {'b': 2}),
+            Obj(datetime.datetime(2020, 1, 2), {'a': 0}),
+            Obj(None, {})]
+        properties = [
+            {'attr': "clicked", 'header': "Button", 'action': "button", 'text': "Click Me!"},
+            {'attr': "when", 'header': "When"},
+            {'attr': "mapping", 'header': "Mapping"},
+            {'header': "No Attr"}]
+        self.model = ObjectListTableModelQt(self.objects, properties)
+        self.proxy = ObjectListSortFilterProxyModelQt(self.model)
+
+    def sourceRows(self):
+        return [self.proxy.sourceRow(row) for row in range(self.proxy.rowCount())]
+
+    def test_button_and_no_attr_columns_keep_source_order(self):
+        for column in (0, 3):
+            for order in (Qt.AscendingOrder, Qt.DescendingOrder):
+                self.proxy.setSortColumns([(column, order)])
+                self.assertEqual(self.sourceRows(), [0, 1, 2, 3])
+
+    def test_naive_and_aware_datetimes(self):
+        self.proxy.sort(1, Qt.AscendingOrder)
+        rows = self.sourceRows()
+        self.assertEqual(sorted(rows), [0, 1, 2, 3])
+        self.assertLess(rows.index(2), rows.index(0))  # Naive datetimes are still in order.
+        self.assertEqual(rows[-1], 3)  # Missing values last.
+        self.objects[3].when = datetime.datetime(2020, 1, 4)
+        self.model.setData(self.model.index(3, 1), self.objects[3].when)  # Incremental re-placement.
+        self.assertEqual(sorted(self.sourceRows()), [0, 1, 2, 3])
+
+    def test_dicts(self):
+        self.proxy.sort(2, Qt.DescendingOrder)
+        self.assertEqual(sorted(self.sourceRows()), [0, 1, 2, 3])
+        self.model.insertObjects(1, [Obj(None, {"c": 3})])  # Incremental insertion.
+        self.assertEqual(sorted(self.sourceRows()), [0, 1, 2, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()